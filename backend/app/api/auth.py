@@ -1,27 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 import os
 
-from ..core.database import SessionLocal
+from ..core.database import get_db
 from ..models.user import User
 from ..core.config import settings
 from ..services.clerk_service import clerk_service
+from ..services.password_service import password_hasher, PasswordPoolSaturated
+from ..services.principal_cache import Principal, principal_cache
 
 router = APIRouter()
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 class UserRegister(BaseModel):
     email: str
@@ -39,11 +33,24 @@ class Token(BaseModel):
     token_type: str
     user: dict
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def _password_pool_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordPoolSaturated:
+        raise _password_pool_busy()
+
+async def get_password_hash(password):
+    try:
+        return await password_hasher.hash(password)
+    except PasswordPoolSaturated:
+        raise _password_pool_busy()
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -52,21 +59,25 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    from jose import jwt  # deferred to first use; see decode_access_token
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
 @router.post("/register", response_model=Token)
-async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register_user(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
     # Check if user exists
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    db_user = result.scalar_one_or_none()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
+    # Don't hold a connection while bcrypt runs
+    await db.commit()
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     db_user = User(
         email=user_data.email,
         first_name=user_data.firstName,
@@ -75,8 +86,15 @@ async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
         password_hash=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Registered concurrently while the password was hashing
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    await db.refresh(db_user)
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -98,16 +116,27 @@ async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
     }
 
 @router.post("/login", response_model=Token)
-async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+async def login_user(user_credentials: UserLogin, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.email == user_credentials.email))
+    user = result.scalar_one_or_none()
+    # Don't hold a connection while bcrypt runs
+    await db.commit()
     
-    if not user or not verify_password(user_credentials.password, user.password_hash):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_password(user_credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Transparently upgrade hashes made with an outdated bcrypt cost
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id)}, expires_delta=access_token_expires
@@ -126,28 +155,44 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
         "user": user_dict
     }
 
-@router.get("/verify")
-async def verify_token(token: str = Depends(security), db: Session = Depends(get_db)):
+def decode_access_token(token: str) -> int:
+    """Return the user id carried by an access token"""
+    # python-jose pulls in the cryptography backends, so it is imported on
+    # the first token rather than at worker start; afterwards this is a
+    # sys.modules lookup
+    from jose import JWTError, jwt
     try:
-        payload = jwt.decode(token.credentials, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    return int(user_id)
+
+async def get_current_principal(
+    token: str = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Resolve the bearer token to a Principal, hitting the users table only on cache miss"""
+    user_id = decode_access_token(token.credentials)
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal = Principal.from_user(user)
+        principal_cache.put(principal)
+        # End the read so the connection is not held while the handler awaits
+        # services that need connections of their own
+        await db.commit()
     
-    return {
-        "user": {
-            "id": user.id,
-            "email": user.email,
-            "name": f"{user.first_name} {user.last_name}",
-            "role": user.role
-        }
-    }
+    return principal
+
+@router.get("/verify")
+async def verify_token(principal: Principal = Depends(get_current_principal)):
+    return {"user": principal.to_dict()}
 
 @router.post("/logout")
 async def logout_user():
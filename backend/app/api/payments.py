@@ -1,23 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from pydantic import BaseModel
-import stripe
+from typing import Optional
+import uuid
 
-from ..core.database import SessionLocal
-from ..models.user import User
-from ..models.payment import Transaction, TransactionType, TransactionStatus
-from ..core.config import settings
-from .auth import security, verify_token
+from .auth import get_current_principal
+from ..services.principal_cache import Principal
+from ..services.stripe_service import CheckoutError, stripe_service
+from ..services.webhook_service import webhook_service
 
 router = APIRouter()
-stripe.api_key = settings.STRIPE_SECRET_KEY
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 class CheckoutSession(BaseModel):
     type: str
@@ -26,37 +17,31 @@ class CheckoutSession(BaseModel):
 @router.post("/create-checkout-session")
 async def create_checkout_session(
     session_data: CheckoutSession,
-    token: str = Depends(security),
-    db: Session = Depends(get_db)
+    principal: Principal = Depends(get_current_principal),
+    idempotency_key: Optional[str] = Header(None)
+):
+    if session_data.type != "add_funds":
+        raise HTTPException(status_code=400, detail="Unsupported checkout type")
+    # A client retrying with the same Idempotency-Key gets the same session
+    key = f"checkout:{principal.id}:{idempotency_key or uuid.uuid4().hex}"
+    try:
+        checkout_session = await stripe_service.create_top_up_checkout(principal.id, principal.email, key)
+    except CheckoutError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+    return {"url": checkout_session.url}
+
+@router.post("/webhook")
+async def stripe_webhook(
+    request: Request,
+    stripe_signature: Optional[str] = Header(None)
 ):
-    user_info = await verify_token(token, db)
-    user = db.query(User).filter(User.id == user_info["user"]["id"]).first()
-    
+    # Acknowledge once the event is stored; balances are credited by the
+    # webhook service in batches
+    payload = await request.body()
     try:
-        if session_data.type == "add_funds":
-            checkout_session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[{
-                    'price_data': {
-                        'currency': 'usd',
-                        'product_data': {
-                            'name': 'Account Balance Top-up',
-                        },
-                        'unit_amount': 2500,  # $25.00
-                    },
-                    'quantity': 1,
-                }],
-                mode='payment',
-                success_url='http://localhost:5173/dashboard?payment=success',
-                cancel_url='http://localhost:5173/dashboard?payment=cancelled',
-                customer_email=user.email,
-                metadata={
-                    'user_id': str(user.id),
-                    'type': 'add_funds'
-                }
-            )
-        
-        return {"url": checkout_session.url}
-    
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        event = webhook_service.verify(payload, stripe_signature)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook")
+    queued = await webhook_service.enqueue(event)
+    return {"received": True, "duplicate": not queued}
@@ -1,42 +1,51 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import Optional
 
-from ..core.database import SessionLocal
+from ..core.cache import PRODUCTS, etag_response, response_cache
+from ..core.replicas import get_replica_db
+from ..core.pagination import keyset, page, set_next_cursor
 from ..models.product import Product
-from ..models.user import User
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+PRODUCT_ORDER = [(Product.id, False)]
 
 @router.get("/")
 async def get_products(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_replica_db)
 ):
-    query = db.query(Product).filter(Product.is_active == True)
+    async def load():
+        query = select(Product).options(
+            joinedload(Product.seller)
+        ).where(Product.is_active == True)
+        
+        if category:
+            query = query.where(Product.type == category)
+        
+        result = await db.execute(keyset(query, PRODUCT_ORDER, cursor, limit))
+        products, next_cursor = page(result.scalars().all(), limit, lambda p: (p.id,))
+        
+        product_list = []
+        for product in products:
+            seller = product.seller
+            product_list.append({
+                "id": product.id,
+                "name": product.name,
+                "description": product.description,
+                "price": product.price,
+                "category": product.type,
+                "seller": f"{seller.first_name} {seller.last_name}" if seller else None
+            })
+        return product_list, next_cursor
     
-    if category:
-        query = query.filter(Product.type == category)
-    
-    products = query.all()
-    
-    product_list = []
-    for product in products:
-        seller = db.query(User).filter(User.id == product.seller_id).first()
-        product_list.append({
-            "id": product.id,
-            "name": product.name,
-            "description": product.description,
-            "price": product.price,
-            "category": product.type,
-            "seller": f"{seller.first_name} {seller.last_name}" if seller else None
-        })
-    
-    return product_list
+    product_list, next_cursor = await response_cache.get_or_load(PRODUCTS, request, load)
+    set_next_cursor(request, response, next_cursor)
+    return etag_response(request, response, product_list)
@@ -1,98 +1,268 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import and_, exists, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from datetime import datetime
 
-from ..core.database import SessionLocal
-from ..models.user import User
-from ..models.reading import ReadingSession, SessionType, SessionStatus
-from .auth import security, verify_token
+from ..core.cache import READERS, etag_response, response_cache
+from ..core.database import get_db, get_read_db
+from ..core.replicas import get_replica_db
+from ..core.pagination import decode_cursor, keyset, page, set_next_cursor
+from ..models.user import User, Reader, UserRole
+from ..models.reading import ReadingSession, SessionType, SessionStatus, ChatMessage
+from .auth import get_current_principal
+from ..services.principal_cache import Principal
+from ..services.presence_service import presence_registry, parse_specialties, ONLINE, BUSY, OFFLINE
+from ..services.billing_service import billing_service
+from ..services.ledger_service import to_dollars
+from ..services.reader_stats_service import add_completed_sessions, apply_rating, reader_stats
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class SessionRequest(BaseModel):
     reader_id: int
     session_type: SessionType
 
+class SessionRating(BaseModel):
+    rating: int = Field(ge=1, le=5)
+    review: Optional[str] = None
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _reader_dict(user: User) -> dict:
+    """Profile fields only; live status is overlaid per request from presence"""
+    profile = user.reader_profile
+    specialties = parse_specialties(profile.specialties) if profile else ()
+    return {
+        "id": user.id,
+        "name": (profile.display_name if profile else None) or f"{user.first_name} {user.last_name}",
+        "specialty": specialties[0] if specialties else None,
+        "specialties": list(specialties),
+        "rating": profile.rating if profile else 0.0,
+        "rate": profile.chat_rate if profile else None
+    }
+
+READER_ORDER = [(User.id, False)]
+MIN_READING_BALANCE_CENTS = 500
+
 @router.get("/")
 async def get_readers(
+    request: Request,
+    response: Response,
     specialty: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_replica_db)
 ):
-    # Get all reader users
-    query = db.query(User).filter(User.role == "reader")
+    # Online/busy readers are answered from the presence registry alone,
+    # paged by user id like the database listing
+    if status in (ONLINE, BUSY):
+        online = sorted(presence_registry.online_readers(specialty, status), key=lambda p: p.user_id)
+        if cursor:
+            (after,) = decode_cursor(cursor, READER_ORDER)
+            online = [p for p in online if p.user_id > after]
+        online, next_cursor = page(online, limit, lambda p: (p.user_id,))
+        set_next_cursor(request, response, next_cursor)
+        return [p.to_dict() for p in online]
+    
+    if status and status != OFFLINE:
+        return etag_response(request, response, [])
+    
+    query = select(User).options(
+        joinedload(User.reader_profile)
+    ).where(User.role == UserRole.READER)
+    
+    if specialty:
+        # Whole-element match on the stored JSON array, the same rule the
+        # presence index uses, so every row fetched belongs on the page
+        query = query.join(Reader, Reader.user_id == User.id).where(
+            Reader.specialties.ilike(f"%{_like_escape(json.dumps(specialty.strip()))}%", escape="\\")
+        )
     
-    if status:
-        # Filter by online status if provided
-        pass  # Would join with reader status table
+    async def load():
+        result = await db.execute(keyset(query, READER_ORDER, cursor, limit))
+        readers, next_cursor = page(result.scalars().all(), limit, lambda u: (u.id,))
+        return [_reader_dict(reader) for reader in readers], next_cursor
     
-    readers = query.all()
+    if status == OFFLINE:
+        # Depends on who is connected right now, so it is filtered in SQL
+        # against the live presence set and not cached
+        query = query.where(User.id.notin_(presence_registry.online_ids()))
+        profiles, next_cursor = await load()
+    else:
+        # The cache key carries the query string, so specialty, cursor and
+        # limit each get their own entry
+        profiles, next_cursor = await response_cache.get_or_load(READERS, request, load)
+    set_next_cursor(request, response, next_cursor)
     
-    reader_list = []
-    for reader in readers:
-        reader_list.append({
-            "id": reader.id,
-            "name": f"{reader.first_name} {reader.last_name}",
-            "specialty": "Tarot",  # Would come from reader profile
-            "rating": 4.8,  # Would be calculated
-            "rate": 4.99,  # Would come from reader rates
-            "status": "online"  # Would come from reader status
-        })
+    reader_list = [dict(profile, status=presence_registry.status_of(profile["id"])) for profile in profiles]
     
-    return reader_list
+    return etag_response(request, response, reader_list)
 
 @router.post("/request")
 async def request_reading(
     session_data: SessionRequest,
-    token: str = Depends(security),
-    db: Session = Depends(get_db)
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
-    user_info = await verify_token(token, db)
-    client_id = user_info["user"]["id"]
-    
-    # Check client balance
-    client = db.query(User).filter(User.id == client_id).first()
-    if client.balance < 5.0:  # Minimum balance check
+    # Minimum balance check and insert in one statement, so the balance is
+    # judged at the moment the session is created
+    created = await db.execute(
+        insert(ReadingSession).from_select(
+            ["client_id", "reader_id", "type", "status", "rate_per_minute"],
+            select(
+                literal(principal.id),
+                literal(session_data.reader_id),
+                literal(session_data.session_type, ReadingSession.type.type),
+                literal(SessionStatus.PENDING, ReadingSession.status.type),
+                literal(4.99)  # Would get from reader rates
+            ).where(exists().where(User.id == principal.id, User.balance_cents >= MIN_READING_BALANCE_CENTS))
+        ).returning(ReadingSession.id)
+    )
+    session_id = created.scalar()
+    if session_id is None:
         raise HTTPException(status_code=400, detail="Insufficient balance")
+    await db.commit()
     
-    # Create reading session
-    session = ReadingSession(
-        client_id=client_id,
-        reader_id=session_data.reader_id,
-        type=session_data.session_type,
-        status=SessionStatus.PENDING,
-        rate_per_minute=4.99  # Would get from reader rates
-    )
+    return {"session_id": session_id, "status": "pending"}
+
+async def _get_participant_session(session_id: int, principal: Principal, db: AsyncSession) -> ReadingSession:
+    session = await db.get(ReadingSession, session_id)
+    if session is None or principal.id not in (session.client_id, session.reader_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+@router.post("/{session_id}/start")
+async def start_reading(
+    session_id: int,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    session = await _get_participant_session(session_id, principal, db)
+    if session.status != SessionStatus.PENDING:
+        raise HTTPException(status_code=400, detail="Session is not pending")
     
-    db.add(session)
-    db.commit()
-    db.refresh(session)
+    balance_cents = await db.scalar(select(User.balance_cents).where(User.id == session.client_id))
+    session.status = SessionStatus.ACTIVE
+    session.start_time = datetime.utcnow()
+    # This worker bills the session; see BillingService for the lease
+    session.billing_owner = billing_service.worker_id
+    session.billing_lease_until = billing_service.lease_until()
+    await db.commit()
     
-    return {"session_id": session.id, "status": "pending"}
+    billing_service.start_session(session, balance_cents)
+    return {"session_id": session.id, "status": "active"}
 
-@router.get("/online")
-async def get_online_readers(db: Session = Depends(get_db)):
-    # Would typically check reader status table
-    readers = db.query(User).filter(User.role == "reader").limit(10).all()
+@router.post("/{session_id}/end")
+async def end_reading(
+    session_id: int,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    session = await _get_participant_session(session_id, principal, db)
+    if session.status != SessionStatus.ACTIVE:
+        raise HTTPException(status_code=400, detail="Session is not active")
+    # Return the connection to the pool before the billing flush takes one
+    await db.commit()
+    
+    billed = await billing_service.end_session(session.id)
+    if billed is None:
+        # Billed by another worker (or none): record the end here. The owner
+        # charges up to this end time at its next flush and stops billing.
+        closed = await db.execute(
+            update(ReadingSession)
+            .where(ReadingSession.id == session.id, ReadingSession.status == SessionStatus.ACTIVE)
+            .values(status=SessionStatus.COMPLETED, end_time=datetime.utcnow())
+        )
+        if closed.rowcount != 1:
+            raise HTTPException(status_code=400, detail="Session is not active")
+        await add_completed_sessions(db, {session.reader_id: 1})
+        await db.commit()
+        reader_stats.sessions_completed({session.reader_id: 1})
+        return {"session_id": session.id, "status": "completed",
+                "duration": session.duration_minutes, "totalCost": session.total_cost}
+    
+    return {"session_id": session.id, "status": "completed",
+            "duration": billed.duration_minutes, "totalCost": to_dollars(billed.total_cents)}
+
+@router.get("/{session_id}/billing")
+async def get_session_billing(
+    session_id: int,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    session = await _get_participant_session(session_id, principal, db)
+    billing = await billing_service.get_session_billing(session.id)
+    if billing is None:
+        return {"elapsed_time": (session.duration_minutes or 0) * 60,
+                "total_cost": session.total_cost or 0.0, "client_balance": None}
+    return billing
+
+@router.post("/{session_id}/rate")
+async def rate_reading(
+    session_id: int,
+    rating_data: SessionRating,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    session = await _get_participant_session(session_id, principal, db)
+    if session.client_id != principal.id:
+        raise HTTPException(status_code=403, detail="Only the client can rate a reading")
+    if session.status != SessionStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="Session is not completed")
     
-    online_readers = []
-    for reader in readers:
-        online_readers.append({
-            "id": reader.id,
-            "name": f"{reader.first_name} {reader.last_name}",
-            "specialty": "Tarot Reading",
-            "rating": 4.8,
-            "rate": 4.99,
-            "status": "online"
-        })
+    previous = session.client_rating
+    session.client_rating = rating_data.rating
+    session.client_review = rating_data.review
+    stats = await apply_rating(db, session.reader_id, rating_data.rating, previous)
+    await db.commit()
     
-    return online_readers
+    if stats is not None:
+        reader_stats.rating_changed(session.reader_id, stats.rating, stats.total_reviews, stats.display_name)
+    return {"session_id": session.id, "rating": rating_data.rating,
+            "readerRating": round(stats.rating, 2) if stats is not None else None}
+
+# Newest first; with session_id pinned this walks ix_chat_messages_session_id_id
+MESSAGE_ORDER = [(ChatMessage.id, True)]
+
+@router.get("/{session_id}/messages")
+async def get_session_messages(
+    session_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    session = await _get_participant_session(session_id, principal, db)
+    query = select(ChatMessage).where(ChatMessage.session_id == session.id)
+    result = await db.execute(keyset(query, MESSAGE_ORDER, cursor, limit))
+    messages, next_cursor = page(result.scalars().all(), limit, lambda m: (m.id,))
+    set_next_cursor(request, response, next_cursor)
+    
+    return [
+        {
+            "id": message.id,
+            "sender_id": message.sender_id,
+            "content": message.content,
+            "timestamp": message.timestamp
+        }
+        for message in messages
+    ]
+
+@router.get("/top")
+async def get_top_readers(limit: int = Query(10, ge=1, le=100)):
+    # Served from the in-memory leaderboard, no database access
+    return [ranking.to_dict() for ranking in reader_stats.top(limit)]
+
+@router.get("/online")
+async def get_online_readers(specialty: Optional[str] = None, limit: int = Query(10, ge=1, le=200)):
+    # Served entirely from the presence registry, no database access
+    readers = presence_registry.online_readers(specialty, limit=limit)
+    return [reader.to_dict() for reader in readers]
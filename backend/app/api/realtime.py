@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+import json
+
+from ..core.database import get_read_db
+from ..models.reading import ReadingSession
+from ..services.websocket_manager import manager, PRESENCE_ROOM
+from ..services.presence_service import ONLINE, BUSY
+from ..services.chat_service import chat_service
+from .auth import decode_access_token
+
+router = APIRouter()
+
+async def can_join(room: str, user_id: int, db: AsyncSession) -> bool:
+    """Stream rooms and presence are public; session rooms are for participants only"""
+    if room == PRESENCE_ROOM or room.startswith("stream:"):
+        return True
+    if room.startswith("session:"):
+        try:
+            session = await db.get(ReadingSession, int(room.split(":", 1)[1]))
+        except ValueError:
+            return False
+        finally:
+            await db.close()
+        return session is not None and user_id in (session.client_id, session.reader_id)
+    return False
+
+@router.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket, token: str, db: AsyncSession = Depends(get_read_db)):
+    try:
+        user_id = str(decode_access_token(token))
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await manager.connect(websocket, user_id)
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            if not isinstance(message, dict):
+                continue
+
+            message_type = message.get("type")
+            room = message.get("room")
+            if message_type == "heartbeat":
+                manager.heartbeat(user_id)
+            elif message_type == "status" and message.get("status") in (ONLINE, BUSY):
+                manager.presence.set_status(int(user_id), message["status"])
+            elif message_type == "subscribe" and isinstance(room, str):
+                if await can_join(room, int(user_id), db):
+                    manager.subscribe(user_id, room)
+                    await manager.send_personal_message({"type": "subscribed", "room": room}, user_id)
+                else:
+                    await manager.send_personal_message({"type": "error", "detail": "Cannot join room"}, user_id)
+            elif message_type == "unsubscribe" and isinstance(room, str):
+                manager.unsubscribe(user_id, room)
+            elif message_type == "chat" and isinstance(room, str) and room != PRESENCE_ROOM:
+                if user_id in manager.rooms.get(room, ()):
+                    content = str(message.get("content", ""))
+                    sent_at = datetime.utcnow()
+                    if room.startswith("session:"):
+                        # Reading-session chat is kept; persisted in batches off the hot path
+                        chat_service.append(int(room.split(":", 1)[1]), int(user_id), content, sent_at)
+                    await manager.publish(room, {
+                        "type": "chat",
+                        "room": room,
+                        "sender_id": int(user_id),
+                        "content": content,
+                        "timestamp": sent_at.isoformat()
+                    })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(user_id, websocket)
@@ -1,53 +1,105 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
+from pydantic import BaseModel, Field
 
-from ..core.database import SessionLocal
+from ..core.cache import STREAMS, etag_response, response_cache
+from ..core.replicas import get_replica_db
+from ..core.pagination import keyset, page, set_next_cursor
 from ..models.stream import LiveStream
-from ..models.user import User
+from ..services.viewer_service import viewer_counter
+from ..services.gift_service import gift_service, StreamNotLive
+from ..services.ledger_service import InsufficientFunds
+from ..services.principal_cache import Principal
+from .auth import get_current_principal
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class GiftRequest(BaseModel):
+    gift_type: str = Field(min_length=1, max_length=50)
+    amount: float = Field(gt=0, le=10000)
+    message: Optional[str] = Field(None, max_length=500)
+
+LIVE_ORDER = [(LiveStream.id, False)]
+SCHEDULED_ORDER = [(LiveStream.scheduled_start, False), (LiveStream.id, False)]
 
 @router.get("/live")
-async def get_live_streams(db: Session = Depends(get_db)):
-    streams = db.query(LiveStream).filter(LiveStream.is_live == True).all()
+async def get_live_streams(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_replica_db)
+):
+    query = select(LiveStream).options(
+        joinedload(LiveStream.reader)
+    ).where(LiveStream.is_live == True)
+    result = await db.execute(keyset(query, LIVE_ORDER, cursor, limit))
+    streams, next_cursor = page(result.scalars().all(), limit, lambda s: (s.id,))
+    set_next_cursor(request, response, next_cursor)
     
     stream_list = []
     for stream in streams:
-        reader = db.query(User).filter(User.id == stream.reader_id).first()
+        reader = stream.reader
         stream_list.append({
             "id": stream.id,
-            "reader": f"{reader.first_name} {reader.last_name}",
+            "reader": f"{reader.first_name} {reader.last_name}" if reader else None,
             "title": stream.title,
-            "viewers": stream.viewer_count,
+            # Joins/leaves on this worker not yet flushed are added on top
+            "viewers": max(0, (stream.viewer_count or 0) + viewer_counter.pending_delta(stream.id)),
+            "uniqueViewers": viewer_counter.unique_viewers(stream.id, stream.unique_viewers),
             "category": "Tarot"
         })
     
     return stream_list
 
 @router.get("/scheduled")
-async def get_scheduled_streams(db: Session = Depends(get_db)):
-    streams = db.query(LiveStream).filter(
-        LiveStream.is_live == False,
-        LiveStream.scheduled_start.isnot(None)
-    ).all()
-    
-    stream_list = []
-    for stream in streams:
-        reader = db.query(User).filter(User.id == stream.reader_id).first()
-        stream_list.append({
-            "id": stream.id,
-            "reader": f"{reader.first_name} {reader.last_name}",
-            "title": stream.title,
-            "scheduledFor": stream.scheduled_start.isoformat(),
-            "category": "Astrology"
-        })
+async def get_scheduled_streams(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_replica_db)
+):
+    async def load():
+        query = select(LiveStream).options(
+            joinedload(LiveStream.reader)
+        ).where(
+            LiveStream.is_live == False,
+            LiveStream.scheduled_start.isnot(None)
+        )
+        result = await db.execute(keyset(query, SCHEDULED_ORDER, cursor, limit))
+        streams, next_cursor = page(result.scalars().all(), limit, lambda s: (s.scheduled_start, s.id))
+        
+        stream_list = []
+        for stream in streams:
+            reader = stream.reader
+            stream_list.append({
+                "id": stream.id,
+                "reader": f"{reader.first_name} {reader.last_name}" if reader else None,
+                "title": stream.title,
+                "scheduledFor": stream.scheduled_start.isoformat(),
+                "category": "Astrology"
+            })
+        return stream_list, next_cursor
     
-    return stream_list
+    stream_list, next_cursor = await response_cache.get_or_load(STREAMS, request, load)
+    set_next_cursor(request, response, next_cursor)
+    return etag_response(request, response, stream_list)
+
+@router.post("/{stream_id}/gifts")
+async def send_gift(
+    stream_id: int,
+    gift: GiftRequest,
+    principal: Principal = Depends(get_current_principal)
+):
+    try:
+        return await gift_service.send_gift(
+            stream_id, principal.id, gift.gift_type, round(gift.amount, 2), gift.message
+        )
+    except StreamNotLive:
+        raise HTTPException(status_code=404, detail="Stream is not live")
+    except InsufficientFunds:
+        raise HTTPException(status_code=400, detail="Insufficient balance")
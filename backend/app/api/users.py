@@ -1,47 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
-import stripe
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
 
-from ..core.database import SessionLocal
+from ..core.database import get_read_db
+from ..core.replicas import get_replica_db
+from ..core.pagination import keyset, page, set_next_cursor
 from ..models.user import User
 from ..models.reading import ReadingSession
 from ..models.payment import Transaction
 from ..core.config import settings
-from .auth import security, verify_token
+from .auth import get_current_principal
+from ..services.principal_cache import Principal
+from ..services.ledger_service import to_dollars
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+HISTORY_ORDER = [(ReadingSession.end_time, True), (ReadingSession.id, True)]
 
 @router.get("/balance")
-async def get_user_balance(token: str = Depends(security), db: Session = Depends(get_db)):
-    user_info = await verify_token(token, db)
-    user = db.query(User).filter(User.id == user_info["user"]["id"]).first()
+async def get_user_balance(principal: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_read_db)):
+    balance_cents = await db.scalar(select(User.balance_cents).where(User.id == principal.id))
     
-    return {"balance": user.balance}
+    return {"balance": to_dollars(balance_cents)}
 
 @router.get("/sessions")
-async def get_user_sessions(token: str = Depends(security), db: Session = Depends(get_db)):
-    user_info = await verify_token(token, db)
-    
-    sessions = db.query(ReadingSession).filter(
-        ReadingSession.client_id == user_info["user"]["id"],
-        ReadingSession.status == "completed"
-    ).order_by(desc(ReadingSession.end_time)).limit(20).all()
+async def get_user_sessions(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_replica_db)
+):
+    query = select(ReadingSession).options(
+        joinedload(ReadingSession.reader)
+    ).where(
+        ReadingSession.client_id == principal.id,
+        ReadingSession.status == "completed",
+        ReadingSession.end_time.isnot(None)
+    )
+    result = await db.execute(keyset(query, HISTORY_ORDER, cursor, limit))
+    sessions, next_cursor = page(result.scalars().all(), limit, lambda s: (s.end_time, s.id))
+    set_next_cursor(request, response, next_cursor)
     
     session_list = []
     for session in sessions:
-        reader = db.query(User).filter(User.id == session.reader_id).first()
+        reader = session.reader
         session_list.append({
             "id": session.id,
-            "readerName": f"{reader.first_name} {reader.last_name}",
+            "readerName": f"{reader.first_name} {reader.last_name}" if reader else None,
             "type": session.type,
             "duration": session.duration_minutes,
             "totalCost": session.total_cost,
@@ -52,29 +61,30 @@ async def get_user_sessions(token: str = Depends(security), db: Session = Depend
     return session_list
 
 @router.get("/favorites")
-async def get_user_favorites(token: str = Depends(security), db: Session = Depends(get_db)):
-    user_info = await verify_token(token, db)
-    
+async def get_user_favorites(principal: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_read_db)):
     # This would typically come from a favorites table
     # For now, return empty array
     return []
 
 @router.get("/upcoming")
-async def get_upcoming_sessions(token: str = Depends(security), db: Session = Depends(get_db)):
-    user_info = await verify_token(token, db)
-    
-    sessions = db.query(ReadingSession).filter(
-        ReadingSession.client_id == user_info["user"]["id"],
-        ReadingSession.status == "pending"
-    ).order_by(ReadingSession.start_time).all()
+async def get_upcoming_sessions(principal: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(
+        select(ReadingSession).options(
+            joinedload(ReadingSession.reader)
+        ).where(
+            ReadingSession.client_id == principal.id,
+            ReadingSession.status == "pending"
+        ).order_by(ReadingSession.start_time)
+    )
+    sessions = result.scalars().all()
     
     session_list = []
     for session in sessions:
-        reader = db.query(User).filter(User.id == session.reader_id).first()
+        reader = session.reader
         session_list.append({
             "id": session.id,
-            "reader": f"{reader.first_name} {reader.last_name}",
-            "scheduledTime": session.start_time.isoformat(),
+            "reader": f"{reader.first_name} {reader.last_name}" if reader else None,
+            "scheduledTime": session.start_time.isoformat() if session.start_time else None,
             "type": session.type
         })
     
@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Set, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from .config import settings
+
+PRODUCTS = "products"
+STREAMS = "streams"
+READERS = "readers"
+
+class MemoryBackend:
+    """Per-process LRU store with TTLs"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def invalidate(self, namespace: str):
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+        self._generations.clear()
+
+class RedisBackend:
+    """Shared store so every worker sees the same entries and invalidations"""
+
+    def __init__(self, url: str, prefix: str = "soulseer:cache"):
+        self.url = url
+        self.prefix = prefix
+        self._redis = None
+        self._sync_redis = None
+        self._pending: Set[asyncio.Task] = set()
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(self.url)
+        return self._redis
+
+    @property
+    def sync_redis(self):
+        """Blocking client for commits made outside an event loop (scripts)"""
+        if self._sync_redis is None:
+            import redis
+
+            self._sync_redis = redis.from_url(self.url)
+        return self._sync_redis
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.redis.get(f"{self.prefix}:{key}")
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self.redis.set(f"{self.prefix}:{key}", json.dumps(jsonable_encoder(value)), px=int(ttl * 1000))
+
+    async def generation(self, namespace: str) -> int:
+        return int(await self.redis.get(f"{self.prefix}:gen:{namespace}") or 0)
+
+    def invalidate(self, namespace: str):
+        """Bump the shared generation. ORM hooks are synchronous, so inside
+        the event loop the increment is scheduled on it (and the task kept
+        until it completes); outside one, e.g. a seed or repair script, it is
+        sent with a blocking client."""
+        key = f"{self.prefix}:gen:{namespace}"
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                self.sync_redis.incr(key)
+            except Exception as e:
+                print(f"Error invalidating cached {namespace}: {e}")
+            return
+        task = loop.create_task(self.redis.incr(key))
+        self._pending.add(task)
+        task.add_done_callback(self._invalidated)
+
+    def _invalidated(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error invalidating cached listings: {task.exception()}")
+
+    def clear(self):
+        pass
+
+class ResponseCache:
+    """Caches the payload of public list endpoints.
+
+    Keys carry a per-namespace generation number, so invalidating a namespace
+    is a single counter bump; stale entries are never read again and age out
+    on their TTL.
+    """
+
+    def __init__(self, backend=None, ttl: float = 30.0):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, namespace: str, request: Request, loader: Callable[[], Awaitable[Any]],
+                          ttl: Optional[float] = None) -> Any:
+        if not self.enabled:
+            return await loader()
+        generation = await self.backend.generation(namespace)
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        key = f"{namespace}:{generation}:{request.url.path}?{query}"
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        await self.backend.set(key, value, ttl or self.ttl)
+        return value
+
+    def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            self.backend.invalidate(namespace)
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+def etag_response(request: Request, response: Response, content: Any) -> Response:
+    """Serialize ``content`` once, tag it with a strong ETag and answer a
+    matching If-None-Match with 304 and no body. Headers already set on the
+    endpoint's ``response`` (pagination cursors) are carried over."""
+    body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+    etag = etag_for(body)
+    headers = dict(response.headers)
+    headers.pop("content-length", None)
+    headers["ETag"] = etag
+    headers["Cache-Control"] = "no-cache"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def create_cache_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(settings.REDIS_URL)
+    return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+# Create a global instance
+response_cache = ResponseCache(create_cache_backend(), ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+
+# Write-driven invalidation: model -> (namespaces, attributes whose change matters; None = any)
+_WATCHED: Dict[type, Tuple[Sequence[str], Optional[Sequence[str]]]] = {}
+
+def invalidate_on_change(model: type, namespaces: Sequence[str], attributes: Optional[Sequence[str]] = None):
+    _WATCHED[model] = (namespaces, attributes)
+
+def _affected(obj, dirty: bool) -> Sequence[str]:
+    watched = _WATCHED.get(type(obj))
+    if watched is None:
+        return ()
+    namespaces, attributes = watched
+    if dirty and attributes is not None:
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in attributes):
+            return ()
+    return namespaces
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault("cache_invalidations", set())
+    for obj in chain(session.new, session.deleted):
+        pending.update(_affected(obj, dirty=False))
+    for obj in session.dirty:
+        pending.update(_affected(obj, dirty=True))
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    pending = session.info.pop("cache_invalidations", None)
+    if pending:
+        response_cache.invalidate(*pending)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("cache_invalidations", None)
+
+def _register_models():
+    from ..models.product import Product
+    from ..models.stream import LiveStream
+    from ..models.user import User, Reader
+
+    invalidate_on_change(Product, (PRODUCTS,))
+    invalidate_on_change(LiveStream, (STREAMS,))
+    invalidate_on_change(Reader, (READERS,))
+    # Seller and reader names are rendered into all three listings
+    invalidate_on_change(User, (PRODUCTS, STREAMS, READERS), ("first_name", "last_name", "role"))
+
+_register_models()
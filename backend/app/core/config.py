@@ -6,14 +6,45 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./soulseer.db"
     
+    # Connection pool for server databases (per worker process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    
+    # Read replicas for listing and history endpoints, comma separated. A
+    # replica more than REPLICA_MAX_LAG_SECONDS behind (or unreachable) is
+    # skipped and those reads go to the primary.
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_SECONDS: float = 1.0
+    
+    # SQLite (single-node deployments): one serialized writer connection and a
+    # pool of read-only connections over WAL
+    SQLITE_READ_POOL_SIZE: int = 8
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # NORMAL is durable under WAL except on power loss; FULL for that too
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE_MB: int = 256
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    
     # Clerk Authentication (Optional)
     CLERK_SECRET_KEY: Optional[str] = None
     VITE_CLERK_PUBLISHABLE_KEY: Optional[str] = None
+    CLERK_TIMEOUT_SECONDS: float = 5.0
+    CLERK_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    CLERK_MAX_CONNECTIONS: int = 20
     
     # Stripe (Optional for development)
     STRIPE_SECRET_KEY: Optional[str] = None
     STRIPE_PUBLISHABLE_KEY: Optional[str] = None
     STRIPE_WEBHOOK_SECRET: Optional[str] = None
+    STRIPE_TIMEOUT_SECONDS: float = 10.0
+    STRIPE_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    STRIPE_MAX_CONNECTIONS: int = 20
+    STRIPE_MAX_RETRIES: int = 2  # safe for POSTs: every call carries an idempotency key
+    STRIPE_WEBHOOK_BATCH_SIZE: int = 500
+    STRIPE_WEBHOOK_POLL_SECONDS: float = 1.0
     
     # WebRTC
     TURN_SERVERS: str = "relay1.expressturn.com:3480"
@@ -25,10 +56,57 @@ class Settings(BaseSettings):
     JWT_SECRET: str = "your-super-secret-jwt-key-change-this-in-production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+    
+    # Presence
+    PRESENCE_FLUSH_SECONDS: float = 5.0
+    PRESENCE_TIMEOUT_SECONDS: float = 60.0
+    
+    # WebSockets
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SLOW_CONSUMER_POLICY: str = "drop"  # drop (oldest queued message) or disconnect
+    
+    # Billing
+    BILLING_FLUSH_SECONDS: float = 5.0
+    BILLING_LEASE_SECONDS: float = 30.0  # a worker that misses renewals this long loses its sessions
+    
+    # Balance ledger snapshots
+    LEDGER_SNAPSHOT_SECONDS: float = 3600.0
+    
+    # Stream viewer counters and gift totals
+    VIEWER_FLUSH_SECONDS: float = 5.0
+    GIFT_FLUSH_SECONDS: float = 1.0
+    
+    # Reader leaderboard; reloaded to pick up changes made by other workers
+    TOP_READERS_REFRESH_SECONDS: float = 300.0
+    
+    # Chat persistence (write-behind)
+    CHAT_BATCH_SIZE: int = 500
+    CHAT_FLUSH_SECONDS: float = 1.0
+    CHAT_MAX_PENDING: int = 50000
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Cross-worker message bus: "memory" (single worker) or "redis"
+    MESSAGE_BUS_BACKEND: str = "memory"
+    MESSAGE_BUS_BATCH_SIZE: int = 100
+    MESSAGE_BUS_FLUSH_MS: float = 5.0
+    
+    # Response cache for public listings: "memory" (per worker) or "redis"
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    
+    # Metrics: statements slower than this are logged
+    SLOW_QUERY_MS: float = 250.0
+    
     # App Settings
     DEBUG: bool = True
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
@@ -1,27 +1,115 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base, sessionmaker
 from .config import settings
-import os
 
-# Use SQLite for development if no DATABASE_URL is provided
-if settings.DATABASE_URL.startswith("postgresql://"):
-    # PostgreSQL database
-    engine = create_engine(settings.DATABASE_URL)
+DATABASE_URL = settings.DATABASE_URL
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (asyncpg / aiosqlite)"""
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+def sqlite_pragmas(engine, read_only: bool = False, immediate: bool = False):
+    """Tune every new SQLite connection on ``engine``.
+
+    WAL lets readers run alongside the writer instead of blocking on it.
+    ``synchronous``, ``cache_size`` and ``mmap_size`` come from settings.
+    ``read_only`` connections refuse writes. ``immediate`` connections take
+    the write lock when their transaction begins (BEGIN IMMEDIATE), so a
+    transaction that reads first cannot fail with SQLITE_BUSY once it starts
+    writing.
+    """
+    engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE_MB) * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+        if immediate:
+            # Let the begin event below issue BEGIN instead of the driver
+            dbapi_connection.isolation_level = None
+
+    if immediate:
+        @event.listens_for(engine, "begin")
+        def _on_begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+def pool_options() -> dict:
+    """Connection pool settings for server databases (PostgreSQL). Connections
+    are checked with a ping on checkout and replaced after
+    ``DB_POOL_RECYCLE_SECONDS``, so a restarted server or a load balancer that
+    drops idle connections costs a reconnect instead of a failed request."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def create_read_engine(url: str):
+    """Async engine for read-only traffic against ``url``: a query-only pool
+    for SQLite files, the regular pool settings otherwise"""
+    if url.startswith("sqlite"):
+        engine = create_async_engine(to_async_url(url), pool_size=settings.SQLITE_READ_POOL_SIZE, max_overflow=0)
+        sqlite_pragmas(engine, read_only=True)
+        return engine
+    return create_async_engine(to_async_url(url), **pool_options())
+
+if IS_SQLITE:
+    in_memory = make_url(DATABASE_URL).database in (None, "", ":memory:")
+    # Sync engine for scripts and migrations
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    sqlite_pragmas(engine)
+    # The API writes through a single connection, so writes queue in the pool
+    # rather than contending for SQLite's lock; reads get their own pool
+    async_engine = create_async_engine(to_async_url(DATABASE_URL), pool_size=1, max_overflow=0)
+    sqlite_pragmas(async_engine, immediate=True)
+    read_engine = async_engine if in_memory else create_read_engine(DATABASE_URL)
 else:
-    # SQLite database for development
-    engine = create_engine("sqlite:///./soulseer.db", connect_args={"check_same_thread": False})
+    # PostgreSQL database
+    engine = create_engine(DATABASE_URL, pool_pre_ping=settings.DB_POOL_PRE_PING,
+                           pool_recycle=settings.DB_POOL_RECYCLE_SECONDS)
+    # Async engine used by the API; the sync engine above is kept for scripts
+    async_engine = create_async_engine(to_async_url(DATABASE_URL), **pool_options())
+    read_engine = async_engine
 
-# Create session factory
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
-# Create base class for models
+# Declarative base shared by every model in app/models, so one metadata
+# describes the whole schema
 Base = declarative_base()
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    """Dependency for read-only endpoints. On SQLite this is a query-only
+    connection from the read pool, so it never waits for the writer;
+    elsewhere it is the same database as ``get_db``."""
+    async with AsyncReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
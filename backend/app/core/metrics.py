@@ -0,0 +1,226 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from .config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED = "unmatched"
+
+class Histogram:
+    """Fixed-bucket histogram; observing is a bisect and two additions"""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield _number(bound), total
+        yield "+Inf", self.count
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+# SQL issued while serving the current request; unset in background tasks
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+class Metrics:
+    """In-process request and SQL metrics, rendered in the Prometheus text format.
+
+    Routes are labelled by their path template, so cardinality is bounded by
+    the number of endpoints. Everything is plain dict and list updates on the
+    event loop; nothing is sampled.
+    """
+
+    def __init__(self, slow_query_seconds: float = 0.25):
+        self.slow_query_seconds = slow_query_seconds
+        self.started = time.time()
+        self.in_flight = 0
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.query_seconds: Dict[Tuple[str, str], float] = {}
+        self.sql_statements = {"request": 0, "background": 0}
+        self.sql_seconds = {"request": 0.0, "background": 0.0}
+        self.slow_queries = 0
+        self.startup: Dict[str, float] = {}
+
+    def reset(self):
+        """Clear request and SQL series; startup timings are kept, they are
+        only recorded once per process"""
+        startup = self.startup
+        self.__init__(self.slow_query_seconds)
+        self.startup = startup
+
+    def record_startup(self, phase: str, seconds: float):
+        self.startup[phase] = seconds
+
+    # Requests
+
+    def request_started(self) -> RequestStats:
+        self.in_flight += 1
+        return RequestStats()
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        self.in_flight -= 1
+        key = (method, route)
+        self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.queries[key] = Histogram(QUERY_BUCKETS)
+            self.query_seconds[key] = 0.0
+        histogram.observe(seconds)
+        self.queries[key].observe(stats.queries)
+        self.query_seconds[key] += stats.query_seconds
+
+    # SQL
+
+    def instrument_engine(self, engine):
+        """Time every statement on ``engine`` (sync or async)"""
+        engine = getattr(engine, "sync_engine", engine)
+        if not event.contains(engine, "before_cursor_execute", self._before_execute):
+            event.listen(engine, "before_cursor_execute", self._before_execute)
+            event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context rather than the connection, so a
+        # statement that raises leaves nothing behind on a pooled connection
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats = _current.get()
+        origin = "background" if stats is None else "request"
+        self.sql_statements[origin] += 1
+        self.sql_seconds[origin] += elapsed
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+        if elapsed >= self.slow_query_seconds:
+            self.slow_queries += 1
+            print(f"Slow query ({elapsed * 1000:.1f} ms, {origin}): {' '.join(statement.split())[:500]}")
+
+    # Exposition
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str, kind: str, text: str):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histograms(name: str, series: Dict[Tuple[str, str], Histogram]):
+            for (method, route), histogram in sorted(series.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{_labels(method=method, route=route, le=bound)} {count}")
+                lines.append(f"{name}_sum{_labels(method=method, route=route)} {histogram.sum}")
+                lines.append(f"{name}_count{_labels(method=method, route=route)} {histogram.count}")
+
+        header("soulseer_http_requests_in_flight", "gauge", "Requests currently being served")
+        lines.append(f"soulseer_http_requests_in_flight {self.in_flight}")
+
+        header("soulseer_http_requests_total", "counter", "Requests served by route and status")
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f"soulseer_http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        header("soulseer_http_request_duration_seconds", "histogram", "Request latency by route")
+        histograms("soulseer_http_request_duration_seconds", self.latency)
+
+        header("soulseer_db_queries_per_request", "histogram", "SQL statements issued per request by route")
+        histograms("soulseer_db_queries_per_request", self.queries)
+
+        header("soulseer_db_request_query_seconds_total", "counter", "Time spent in SQL while serving each route")
+        for (method, route), seconds in sorted(self.query_seconds.items()):
+            lines.append(f"soulseer_db_request_query_seconds_total{_labels(method=method, route=route)} {seconds}")
+
+        header("soulseer_db_statements_total", "counter", "SQL statements by origin (request or background task)")
+        for origin, count in self.sql_statements.items():
+            lines.append(f"soulseer_db_statements_total{_labels(origin=origin)} {count}")
+
+        header("soulseer_db_statement_seconds_total", "counter", "Time spent in SQL by origin")
+        for origin, seconds in self.sql_seconds.items():
+            lines.append(f"soulseer_db_statement_seconds_total{_labels(origin=origin)} {seconds}")
+
+        header("soulseer_db_slow_queries_total", "counter",
+               f"Statements slower than {self.slow_query_seconds * 1000:.0f} ms")
+        lines.append(f"soulseer_db_slow_queries_total {self.slow_queries}")
+
+        header("soulseer_startup_seconds", "gauge", "Worker cold start by phase (module import, lifespan startup)")
+        for phase, seconds in self.startup.items():
+            lines.append(f"soulseer_startup_seconds{_labels(phase=phase)} {seconds}")
+
+        header("soulseer_process_start_time_seconds", "gauge", "Unix time the process started")
+        lines.append(f"soulseer_process_start_time_seconds {self.started}")
+        return "\n".join(lines) + "\n"
+
+def route_template(scope) -> str:
+    """Path template of the route the router matched, prefix included"""
+    # Routes from included routers keep their own path; FastAPI records the
+    # prefixed one alongside
+    included = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(included, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or UNMATCHED
+
+class MetricsMiddleware:
+    """ASGI middleware feeding ``metrics`` for every HTTP request"""
+
+    def __init__(self, app, registry: Optional[Metrics] = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = self.registry.request_started()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = route_template(scope)
+            self.registry.request_finished(scope["method"], route, status,
+                                           time.perf_counter() - started, stats)
+
+# Create a global instance
+metrics = Metrics(slow_query_seconds=settings.SLOW_QUERY_MS / 1000)
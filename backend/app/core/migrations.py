@@ -0,0 +1,58 @@
+"""
+Versioned schema migrations.
+
+Each script in ``backend/migrations`` is named ``<version>_<name>.py`` and
+defines ``upgrade(conn)``. Applied versions are recorded in the
+``schema_migrations`` table; pending scripts run in version order, each in
+its own transaction.
+"""
+
+import importlib.util
+import os
+import re
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "migrations")
+_SCRIPT_RE = re.compile(r"^(\d+)_(\w+)\.py$")
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    scripts = []
+    for filename in os.listdir(directory):
+        match = _SCRIPT_RE.match(filename)
+        if match:
+            scripts.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    return sorted(scripts)
+
+def _load(path: str):
+    spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def applied_versions(engine: Engine) -> List[int]:
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        return [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+def run_migrations(engine: Engine, directory: str = MIGRATIONS_DIR) -> List[int]:
+    """Apply pending migrations and return the versions that were applied"""
+    done = set(applied_versions(engine))
+    applied = []
+    for version, name, path in discover(directory):
+        if version in done:
+            continue
+        module = _load(path)
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": name}
+            )
+        applied.append(version)
+    return applied
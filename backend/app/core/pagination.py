@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import DateTime, and_, or_
+from sqlalchemy.sql import Select
+
+# (column, descending) pairs; the last column must be unique, e.g. the primary key
+SortKey = Sequence[Tuple[Any, bool]]
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort-key values of the last row of a page"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_key: SortKey) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(sort_key):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+            for (column, _), value in zip(sort_key, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after(sort_key: SortKey, values: Sequence[Any]):
+    """Rows strictly after ``values`` in sort order:
+    (a > x) OR (a = x AND b > y) OR ..., honouring each column's direction"""
+    clauses = []
+    for i, (column, descending) in enumerate(sort_key):
+        equal = [c == v for (c, _), v in zip(sort_key[:i], values[:i])]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+def keyset(query: Select, sort_key: SortKey, cursor: Optional[str], limit: int) -> Select:
+    """Order, seek past the cursor and fetch one extra row to detect a next page"""
+    if cursor:
+        query = query.where(_after(sort_key, decode_cursor(cursor, sort_key)))
+    order_by = [column.desc() if descending else column.asc() for column, descending in sort_key]
+    return query.order_by(*order_by).limit(limit + 1)
+
+def page(rows: Sequence[Any], limit: int, key: Callable[[Any], Sequence[Any]]) -> Tuple[List[Any], Optional[str]]:
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+def set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]):
+    """Expose the next page via headers so list responses keep their shape"""
+    if next_cursor is None:
+        return
+    response.headers["X-Next-Cursor"] = next_cursor
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
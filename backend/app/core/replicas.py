@@ -0,0 +1,139 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from . import database
+from .config import settings
+
+@dataclass
+class Replica:
+    url: str
+    engine: object
+    session_factory: object
+    lag: Optional[float] = None  # seconds behind the primary; None until checked or when unreachable
+    routed: int = 0
+    error: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def name(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+class ReplicaRouter:
+    """Sends read-only sessions to replicas that are caught up, and to the
+    primary otherwise.
+
+    Every ``check_interval`` the router stamps ``replica_heartbeat`` on the
+    primary and reads the stamp back from each replica; a replica's lag is
+    how old its copy of the stamp is. This works the same for streaming
+    PostgreSQL replicas and for file-based SQLite copies. Replicas more than
+    ``max_lag`` seconds behind, or that fail the check, get no traffic until
+    a later check finds them caught up. Eligible replicas are used round
+    robin.
+    """
+
+    def __init__(self, urls: List[str], max_lag: float = 5.0, check_interval: float = 1.0):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.session_factory = database.AsyncSessionLocal
+        self.primary_factory = database.AsyncReadSessionLocal
+        self.replicas: List[Replica] = []
+        self.primary_routed = 0
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+        for url in urls:
+            self.add_replica(url)
+
+    def add_replica(self, url: str, engine=None) -> Replica:
+        engine = engine or database.create_read_engine(url)
+        replica = Replica(url, engine, async_sessionmaker(
+            bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        ))
+        self.replicas.append(replica)
+        return replica
+
+    async def start(self):
+        if not self.replicas:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._check_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _check_loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Error checking replica lag: {e}")
+
+    async def check(self):
+        """Stamp the primary, then measure each replica against the stamp.
+        If the primary cannot be stamped no lag is known, so every read goes
+        to the primary."""
+        try:
+            async with self.session_factory() as db:
+                await db.execute(text("UPDATE replica_heartbeat SET beat = :beat WHERE id = 1"), {"beat": time.time()})
+                await db.commit()
+        except Exception as e:
+            print(f"Error writing replica heartbeat: {e}")
+            for replica in self.replicas:
+                replica.lag = None
+            return
+        for replica in self.replicas:
+            try:
+                async with replica.session_factory() as db:
+                    beat = await db.scalar(text("SELECT beat FROM replica_heartbeat WHERE id = 1"))
+            except Exception as e:
+                if replica.lag is not None or replica.error is None:
+                    print(f"Replica {replica.name} unavailable: {e}")
+                replica.lag, replica.error = None, str(e)
+                continue
+            replica.lag = None if beat is None else max(0.0, time.time() - beat)
+            replica.error = None
+
+    def pick(self) -> Optional[Replica]:
+        eligible = [r for r in self.replicas if r.lag is not None and r.lag <= self.max_lag]
+        if not eligible:
+            return None
+        self._next = (self._next + 1) % len(eligible)
+        return eligible[self._next]
+
+    def session(self):
+        replica = self.pick()
+        if replica is None:
+            self.primary_routed += 1
+            return self.primary_factory()
+        replica.routed += 1
+        return replica.session_factory()
+
+    def stats(self) -> dict:
+        return {
+            "primary_reads": self.primary_routed,
+            "replicas": [
+                {"url": r.name, "lag_seconds": None if r.lag is None else round(r.lag, 3),
+                 "healthy": r.lag is not None and r.lag <= self.max_lag, "reads": r.routed}
+                for r in self.replicas
+            ],
+        }
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_SECONDS,
+)
+
+async def get_replica_db():
+    """Dependency for listing and history endpoints that can tolerate data a
+    few seconds old: a caught-up replica when one is configured, otherwise
+    the same read pool as ``get_read_db``"""
+    async with replica_router.session() as db:
+        yield db
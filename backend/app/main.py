@@ -1,13 +1,63 @@
+import time
+
+# Cold start is reported at /metrics as soulseer_startup_seconds
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from .core.config import settings
-from .api import auth, users, readings, streams, products, payments
+from .core.database import engine, async_engine, read_engine
+from .core.metrics import metrics, MetricsMiddleware
+from .core.replicas import replica_router
+from .api import auth, users, readings, streams, products, payments, realtime
+from .services.password_service import password_hasher
+from .services.presence_service import presence_registry
+from .services.billing_service import billing_service
+from .services.chat_service import chat_service
+from .services.reader_stats_service import reader_stats
+from .services.viewer_service import viewer_counter
+from .services.gift_service import gift_service
+from .services.ledger_service import ledger_service
+from .services.webhook_service import webhook_service
+from .services.websocket_manager import manager
+from .services.clerk_service import clerk_service
+from .services.stripe_service import stripe_service
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    await manager.start()
+    await presence_registry.start()
+    await billing_service.start()
+    await chat_service.start()
+    await reader_stats.start()
+    await viewer_counter.start(manager)
+    await gift_service.start()
+    await ledger_service.start()
+    await webhook_service.start()
+    await replica_router.start()
+    metrics.record_startup("lifespan", time.perf_counter() - started)
+    yield
+    await replica_router.stop()
+    await webhook_service.stop()
+    await ledger_service.stop()
+    await gift_service.stop()
+    await viewer_counter.stop()
+    await reader_stats.stop()
+    await chat_service.stop()
+    await billing_service.stop()
+    await presence_registry.stop()
+    await manager.stop()
+    await clerk_service.aclose()
+    await stripe_service.aclose()
 
 app = FastAPI(
     title="SoulSeer API",
     description="Mystical Psychic Reading Platform API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -19,6 +69,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and SQL metrics, exposed at /metrics
+app.add_middleware(MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine)
+metrics.instrument_engine(read_engine)
+for replica in replica_router.replicas:
+    metrics.instrument_engine(replica.engine)
+
 # Include API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
@@ -26,6 +84,7 @@ app.include_router(readings.router, prefix="/api/readings", tags=["readings"])
 app.include_router(streams.router, prefix="/api/streams", tags=["streams"])
 app.include_router(products.router, prefix="/api/products", tags=["products"])
 app.include_router(payments.router, prefix="/api/payments", tags=["payments"])
+app.include_router(realtime.router, tags=["realtime"])
 
 @app.get("/")
 async def root():
@@ -33,4 +92,15 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "soulseer-api"}
+    return {
+        "status": "healthy",
+        "service": "soulseer-api",
+        "password_hasher": password_hasher.stats(),
+        "database": replica_router.stats()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+metrics.record_startup("import", time.perf_counter() - _import_started)
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, Text, Boolean, Enum, Index
 from sqlalchemy.sql import func
 import enum
-from .user import Base
+from ..core.database import Base
 
 class TransactionType(str, enum.Enum):
     DEPOSIT = "deposit"
@@ -16,14 +16,24 @@ class TransactionStatus(str, enum.Enum):
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+class StripeEventStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    IGNORED = "ignored"
+    FAILED = "failed"
+
 class Transaction(Base):
+    """Append-only balance ledger: signed cents, negative for debits"""
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
     type = Column(Enum(TransactionType))
     status = Column(Enum(TransactionStatus))
-    amount = Column(Float)
+    amount_cents = Column(BigInteger, nullable=False)
     description = Column(Text)
     stripe_payment_intent_id = Column(String)
     stripe_charge_id = Column(String)
@@ -31,6 +41,36 @@ class Transaction(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+class BalanceSnapshot(Base):
+    """A user's balance as of ledger entry ``last_transaction_id``; the ledger
+    balance is the latest snapshot plus the entries after it"""
+    __tablename__ = "balance_snapshots"
+    __table_args__ = (
+        Index("ix_balance_snapshots_user_id_id", "user_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    balance_cents = Column(BigInteger, nullable=False)
+    last_transaction_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+class StripeEvent(Base):
+    """Durable queue of verified Stripe webhook events; the unique event id
+    makes redelivered events no-ops"""
+    __tablename__ = "stripe_events"
+    __table_args__ = (
+        Index("ix_stripe_events_status_id", "status", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, unique=True, nullable=False)
+    type = Column(String)
+    payload = Column(Text)  # JSON as text
+    status = Column(Enum(StripeEventStatus, native_enum=False), default=StripeEventStatus.PENDING, nullable=False)
+    received_at = Column(DateTime, server_default=func.now())
+    processed_at = Column(DateTime)
+
 class Payout(Base):
     __tablename__ = "payouts"
     
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, Enum, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
-from .user import Base
+from ..core.database import Base
 
 class ProductType(str, enum.Enum):
     SERVICE = "service"
@@ -10,9 +11,12 @@ class ProductType(str, enum.Enum):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_active_type", "is_active", "type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    seller_id = Column(Integer, index=True)
+    seller_id = Column(Integer, ForeignKey("users.id"), index=True)
     name = Column(String)
     description = Column(Text)
     price = Column(Float)
@@ -26,3 +30,5 @@ class Product(Base):
     digital_file_url = Column(String)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    seller = relationship("User")
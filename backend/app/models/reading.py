@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, Enum, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
-from .user import Base
+from ..core.database import Base
 
 class SessionType(str, enum.Enum):
     CHAT = "chat"
@@ -16,10 +17,14 @@ class SessionStatus(str, enum.Enum):
 
 class ReadingSession(Base):
     __tablename__ = "reading_sessions"
+    __table_args__ = (
+        Index("ix_reading_sessions_client_status_end", "client_id", "status", "end_time"),
+        Index("ix_reading_sessions_status_lease", "status", "billing_lease_until"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    client_id = Column(Integer, index=True)
-    reader_id = Column(Integer, index=True)
+    client_id = Column(Integer, ForeignKey("users.id"), index=True)
+    reader_id = Column(Integer, ForeignKey("users.id"), index=True)
     type = Column(Enum(SessionType))
     status = Column(Enum(SessionStatus), default=SessionStatus.PENDING)
     rate_per_minute = Column(Float)
@@ -32,11 +37,20 @@ class ReadingSession(Base):
     client_review = Column(Text)
     reader_notes = Column(Text)
     webrtc_room_id = Column(String)
+    # Worker billing an ACTIVE session, and until when its claim holds
+    billing_owner = Column(String)
+    billing_lease_until = Column(DateTime)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    client = relationship("User", foreign_keys=[client_id])
+    reader = relationship("User", foreign_keys=[reader_id])
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_id_id", "session_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, index=True)
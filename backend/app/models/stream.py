@@ -1,16 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, Index, LargeBinary
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
-from .user import Base
+from ..core.database import Base
 
 class LiveStream(Base):
     __tablename__ = "live_streams"
+    __table_args__ = (
+        Index("ix_live_streams_live_scheduled", "is_live", "scheduled_start"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    reader_id = Column(Integer, index=True)
+    reader_id = Column(Integer, ForeignKey("users.id"), index=True)
     title = Column(String)
     description = Column(Text)
     is_live = Column(Boolean, default=False)
     viewer_count = Column(Integer, default=0)
+    unique_viewers = Column(Integer, default=0)
+    viewer_sketch = deferred(Column(LargeBinary))  # HyperLogLog registers behind unique_viewers
     total_gifts = Column(Float, default=0.0)
     stream_key = Column(String)
     thumbnail_url = Column(String)
@@ -19,6 +25,8 @@ class LiveStream(Base):
     ended_at = Column(DateTime)
     created_at = Column(DateTime, server_default=func.now())
 
+    reader = relationship("User")
+
 class StreamGift(Base):
     __tablename__ = "stream_gifts"
     
@@ -1,10 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, Enum
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Float, Text, Enum, ForeignKey
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
-
-Base = declarative_base()
+from ..core.database import Base
 
 class UserRole(str, enum.Enum):
     CLIENT = "client"
@@ -25,9 +25,11 @@ class User(Base):
     first_name = Column(String)
     last_name = Column(String)
     phone = Column(String)
-    role = Column(Enum(UserRole), default=UserRole.CLIENT)
+    password_hash = Column(String)
+    role = Column(Enum(UserRole), default=UserRole.CLIENT, index=True)
     status = Column(Enum(UserStatus), default=UserStatus.ACTIVE)
-    balance = Column(Float, default=0.0)
+    # Integer cents, kept in step with the transactions ledger; only change it through ledger_service
+    balance_cents = Column(BigInteger, default=0, nullable=False)
     auto_reload_enabled = Column(Boolean, default=False)
     auto_reload_amount = Column(Float, default=25.0)
     auto_reload_threshold = Column(Float, default=5.0)
@@ -35,11 +37,27 @@ class User(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    reader_profile = relationship("Reader", back_populates="user", uselist=False)
+
+    @hybrid_property
+    def balance(self) -> float:
+        """Balance in dollars"""
+        return (self.balance_cents or 0) / 100
+
+    @balance.setter
+    def balance(self, value: float):
+        from ..services.ledger_service import to_cents
+        self.balance_cents = to_cents(value)
+
+    @balance.expression
+    def balance(cls):
+        return cls.balance_cents / 100.0
+
 class Reader(Base):
     __tablename__ = "readers"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     display_name = Column(String)
     bio = Column(Text)
     specialties = Column(Text)  # JSON array as text
@@ -54,3 +72,5 @@ class Reader(Base):
     profile_image = Column(String)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    user = relationship("User", back_populates="reader_profile")
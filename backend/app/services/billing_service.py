@@ -1,33 +1,439 @@
 import asyncio
-from datetime import datetime
-from typing import Dict
+import json
+import math
+import os
+import time
+import uuid
+from collections import Counter
+from itertools import chain
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from sqlalchemy import and_, bindparam, or_, select, update
+from ..core import database
+from ..core.config import settings
+from ..models.user import User
+from ..models.reading import ReadingSession, SessionStatus
+from ..models.payment import TransactionType
+from .presence_service import presence_registry, ONLINE, BUSY
+from .websocket_manager import manager
+from .reader_stats_service import add_completed_sessions, reader_stats
+from .ledger_service import post_batch, to_cents, to_dollars
+
+sessions = ReadingSession.__table__
+
+# Claimed sessions are loaded this many at a time
+_LOAD_CHUNK = 500
+
+# Balances are mirrored in sixtieths of a cent, so a second at any per-minute
+# rate in whole cents is an exact integer charge
+UNITS_PER_CENT = 60
+
+def _timestamp(value: datetime) -> float:
+    """Naive UTC datetimes from the database to epoch seconds"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+@dataclass
+class BilledSession:
+    session_id: int
+    client_id: int
+    reader_id: int
+    rate_cents: int  # per minute, which is also the per-second charge in units
+    started_at: float
+    billed_seconds: int = 0
+    ended_at: Optional[float] = None
+    end_reason: Optional[str] = None
+    debited_cents: int = 0
+
+    @property
+    def total_cents(self) -> int:
+        """Cost so far, rounded half up to whole cents"""
+        return (self.billed_seconds * self.rate_cents + UNITS_PER_CENT // 2) // UNITS_PER_CENT
+
+    @property
+    def duration_minutes(self) -> int:
+        return math.ceil(self.billed_seconds / 60)
+
+def _totals(group: List["BilledSession"]) -> List[dict]:
+    return [{"b_id": s.session_id, "b_cost": to_dollars(s.total_cents), "b_minutes": s.duration_minutes}
+            for s in group]
 
 class BillingService:
-    def __init__(self):
-        self.active_sessions: Dict[str, dict] = {}
+    """Per-second billing for active reading sessions.
+
+    Sessions are scheduled on a timer wheel with one bucket per second, so each
+    tick only touches the sessions that are due. Client balances are mirrored
+    in memory (as integer sixtieths of a cent) and debited as time is billed,
+    which lets a session be stopped on the very tick its client runs out of
+    funds. Session totals accumulate in memory; every ``flush_interval``
+    seconds each session's cost is rounded to cents, the difference from what
+    was already debited is posted to the ledger, and everything is written
+    with a handful of executemany statements. Flushes run as their own task
+    beside the ticks and are serialized by a lock; ending a session persists
+    just that session.
+
+    Each ACTIVE session is billed by exactly one worker, recorded in
+    ``billing_owner`` with a lease that every flush renews. A flush only
+    charges sessions whose lease it renewed in the same transaction; a
+    session that was closed through another worker is charged up to its
+    recorded end time and dropped, and one whose lease passed to another
+    worker is dropped without charges. Sessions left without a live owner
+    are claimed with a conditional UPDATE on start and at every flush
+    interval.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, clock=time.time, lease_seconds: float = 30.0,
+                 worker_id: Optional[str] = None):
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        self.session_factory = database.AsyncSessionLocal
+        self.active_sessions: Dict[int, BilledSession] = {}
+        self._wheel: Dict[int, List[int]] = {}
+        self._last_tick: Optional[int] = None
+        self._balances: Dict[int, int] = {}
+        self._client_sessions: Dict[int, int] = {}
+        self._dirty_sessions: Set[int] = set()
+        self._ended: Dict[int, BilledSession] = {}
         self._running = False
-        
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+
     async def start(self):
         self._running = True
-        asyncio.create_task(self._billing_loop())
-        
+        self._lock = asyncio.Lock()
+        await self.resume_active_sessions()
+        self._task = asyncio.create_task(self._billing_loop())
+
     async def stop(self):
         self._running = False
-        
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_task:
+            try:
+                await self._flush_task
+            except Exception:
+                pass
+            self._flush_task = None
+        await self.flush()
+
     async def _billing_loop(self):
+        last_flush = self.clock()
+        stopped_unflushed = False
         while self._running:
-            # Process billing for active sessions
-            for session_id, session_data in self.active_sessions.items():
-                await self._process_session_billing(session_id, session_data)
-            await asyncio.sleep(60)  # Check every minute
-            
-    async def _process_session_billing(self, session_id: str, session_data: dict):
-        # Calculate elapsed time and charge client
-        pass
-        
-    async def get_session_billing(self, session_id: str):
+            now = self.clock()
+            stopped = self.tick(now)
+            due = now - last_flush >= self.flush_interval
+            stopped_unflushed = stopped_unflushed or bool(stopped)
+            # A large flush runs beside the ticks instead of delaying them.
+            # Sessions ended through /end are flushed by that request.
+            if (due or stopped_unflushed) and (self._flush_task is None or self._flush_task.done()):
+                self._flush_task = asyncio.create_task(self._background_flush(claim=due))
+                stopped_unflushed = False
+                if due:
+                    last_flush = now
+            for billed in stopped:
+                await self._notify_stopped(billed)
+            await asyncio.sleep(max(0.0, math.floor(now) + 1 - self.clock()))
+
+    async def _background_flush(self, claim: bool):
+        try:
+            await self.flush()
+            if claim:
+                await self.resume_active_sessions()
+        except Exception as e:
+            print(f"Error flushing billing: {e}")
+
+    def lease_until(self) -> datetime:
+        return datetime.utcfromtimestamp(self.clock() + self.lease_seconds)
+
+    async def resume_active_sessions(self):
+        """Claim ACTIVE sessions that no live worker is billing (never claimed,
+        or their owner's lease lapsed) and start billing them here"""
+        now = datetime.utcfromtimestamp(self.clock())
+        async with self.session_factory() as db:
+            claimed = (await db.execute(
+                update(sessions)
+                .where(sessions.c.status == SessionStatus.ACTIVE,
+                       or_(sessions.c.billing_owner.is_(None), sessions.c.billing_lease_until < now))
+                .values(billing_owner=self.worker_id, billing_lease_until=self.lease_until())
+                .returning(sessions.c.id)
+            )).scalars().all()
+            rows = []
+            for start in range(0, len(claimed), _LOAD_CHUNK):
+                result = await db.execute(
+                    select(ReadingSession, User.balance_cents)
+                    .join(User, User.id == ReadingSession.client_id)
+                    .where(ReadingSession.id.in_(claimed[start:start + _LOAD_CHUNK]))
+                )
+                rows.extend(result.all())
+            await db.commit()
+        for session, balance_cents in rows:
+            if session.id not in self.active_sessions:
+                self.start_session(session, balance_cents)
+
+    def start_session(self, session: ReadingSession, client_balance_cents: int) -> BilledSession:
+        started_at = _timestamp(session.start_time) if session.start_time else self.clock()
+        billed = BilledSession(
+            session_id=session.id,
+            client_id=session.client_id,
+            reader_id=session.reader_id,
+            rate_cents=to_cents(session.rate_per_minute or 0.0),
+            started_at=started_at,
+        )
+        billed.debited_cents = to_cents(session.total_cost or 0.0)
+        if billed.rate_cents > 0:
+            # Fewest seconds whose cost rounds to what was already charged, so
+            # resuming never refunds
+            owed = billed.debited_cents * UNITS_PER_CENT - UNITS_PER_CENT // 2
+            billed.billed_seconds = max(0, -(-owed // billed.rate_cents))
+        self.active_sessions[billed.session_id] = billed
+        self._balances.setdefault(billed.client_id, (client_balance_cents or 0) * UNITS_PER_CENT)
+        self._client_sessions[billed.client_id] = self._client_sessions.get(billed.client_id, 0) + 1
+        self._schedule(billed.session_id, max(math.floor(started_at), math.floor(self.clock())) + 1)
+        presence_registry.set_status(billed.reader_id, BUSY)
+        return billed
+
+    async def end_session(self, session_id: int, reason: str = "ended") -> Optional[BilledSession]:
+        billed = self.active_sessions.get(session_id)
+        if billed is None:
+            return None
+        now = self.clock()
+        self._bill(billed, now)
+        self._finish(billed, now, reason)
+        await self.flush({session_id})
+        return billed
+
+    def credit(self, client_id: int, cents: int):
+        """Reflect a top-up in the in-memory balance of a client being billed"""
+        if client_id in self._balances:
+            self._balances[client_id] += cents * UNITS_PER_CENT
+
+    def try_debit(self, client_id: int, cents: int) -> bool:
+        """Take another charge out of the in-memory balance of a client being
+        billed, whose stored balance lags unflushed debits; False if it would
+        overdraw. Clients not being billed are left to the database check."""
+        if client_id not in self._balances:
+            return True
+        if self._balances[client_id] < cents * UNITS_PER_CENT:
+            return False
+        self._balances[client_id] -= cents * UNITS_PER_CENT
+        return True
+
+    def tick(self, now: float) -> List[BilledSession]:
+        """Bill every session due up to ``now``; returns sessions stopped for lack of funds"""
+        current = math.floor(now)
+        if self._last_tick is None:
+            first = min(self._wheel, default=current)
+        else:
+            first = self._last_tick + 1
+        self._last_tick = current
+        stopped = []
+        for second in range(min(first, current), current + 1):
+            for session_id in self._wheel.pop(second, ()):
+                billed = self.active_sessions.get(session_id)
+                if billed is None:
+                    continue
+                if self._bill(billed, now):
+                    self._schedule(session_id, current + 1)
+                else:
+                    self._finish(billed, now, "insufficient_balance")
+                    stopped.append(billed)
+        return stopped
+
+    def _schedule(self, session_id: int, second: int):
+        bucket = self._wheel.get(second)
+        if bucket is None:
+            self._wheel[second] = [session_id]
+        else:
+            bucket.append(session_id)
+
+    def _bill(self, billed: BilledSession, now: float) -> bool:
+        """Charge the seconds elapsed since the last charge; False once funds run out"""
+        per_second = billed.rate_cents
+        seconds = int(now - billed.started_at) - billed.billed_seconds
+        if per_second <= 0 or seconds <= 0:
+            return True
+
+        balance = self._balances.get(billed.client_id, 0)
+        affordable = balance // per_second
+        exhausted = seconds > affordable
+        seconds = min(seconds, affordable)
+        if seconds > 0:
+            balance -= seconds * per_second
+            billed.billed_seconds += seconds
+            self._balances[billed.client_id] = balance
+            self._dirty_sessions.add(billed.session_id)
+        return not exhausted and balance >= per_second
+
+    def _finish(self, billed: BilledSession, now: float, reason: str):
+        billed.ended_at = now
+        billed.end_reason = reason
+        self._release(billed)
+        self._ended[billed.session_id] = billed
+        presence_registry.set_status(billed.reader_id, ONLINE)
+
+    def _release(self, billed: BilledSession):
+        """Stop billing a session in this process"""
+        if self.active_sessions.pop(billed.session_id, None) is None:
+            return
+        self._dirty_sessions.discard(billed.session_id)
+        remaining = self._client_sessions.get(billed.client_id, 1) - 1
+        if remaining > 0:
+            self._client_sessions[billed.client_id] = remaining
+        else:
+            self._client_sessions.pop(billed.client_id, None)
+            self._balances.pop(billed.client_id, None)
+
+    async def _notify_stopped(self, billed: BilledSession):
+        message = json.dumps({
+            "type": "session_ended",
+            "session_id": billed.session_id,
+            "reason": billed.end_reason,
+            "duration": billed.duration_minutes,
+            "totalCost": to_dollars(billed.total_cents)
+        })
+        for user_id in (billed.client_id, billed.reader_id):
+            try:
+                await manager.send_personal_message(message, str(user_id))
+            except Exception as e:
+                print(f"Error notifying user {user_id} of session end: {e}")
+
+    async def flush(self, session_ids: Optional[Set[int]] = None):
+        """Renew this worker's leases, post what each session it still owns
+        owes since the last flush, and write session totals in bulk.
+        ``session_ids`` limits all of that to the given sessions."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if session_ids is None:
+                if not (self.active_sessions or self._ended):
+                    return
+                dirty, self._dirty_sessions = self._dirty_sessions, set()
+                ended, self._ended = self._ended, {}
+                active = self.active_sessions
+            else:
+                dirty = self._dirty_sessions & session_ids
+                self._dirty_sessions -= dirty
+                ended = {sid: self._ended.pop(sid) for sid in session_ids if sid in self._ended}
+                active = {sid: self.active_sessions[sid] for sid in session_ids if sid in self.active_sessions}
+                if not (active or ended):
+                    return
+            closed: List[BilledSession] = []
+            try:
+                async with self.session_factory() as db:
+                    renew = update(sessions).where(
+                        sessions.c.billing_owner == self.worker_id, sessions.c.status == SessionStatus.ACTIVE
+                    )
+                    if session_ids is not None:
+                        renew = renew.where(sessions.c.id.in_(session_ids))
+                    owned = set((await db.execute(
+                        renew.values(billing_lease_until=self.lease_until()).returning(sessions.c.id)
+                    )).scalars())
+                    lost = [billed for billed in chain(active.values(), ended.values())
+                            if billed.session_id not in owned]
+                    closed = await self._settle_lost(db, lost, ended)
+
+                    running = [self.active_sessions[sid] for sid in dirty
+                               if sid in self.active_sessions and sid in owned]
+                    finished = [billed for sid, billed in ended.items() if sid in owned]
+                    dues = [(s, s.total_cents - s.debited_cents) for s in running + finished + closed]
+                    await post_batch(db, [
+                        (s.client_id, -due, TransactionType.READING_PAYMENT, f"Reading session {s.session_id}")
+                        for s, due in dues if due
+                    ])
+                    mine = and_(sessions.c.id == bindparam("b_id"), sessions.c.billing_owner == self.worker_id)
+                    if running:
+                        await db.execute(
+                            update(sessions)
+                            .where(mine, sessions.c.status == SessionStatus.ACTIVE)
+                            .values(total_cost=bindparam("b_cost"), duration_minutes=bindparam("b_minutes")),
+                            _totals(running)
+                        )
+                    if closed:
+                        # Closed through another worker: keep the status and end time it wrote
+                        await db.execute(
+                            update(sessions)
+                            .where(mine)
+                            .values(total_cost=bindparam("b_cost"), duration_minutes=bindparam("b_minutes")),
+                            _totals(closed)
+                        )
+                    if finished:
+                        await db.execute(
+                            update(sessions)
+                            .where(mine, sessions.c.status == SessionStatus.ACTIVE)
+                            .values(
+                                status=SessionStatus.COMPLETED,
+                                total_cost=bindparam("b_cost"),
+                                duration_minutes=bindparam("b_minutes"),
+                                end_time=bindparam("b_end"),
+                            ),
+                            [dict(row, b_end=datetime.utcfromtimestamp(s.ended_at))
+                             for row, s in zip(_totals(finished), finished)]
+                        )
+                    completed = Counter(s.reader_id for s in finished)
+                    await add_completed_sessions(db, completed)
+                    await db.commit()
+                reader_stats.sessions_completed(completed)
+            except BaseException:
+                # Merge back so the next flush retries (also when cancelled on shutdown)
+                self._dirty_sessions |= dirty
+                for billed in chain(ended.values(), closed):
+                    self._ended.setdefault(billed.session_id, billed)
+                raise
+            for billed, due in dues:
+                billed.debited_cents += due
+
+    async def _settle_lost(self, db, lost: List[BilledSession], ended: Dict[int, BilledSession]) -> List[BilledSession]:
+        """Sessions this worker was billing whose lease it could not renew.
+        Those closed through another worker are billed up to the end time it
+        recorded and returned for a final charge; the rest now belong to
+        another worker and are dropped without charges."""
+        if not lost:
+            return []
+        rows = {row.id: row for row in (await db.execute(
+            select(sessions.c.id, sessions.c.status, sessions.c.end_time, sessions.c.billing_owner)
+            .where(sessions.c.id.in_([billed.session_id for billed in lost]))
+        )).all()}
+        closed = []
+        for billed in lost:
+            row = rows.get(billed.session_id)
+            if row is not None and row.billing_owner == self.worker_id and row.end_time is not None:
+                # Seconds billed past the recorded end are not charged
+                billable = max(0, int(_timestamp(row.end_time) - billed.started_at))
+                if billed.billed_seconds > billable:
+                    billed.billed_seconds = billable
+                elif billed.session_id in self.active_sessions:
+                    self._bill(billed, min(self.clock(), _timestamp(row.end_time)))
+                if billed.session_id in self.active_sessions:
+                    self._release(billed)
+                    presence_registry.set_status(billed.reader_id, ONLINE)
+                closed.append(billed)
+            else:
+                print(f"Session {billed.session_id} is billed by another worker; dropping it here")
+                self._release(billed)
+            ended.pop(billed.session_id, None)
+        return closed
+
+    async def get_session_billing(self, session_id: int):
+        billed = self.active_sessions.get(session_id)
+        if billed is None:
+            return None
         return {
-            "elapsed_time": 0,
-            "total_cost": 0.0,
-            "client_balance": 25.0
+            "elapsed_time": billed.billed_seconds,
+            "total_cost": to_dollars(billed.total_cents),
+            "client_balance": to_dollars(self._balances.get(billed.client_id, 0) // UNITS_PER_CENT)
         }
+
+# Create a global instance
+billing_service = BillingService(
+    flush_interval=settings.BILLING_FLUSH_SECONDS,
+    lease_seconds=settings.BILLING_LEASE_SECONDS,
+)
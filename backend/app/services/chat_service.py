@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import insert
+from ..core import database
+from ..core.config import settings
+from ..models.reading import ChatMessage
+
+class ChatService:
+    """Write-behind persistence for reading-session chat.
+
+    Messages are appended to an in-memory buffer as they are relayed and
+    written with one bulk INSERT when ``batch_size`` messages are pending or
+    every ``flush_interval`` seconds, whichever comes first. ``stop`` drains
+    the buffer so nothing is lost on a clean shutdown.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 1.0, max_pending: int = 50000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.session_factory = database.AsyncSessionLocal
+        self._buffer: List[dict] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.dropped = 0
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        try:
+            while self._buffer:
+                await self.flush()
+        except Exception as e:
+            print(f"Error flushing chat messages on shutdown: {e}")
+
+    def append(self, session_id: int, sender_id: int, content: str, timestamp: Optional[datetime] = None):
+        self._buffer.append({
+            "session_id": session_id,
+            "sender_id": sender_id,
+            "content": content,
+            "timestamp": timestamp or datetime.utcnow(),
+        })
+        if len(self._buffer) > self.max_pending:
+            # The database has been unreachable for a while; shed the oldest
+            overflow = len(self._buffer) - self.max_pending
+            del self._buffer[:overflow]
+            self.dropped += overflow
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing chat messages: {e}")
+
+    async def flush(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._buffer:
+                return
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:len(batch)]
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(insert(ChatMessage), batch)
+                    await db.commit()
+            except BaseException:
+                # Put the batch back (also on cancellation) so it is retried
+                self._buffer[:0] = batch
+                raise
+
+# Create a global instance
+chat_service = ChatService(
+    batch_size=settings.CHAT_BATCH_SIZE,
+    flush_interval=settings.CHAT_FLUSH_SECONDS,
+    max_pending=settings.CHAT_MAX_PENDING,
+)
@@ -1,82 +1,166 @@
-import httpx
-import os
-from typing import Optional, Dict, Any
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Dict, Any, Tuple
 from ..core.config import settings
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+if TYPE_CHECKING:
+    import httpx  # imported by ``client`` on first use, not at worker start
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
 class ClerkService:
-    def __init__(self):
-        self.secret_key = settings.CLERK_SECRET_KEY
-        self.base_url = "https://api.clerk.com/v1"
+    def __init__(
+        self,
+        secret_key: Optional[str] = None,
+        base_url: str = "https://api.clerk.com/v1",
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+        user_cache_ttl: float = 60.0,
+        user_cache_size: int = 10000,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+    ):
+        self.secret_key = secret_key if secret_key is not None else settings.CLERK_SECRET_KEY
+        self.base_url = base_url
         self.headers = {
             "Authorization": f"Bearer {self.secret_key}",
             "Content-Type": "application/json"
         }
-    
+        self.transport = transport
+        self.user_cache_ttl = user_cache_ttl
+        self.user_cache_size = user_cache_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._user_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._user_inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """One pooled keep-alive client shared by every call"""
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                transport=self.transport,
+                http2=HTTP2_AVAILABLE and self.transport is None,
+                timeout=httpx.Timeout(settings.CLERK_TIMEOUT_SECONDS, connect=settings.CLERK_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.CLERK_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.CLERK_MAX_CONNECTIONS,
+                    keepalive_expiry=30.0,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, idempotent: bool = True, **kwargs) -> "httpx.Response":
+        """Send a request, retrying transient failures with exponential backoff.
+        Non-idempotent requests are only retried when they never reached Clerk."""
+        import httpx
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or not idempotent or attempt >= self.max_retries:
+                    return response
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if attempt >= self.max_retries:
+                    raise
+            except httpx.TransportError:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+            delay = self.backoff_base * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            attempt += 1
+
     async def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify a JWT token with Clerk"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/sessions/{token}/verify",
-                    headers=self.headers
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                return None
+            response = await self._request("GET", f"/sessions/{token}/verify")
+
+            if response.status_code == 200:
+                return response.json()
+            return None
         except Exception as e:
             print(f"Error verifying token with Clerk: {e}")
             return None
-    
+
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user information from Clerk"""
+        """Get user information from Clerk.
+        Results are cached for ``user_cache_ttl`` seconds and concurrent lookups
+        of the same user share a single upstream request."""
+        cached = self._user_cache.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        # The lookup runs in its own task, so a caller that is cancelled
+        # (e.g. its client disconnected) does not cancel it for the others
+        task = self._user_inflight.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._load_user(user_id))
+            self._user_inflight[user_id] = task
+            task.add_done_callback(lambda done: self._user_inflight.pop(user_id, None)
+                                   if self._user_inflight.get(user_id) is done else None)
+        return await asyncio.shield(task)
+
+    async def _load_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        user = await self._fetch_user(user_id)
+        if user is not None:
+            self._user_cache[user_id] = (time.monotonic() + self.user_cache_ttl, user)
+            self._user_cache.move_to_end(user_id)
+            while len(self._user_cache) > self.user_cache_size:
+                self._user_cache.popitem(last=False)
+        return user
+
+    async def _fetch_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/users/{user_id}",
-                    headers=self.headers
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                return None
+            response = await self._request("GET", f"/users/{user_id}")
+
+            if response.status_code == 200:
+                return response.json()
+            return None
         except Exception as e:
             print(f"Error getting user from Clerk: {e}")
             return None
-    
+
     async def create_user(self, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new user in Clerk"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/users",
-                    headers=self.headers,
-                    json=user_data
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                return None
+            response = await self._request("POST", "/users", idempotent=False, json=user_data)
+
+            if response.status_code == 200:
+                return response.json()
+            return None
         except Exception as e:
             print(f"Error creating user in Clerk: {e}")
             return None
-    
+
     async def update_user(self, user_id: str, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update user information in Clerk"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.patch(
-                    f"{self.base_url}/users/{user_id}",
-                    headers=self.headers,
-                    json=user_data
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                return None
+            response = await self._request("PATCH", f"/users/{user_id}", json=user_data)
+
+            if response.status_code == 200:
+                return response.json()
+            return None
         except Exception as e:
             print(f"Error updating user in Clerk: {e}")
             return None
+        finally:
+            self._user_cache.pop(user_id, None)
 
 # Create a global instance
 clerk_service = ClerkService()
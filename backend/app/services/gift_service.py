@@ -0,0 +1,195 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import bindparam, func, insert, select, update
+from ..core import database
+from ..core.config import settings
+from ..models.stream import LiveStream, StreamGift
+from ..models.payment import TransactionType
+from .billing_service import billing_service
+from .websocket_manager import manager
+from .ledger_service import InsufficientFunds, record, to_cents, withdraw
+
+class StreamNotLive(Exception):
+    """Gifts can only be sent to a stream that is live"""
+
+@dataclass
+class PendingGift:
+    stream_id: int
+    sender_id: int
+    gift_type: str
+    amount: float
+    message: Optional[str]
+    sent_at: datetime
+    future: asyncio.Future = field(repr=False)
+
+class GiftService:
+    """Gift pipeline for live streams.
+
+    Gifts are queued and applied by a single writer in group commits: each
+    gift's debit is a conditional UPDATE (so no sender can be overdrawn, even
+    by concurrent gifts), the accepted gifts and their ledger entries are
+    inserted with one executemany each, and the whole batch commits once. Per-stream totals are
+    summed in memory and added to ``LiveStream.total_gifts`` every
+    ``flush_interval`` seconds, so a gift burst never queues on the stream row.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, batch_size: int = 500):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.session_factory = database.AsyncSessionLocal
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending_totals: Dict[int, float] = {}
+        self._stopping: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._stopping = asyncio.Event()
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            # Let an in-flight flush finish rather than cancelling it mid-commit
+            self._stopping.set()
+            await self._task
+            self._task = None
+        if self._writer:
+            # The writer applies everything queued ahead of the sentinel, then exits
+            self._queue.put_nowait(None)
+            await self._writer
+            self._writer = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing gift totals: {e}")
+
+    async def send_gift(self, stream_id: int, sender_id: int, gift_type: str,
+                        amount: float, message: Optional[str] = None) -> dict:
+        """Queue a gift and wait for its batch to commit"""
+        if self._queue is None:
+            raise RuntimeError("Gift service is not running")
+        if not billing_service.try_debit(sender_id, to_cents(amount)):
+            raise InsufficientFunds(sender_id)
+        gift = PendingGift(stream_id, sender_id, gift_type, amount, message, datetime.utcnow(),
+                           asyncio.get_running_loop().create_future())
+        self._queue.put_nowait(gift)
+        return await gift.future
+
+    async def _write_loop(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            gift = await self._queue.get()
+            while True:
+                if gift is None:
+                    stopping = True
+                    break
+                batch.append(gift)
+                if len(batch) >= self.batch_size or self._queue.empty():
+                    break
+                gift = self._queue.get_nowait()
+            if batch:
+                await self._apply(batch)
+
+    async def _apply(self, batch: List[PendingGift]):
+        accepted: List[PendingGift] = []
+        rejected: Dict[int, Exception] = {}
+        try:
+            async with self.session_factory() as db:
+                live = set((await db.execute(
+                    select(LiveStream.id).where(
+                        LiveStream.id.in_({gift.stream_id for gift in batch}),
+                        LiveStream.is_live == True
+                    )
+                )).scalars())
+                for index, gift in enumerate(batch):
+                    if gift.stream_id not in live:
+                        rejected[index] = StreamNotLive(gift.stream_id)
+                        continue
+                    if await withdraw(db, gift.sender_id, to_cents(gift.amount)) is None:
+                        rejected[index] = InsufficientFunds(gift.sender_id)
+                        continue
+                    accepted.append(gift)
+                ids = []
+                if accepted:
+                    ids = (await db.execute(
+                        insert(StreamGift).returning(StreamGift.id, sort_by_parameter_order=True),
+                        [{
+                            "stream_id": gift.stream_id,
+                            "sender_id": gift.sender_id,
+                            "gift_type": gift.gift_type,
+                            "amount": gift.amount,
+                            "message": gift.message,
+                            "created_at": gift.sent_at,
+                        } for gift in accepted]
+                    )).scalars().all()
+                await record(db, [
+                    (gift.sender_id, -to_cents(gift.amount), TransactionType.GIFT, f"Gift to stream {gift.stream_id}")
+                    for gift in accepted
+                ])
+                await db.commit()
+        except Exception as e:
+            for gift in batch:
+                billing_service.credit(gift.sender_id, to_cents(gift.amount))
+                if not gift.future.done():
+                    gift.future.set_exception(e)
+            return
+
+        for index, error in rejected.items():
+            gift = batch[index]
+            billing_service.credit(gift.sender_id, to_cents(gift.amount))
+            if not gift.future.done():
+                gift.future.set_exception(error)
+        for gift, gift_id in zip(accepted, ids):
+            self._pending_totals[gift.stream_id] = self._pending_totals.get(gift.stream_id, 0.0) + gift.amount
+            event = {
+                "type": "gift",
+                "id": gift_id,
+                "stream_id": gift.stream_id,
+                "sender_id": gift.sender_id,
+                "gift_type": gift.gift_type,
+                "amount": gift.amount,
+                "message": gift.message,
+                "timestamp": gift.sent_at.isoformat()
+            }
+            manager.publish_nowait(f"stream:{gift.stream_id}", event)
+            if not gift.future.done():
+                gift.future.set_result(event)
+
+    def pending_total(self, stream_id: int) -> float:
+        return self._pending_totals.get(stream_id, 0.0)
+
+    async def flush(self):
+        if not self._pending_totals:
+            return
+        totals, self._pending_totals = self._pending_totals, {}
+        streams = LiveStream.__table__
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(streams)
+                    .where(streams.c.id == bindparam("b_id"))
+                    .values(total_gifts=func.coalesce(streams.c.total_gifts, 0.0) + bindparam("b_amount")),
+                    [{"b_id": stream_id, "b_amount": amount} for stream_id, amount in totals.items()]
+                )
+                await db.commit()
+        except BaseException:
+            # Merge back so the next flush retries (also when cancelled on shutdown)
+            for stream_id, amount in totals.items():
+                self._pending_totals[stream_id] = self._pending_totals.get(stream_id, 0.0) + amount
+            raise
+
+# Create a global instance
+gift_service = GiftService(flush_interval=settings.GIFT_FLUSH_SECONDS)
@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core import database
+from ..core.config import settings
+from ..models.user import User
+from ..models.payment import BalanceSnapshot, Transaction, TransactionStatus, TransactionType
+
+users = User.__table__
+transactions = Transaction.__table__
+snapshots = BalanceSnapshot.__table__
+
+class InsufficientFunds(Exception):
+    """A conditional debit found the balance too low"""
+
+def to_cents(amount: float) -> int:
+    return int(Decimal(str(amount)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+
+def to_dollars(cents: Optional[int]) -> float:
+    return (cents or 0) / 100
+
+def _entry(user_id: int, cents: int, type: TransactionType, description: Optional[str], **extra) -> dict:
+    return {
+        "user_id": user_id,
+        "type": type,
+        "status": TransactionStatus.COMPLETED,
+        "amount_cents": cents,
+        "description": description,
+        "created_at": datetime.utcnow(),
+        **extra,
+    }
+
+async def withdraw(db: AsyncSession, user_id: int, cents: int) -> Optional[int]:
+    """The conditional UPDATE behind every debit: takes ``cents`` only if the
+    balance covers it. Returns the new balance, or None when it does not."""
+    return await db.scalar(
+        update(users)
+        .where(users.c.id == user_id, users.c.balance_cents >= cents)
+        .values(balance_cents=users.c.balance_cents - cents)
+        .returning(users.c.balance_cents)
+    )
+
+Entry = Tuple  # (user_id, cents, type, description[, extra columns dict])
+
+async def record(db: AsyncSession, entries: Iterable[Entry]):
+    """Append signed (user_id, cents, type, description) ledger entries whose
+    balance change has already been applied. An entry may carry a fifth item,
+    a dict of extra Transaction columns."""
+    rows = [_entry(*entry[:4], **(entry[4] if len(entry) > 4 else {})) for entry in entries]
+    if rows:
+        await db.execute(insert(transactions), rows)
+
+async def debit(db: AsyncSession, user_id: int, cents: int, type: TransactionType,
+                description: Optional[str] = None) -> int:
+    """Take ``cents`` from a user and record the ledger entry in the caller's
+    transaction. Raises InsufficientFunds instead of overdrawing. Returns the
+    new balance in cents."""
+    balance = await withdraw(db, user_id, cents)
+    if balance is None:
+        raise InsufficientFunds(user_id)
+    await record(db, [(user_id, -cents, type, description)])
+    return balance
+
+async def credit(db: AsyncSession, user_id: int, cents: int, type: TransactionType,
+                 description: Optional[str] = None, **extra) -> int:
+    balance = await db.scalar(
+        update(users)
+        .where(users.c.id == user_id)
+        .values(balance_cents=users.c.balance_cents + cents)
+        .returning(users.c.balance_cents)
+    )
+    await db.execute(insert(transactions).values(**_entry(user_id, cents, type, description, **extra)))
+    return balance
+
+async def post_batch(db: AsyncSession, entries: Iterable[Entry]):
+    """Apply many signed (user_id, cents, type, description) entries without
+    a balance check: one executemany for balances, one for the ledger"""
+    entries = [entry for entry in entries if entry[1]]
+    if not entries:
+        return
+    per_user: Dict[int, int] = {}
+    for user_id, cents, *_ in entries:
+        per_user[user_id] = per_user.get(user_id, 0) + cents
+    await db.execute(
+        update(users)
+        .where(users.c.id == bindparam("b_id"))
+        .values(balance_cents=users.c.balance_cents + bindparam("b_cents")),
+        [{"b_id": user_id, "b_cents": cents} for user_id, cents in per_user.items()]
+    )
+    await record(db, entries)
+
+async def ledger_balance(db: AsyncSession, user_id: int) -> int:
+    """Balance recomputed from the ledger: latest snapshot plus the entries
+    after it, so the work is bounded by the snapshot interval"""
+    snapshot = (await db.execute(
+        select(snapshots.c.balance_cents, snapshots.c.last_transaction_id)
+        .where(snapshots.c.user_id == user_id)
+        .order_by(snapshots.c.id.desc())
+        .limit(1)
+    )).first()
+    base, after = (snapshot.balance_cents, snapshot.last_transaction_id) if snapshot else (0, 0)
+    tail = await db.scalar(
+        select(func.coalesce(func.sum(transactions.c.amount_cents), 0))
+        .where(transactions.c.user_id == user_id, transactions.c.id > after)
+    )
+    return base + tail
+
+class LedgerService:
+    """Periodic balance snapshots.
+
+    Each run folds the ledger entries written since the previous run into a
+    new snapshot per affected user. Entries younger than ``settle_seconds``
+    are left for the next run so a transaction that commits after a
+    higher-numbered one is never skipped.
+    """
+
+    def __init__(self, snapshot_interval: float = 3600.0, settle_seconds: float = 60.0):
+        self.snapshot_interval = snapshot_interval
+        self.settle_seconds = settle_seconds
+        self.session_factory = database.AsyncSessionLocal
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.take_snapshots()
+            except Exception as e:
+                print(f"Error taking balance snapshots: {e}")
+
+    async def take_snapshots(self, now: Optional[datetime] = None) -> int:
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=self.settle_seconds)
+        async with self.session_factory() as db:
+            last = await db.scalar(select(func.max(snapshots.c.last_transaction_id))) or 0
+            high = await db.scalar(
+                select(func.max(transactions.c.id))
+                .where(transactions.c.id > last, transactions.c.created_at <= cutoff)
+            )
+            if high is None:
+                return 0
+            deltas = dict((await db.execute(
+                select(transactions.c.user_id, func.sum(transactions.c.amount_cents))
+                .where(transactions.c.id > last, transactions.c.id <= high)
+                .group_by(transactions.c.user_id)
+            )).all())
+            latest = (
+                select(func.max(snapshots.c.id))
+                .where(snapshots.c.user_id.in_(list(deltas)))
+                .group_by(snapshots.c.user_id)
+            )
+            previous = dict((await db.execute(
+                select(snapshots.c.user_id, snapshots.c.balance_cents).where(snapshots.c.id.in_(latest))
+            )).all())
+            await db.execute(insert(snapshots), [
+                {"user_id": user_id, "balance_cents": previous.get(user_id, 0) + delta,
+                 "last_transaction_id": high, "created_at": datetime.utcnow()}
+                for user_id, delta in deltas.items()
+            ])
+            await db.commit()
+        return len(deltas)
+
+# Create a global instance
+ledger_service = LedgerService(snapshot_interval=settings.LEDGER_SNAPSHOT_SECONDS)
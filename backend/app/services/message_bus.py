@@ -0,0 +1,161 @@
+import asyncio
+import json
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from ..core.config import settings
+
+Handler = Callable[[dict], Awaitable[None]]
+
+class MessageBus(ABC):
+    """Pub/sub fan-out between API workers.
+
+    Envelopes published by this node are buffered and sent as one batch per
+    flush (every ``flush_interval`` seconds or as soon as ``batch_size``
+    envelopes are pending). Every node receives every batch and hands the
+    envelopes it did not originate to its handler.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 0.005):
+        self.node_id = uuid.uuid4().hex
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[dict] = []
+        self._handler: Optional[Handler] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+        self._wakeup = asyncio.Event()
+        await self._subscribe()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        await self._unsubscribe()
+        self._handler = None
+
+    def publish(self, envelope: dict):
+        """Queue an envelope for other nodes; a no-op until the bus is started"""
+        if self._handler is None:
+            return
+        envelope["node"] = self.node_id
+        self._buffer.append(envelope)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        await self._send(json.dumps(batch))
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error publishing to message bus: {e}")
+
+    async def _deliver(self, raw):
+        if self._handler is None:
+            return
+        for envelope in json.loads(raw):
+            if envelope.get("node") != self.node_id:
+                await self._handler(envelope)
+
+    @abstractmethod
+    async def _subscribe(self):
+        """Start passing incoming batches to ``_deliver``"""
+
+    @abstractmethod
+    async def _unsubscribe(self):
+        """Stop receiving batches"""
+
+    @abstractmethod
+    async def _send(self, raw: str):
+        """Publish one serialized batch to every node"""
+
+class InMemoryBus(MessageBus):
+    """Connects buses within one process; stands in for Redis in tests and
+    single-worker deployments"""
+
+    _hubs: Dict[str, Set["InMemoryBus"]] = {}
+
+    def __init__(self, hub: str = "default", **kwargs):
+        super().__init__(**kwargs)
+        self.hub = hub
+
+    async def _subscribe(self):
+        self._hubs.setdefault(self.hub, set()).add(self)
+
+    async def _unsubscribe(self):
+        members = self._hubs.get(self.hub)
+        if members is not None:
+            members.discard(self)
+
+    async def _send(self, raw: str):
+        for bus in list(self._hubs.get(self.hub, ())):
+            await bus._deliver(raw)
+
+class RedisBus(MessageBus):
+    """Redis pub/sub backend; every worker subscribes to one channel"""
+
+    def __init__(self, url: str, channel: str = "soulseer:ws", **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def _subscribe(self):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(self.url)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    await self._deliver(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error reading from message bus: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _unsubscribe(self):
+        if self._reader:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.aclose()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    async def _send(self, raw: str):
+        await self._redis.publish(self.channel, raw)
+
+def create_message_bus() -> MessageBus:
+    options = {
+        "batch_size": settings.MESSAGE_BUS_BATCH_SIZE,
+        "flush_interval": settings.MESSAGE_BUS_FLUSH_MS / 1000,
+    }
+    if settings.MESSAGE_BUS_BACKEND == "redis":
+        return RedisBus(settings.REDIS_URL, **options)
+    return InMemoryBus(**options)
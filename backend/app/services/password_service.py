@@ -0,0 +1,89 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from ..core.config import settings
+
+class PasswordPoolSaturated(Exception):
+    """Raised when the hashing queue is full and the request should be shed"""
+
+class PasswordHasher:
+    """Runs bcrypt hashing/verification in a bounded worker pool.
+
+    bcrypt releases the GIL while hashing, so a small thread pool is enough to
+    keep the event loop free. At most ``max_workers`` hashes run at once and at
+    most ``max_queue`` more may wait; anything beyond that is rejected
+    immediately instead of piling up behind a login burst.
+    """
+
+    def __init__(self, rounds: int, max_workers: int, max_queue: int):
+        self.rounds = rounds
+        self._context = None
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def context(self):
+        """passlib context, built on first use so passlib and bcrypt stay out
+        of worker startup"""
+        if self._context is None:
+            from passlib.context import CryptContext
+            self._context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=self.rounds)
+        return self._context
+
+    async def _run(self, fn, *args):
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise PasswordPoolSaturated()
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            self._busy_seconds += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password, returning a replacement hash if the stored one
+        was made with outdated bcrypt settings (e.g. a lower cost)"""
+        if not hashed_password:
+            return False, None
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed_password)
+        if new_hash:
+            self._rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self.max_workers),
+            "saturation": self._in_flight / (self.max_workers + self.max_queue),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "rehashed": self._rehashed,
+            "avg_seconds": self._busy_seconds / self._completed if self._completed else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+# Create a global instance
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from ..core import database
+from ..core.config import settings
+from ..models.user import User, Reader
+
+ONLINE = "online"
+BUSY = "busy"
+OFFLINE = "offline"
+
+def parse_specialties(raw: Optional[str]) -> Tuple[str, ...]:
+    """Reader.specialties is a JSON array stored as text"""
+    if not raw:
+        return ()
+    try:
+        values = json.loads(raw)
+    except ValueError:
+        values = raw.split(",")
+    if isinstance(values, str):
+        values = [values]
+    return tuple(str(value).strip() for value in values if str(value).strip())
+
+@dataclass
+class ReaderPresence:
+    user_id: int
+    name: str
+    specialties: Tuple[str, ...]
+    rating: float
+    rate: Optional[float]
+    status: str = ONLINE
+    last_seen: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.user_id,
+            "name": self.name,
+            "specialty": self.specialties[0] if self.specialties else None,
+            "specialties": list(self.specialties),
+            "rating": self.rating,
+            "rate": self.rate,
+            "status": self.status
+        }
+
+class PresenceRegistry:
+    """In-memory view of which readers are connected right now.
+
+    Readers are indexed by user id and by specialty so "online readers with
+    specialty X" is answered without scanning or touching the database.
+    Status changes are coalesced into ``_dirty`` and written back to
+    ``Reader.status`` in bulk by the background flush loop.
+    """
+
+    def __init__(self, flush_interval: float, timeout: float):
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.session_factory = database.AsyncSessionLocal
+        self._online: Dict[int, ReaderPresence] = {}
+        self._by_specialty: Dict[str, Dict[int, ReaderPresence]] = {}
+        self._dirty: Dict[int, str] = {}
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self.on_change = None
+
+    async def start(self):
+        self._running = True
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while self._running:
+            await asyncio.sleep(self.flush_interval)
+            self.expire_stale()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing reader presence: {e}")
+
+    async def connect(self, user_id: int):
+        """Register a newly connected user; non-readers are ignored"""
+        if user_id in self._online:
+            self.heartbeat(user_id)
+            return
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(User.first_name, User.last_name, Reader.display_name, Reader.specialties,
+                       Reader.rating, Reader.chat_rate)
+                .join(Reader, Reader.user_id == User.id)
+                .where(User.id == user_id)
+            )
+            row = result.first()
+        if row is None:
+            return
+        self.set_online(ReaderPresence(
+            user_id=user_id,
+            name=row.display_name or f"{row.first_name} {row.last_name}",
+            specialties=parse_specialties(row.specialties),
+            rating=row.rating or 0.0,
+            rate=row.chat_rate,
+        ))
+
+    def set_online(self, presence: ReaderPresence):
+        self._remove(presence.user_id)
+        self._online[presence.user_id] = presence
+        for specialty in presence.specialties:
+            self._by_specialty.setdefault(specialty.lower(), {})[presence.user_id] = presence
+        self._mark_dirty(presence.user_id, presence.status)
+
+    def set_status(self, user_id: int, status: str):
+        presence = self._online.get(user_id)
+        if presence is None or presence.status == status:
+            return
+        presence.status = status
+        presence.last_seen = time.monotonic()
+        self._mark_dirty(user_id, status)
+
+    def heartbeat(self, user_id: int):
+        presence = self._online.get(user_id)
+        if presence is not None:
+            presence.last_seen = time.monotonic()
+
+    def disconnect(self, user_id: int):
+        if self._remove(user_id):
+            self._mark_dirty(user_id, OFFLINE)
+
+    def expire_stale(self):
+        cutoff = time.monotonic() - self.timeout
+        for user_id in [uid for uid, p in self._online.items() if p.last_seen < cutoff]:
+            self.disconnect(user_id)
+
+    def get(self, user_id: int) -> Optional[ReaderPresence]:
+        return self._online.get(user_id)
+
+    def status_of(self, user_id: int) -> str:
+        presence = self._online.get(user_id)
+        return presence.status if presence else OFFLINE
+
+    def online_ids(self) -> List[int]:
+        """Readers connected right now, online or busy"""
+        return list(self._online)
+
+    def online_readers(self, specialty: Optional[str] = None, status: Optional[str] = None,
+                       limit: Optional[int] = None) -> List[ReaderPresence]:
+        if specialty:
+            candidates = self._by_specialty.get(specialty.lower(), {}).values()
+        else:
+            candidates = self._online.values()
+        readers = []
+        for presence in candidates:
+            if status and presence.status != status:
+                continue
+            readers.append(presence)
+            if limit and len(readers) >= limit:
+                break
+        return readers
+
+    async def flush(self):
+        """Write pending status changes back with one UPDATE per distinct status"""
+        if not self._dirty:
+            return
+        pending, self._dirty = self._dirty, {}
+        by_status: Dict[str, List[int]] = {}
+        for user_id, status in pending.items():
+            by_status.setdefault(status, []).append(user_id)
+        try:
+            async with self.session_factory() as db:
+                for status, user_ids in by_status.items():
+                    await db.execute(
+                        update(Reader).where(Reader.user_id.in_(user_ids)).values(status=status)
+                    )
+                await db.commit()
+        except Exception:
+            # Put the changes back unless something newer superseded them
+            for user_id, status in pending.items():
+                self._dirty.setdefault(user_id, status)
+            raise
+
+    def _mark_dirty(self, user_id: int, status: str):
+        self._dirty[user_id] = status
+        if self.on_change:
+            self.on_change(user_id, status)
+
+    def _remove(self, user_id: int) -> bool:
+        presence = self._online.pop(user_id, None)
+        if presence is None:
+            return False
+        for specialty in presence.specialties:
+            bucket = self._by_specialty.get(specialty.lower())
+            if bucket is not None:
+                bucket.pop(user_id, None)
+                if not bucket:
+                    del self._by_specialty[specialty.lower()]
+        return True
+
+# Create a global instance
+presence_registry = PresenceRegistry(
+    flush_interval=settings.PRESENCE_FLUSH_SECONDS,
+    timeout=settings.PRESENCE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,197 @@
+import asyncio
+import bisect
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core import database
+from ..core.cache import READERS, response_cache
+from ..core.config import settings
+from ..models.user import User, Reader
+from ..models.reading import ReadingSession, SessionStatus
+from .presence_service import presence_registry
+
+readers = Reader.__table__
+
+@dataclass
+class ReaderRanking:
+    user_id: int
+    name: str
+    rating: float
+    total_reviews: int
+    total_sessions: int
+
+    @property
+    def sort_key(self) -> Tuple[float, int, int]:
+        return (-self.rating, -self.total_reviews, self.user_id)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.user_id,
+            "name": self.name,
+            "rating": round(self.rating, 2),
+            "total_reviews": self.total_reviews,
+            "total_sessions": self.total_sessions,
+            "status": presence_registry.status_of(self.user_id)
+        }
+
+async def add_completed_sessions(db: AsyncSession, counts: Mapping[int, int]):
+    """Bump ``total_sessions`` for readers whose sessions just completed; runs
+    inside the caller's transaction"""
+    if not counts:
+        return
+    await db.execute(
+        update(readers)
+        .where(readers.c.user_id == bindparam("b_reader"))
+        .values(total_sessions=func.coalesce(readers.c.total_sessions, 0) + bindparam("b_count")),
+        [{"b_reader": reader_id, "b_count": count} for reader_id, count in counts.items()]
+    )
+
+async def apply_rating(db: AsyncSession, reader_id: int, rating: int, previous: Optional[int] = None):
+    """Fold one client rating into the reader's running average without
+    rescanning their sessions. ``previous`` is the rating being replaced, if
+    any. Returns the updated aggregates and display name."""
+    current = func.coalesce(readers.c.rating, 0.0)
+    reviews = func.coalesce(readers.c.total_reviews, 0)
+    if previous is None:
+        values = {
+            "rating": (current * reviews + rating) / (reviews + 1),
+            "total_reviews": reviews + 1,
+        }
+    else:
+        # Replacing a rating keeps the review count; shift the mean by the difference
+        values = {
+            "rating": func.coalesce(current + (rating - previous) * 1.0 / func.nullif(reviews, 0), float(rating)),
+        }
+    result = await db.execute(
+        update(readers)
+        .where(readers.c.user_id == reader_id)
+        .values(**values)
+        .returning(readers.c.rating, readers.c.total_reviews, readers.c.total_sessions, readers.c.display_name)
+    )
+    return result.first()
+
+class ReaderStats:
+    """Top-readers leaderboard kept in memory.
+
+    Rankings are held in a list sorted by (rating desc, reviews desc, id), so
+    a rating change is a bisect removal plus an insort and reading the top N
+    is a slice. Writers report the rows they changed; a periodic reload picks
+    up changes made by other workers.
+    """
+
+    def __init__(self, refresh_interval: float = 300.0):
+        self.refresh_interval = refresh_interval
+        self.session_factory = database.AsyncSessionLocal
+        self._rankings: Dict[int, ReaderRanking] = {}
+        self._order: List[Tuple[float, int, int]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.reload()
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                print(f"Error reloading reader rankings: {e}")
+
+    async def reload(self):
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Reader.user_id, Reader.display_name, User.first_name, User.last_name,
+                       Reader.rating, Reader.total_reviews, Reader.total_sessions)
+                .join(User, User.id == Reader.user_id)
+            )
+            rows = result.all()
+        rankings = {
+            row.user_id: ReaderRanking(
+                user_id=row.user_id,
+                name=row.display_name or f"{row.first_name} {row.last_name}",
+                rating=row.rating or 0.0,
+                total_reviews=row.total_reviews or 0,
+                total_sessions=row.total_sessions or 0,
+            )
+            for row in rows
+        }
+        self._rankings = rankings
+        self._order = sorted(ranking.sort_key for ranking in rankings.values())
+
+    def top(self, limit: int = 10) -> List[ReaderRanking]:
+        return [self._rankings[key[2]] for key in self._order[:limit]]
+
+    def rating_changed(self, reader_id: int, rating: float, total_reviews: int, name: Optional[str] = None):
+        ranking = self._rankings.get(reader_id)
+        if ranking is None:
+            ranking = ReaderRanking(reader_id, name or f"Reader {reader_id}", 0.0, 0, 0)
+            self._rankings[reader_id] = ranking
+        else:
+            self._discard(ranking)
+        ranking.rating = rating or 0.0
+        ranking.total_reviews = total_reviews or 0
+        bisect.insort(self._order, ranking.sort_key)
+
+        presence = presence_registry.get(reader_id)
+        if presence is not None:
+            presence.rating = ranking.rating
+        # Ratings are rendered in the cached reader directory
+        response_cache.invalidate(READERS)
+
+    def sessions_completed(self, counts: Mapping[int, int]):
+        for reader_id, count in counts.items():
+            ranking = self._rankings.get(reader_id)
+            if ranking is not None:
+                ranking.total_sessions += count
+
+    def _discard(self, ranking: ReaderRanking):
+        key = ranking.sort_key
+        index = bisect.bisect_left(self._order, key)
+        if index < len(self._order) and self._order[index] == key:
+            del self._order[index]
+
+    async def recompute(self) -> int:
+        """Repair job: rebuild every reader's aggregates from reading_sessions
+        with one grouped scan and one executemany, then reload the rankings"""
+        completed = ReadingSession.status == SessionStatus.COMPLETED
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(
+                    ReadingSession.reader_id,
+                    func.count(ReadingSession.id).filter(completed),
+                    func.count(ReadingSession.client_rating),
+                    func.avg(ReadingSession.client_rating),
+                ).group_by(ReadingSession.reader_id)
+            )
+            totals = {reader_id: (sessions, reviews, average) for reader_id, sessions, reviews, average in result.all()}
+            reader_ids = (await db.execute(select(Reader.user_id))).scalars().all()
+            params = []
+            for reader_id in reader_ids:
+                sessions, reviews, average = totals.get(reader_id, (0, 0, None))
+                params.append({"b_reader": reader_id, "b_sessions": sessions, "b_reviews": reviews,
+                               "b_rating": float(average or 0.0)})
+            if params:
+                await db.execute(
+                    update(readers)
+                    .where(readers.c.user_id == bindparam("b_reader"))
+                    .values(
+                        total_sessions=bindparam("b_sessions"),
+                        total_reviews=bindparam("b_reviews"),
+                        rating=bindparam("b_rating"),
+                    ),
+                    params
+                )
+            await db.commit()
+        await self.reload()
+        response_cache.invalidate(READERS)
+        return len(reader_ids)
+
+# Create a global instance
+reader_stats = ReaderStats(refresh_interval=settings.TOP_READERS_REFRESH_SECONDS)
@@ -0,0 +1,32 @@
+import asyncio
+from typing import Mapping, Tuple
+import httpx
+import stripe
+
+class PooledHTTPClient(stripe.HTTPClient):
+    """Stripe transport over a shared keep-alive httpx.AsyncClient, so Stripe
+    calls are awaited on the event loop instead of blocking it"""
+    name = "httpx"
+
+    def __init__(self, client: httpx.AsyncClient):
+        super().__init__()
+        self.client = client
+
+    async def request_async(self, method: str, url: str, headers: Mapping[str, str],
+                            post_data=None) -> Tuple[bytes, int, Mapping[str, str]]:
+        try:
+            response = await self.client.request(method, url, headers=headers, content=post_data)
+        except httpx.TimeoutException as e:
+            raise stripe.APIConnectionError(f"Request to Stripe timed out: {e}", should_retry=True)
+        except httpx.TransportError as e:
+            raise stripe.APIConnectionError(f"Could not reach Stripe: {e}", should_retry=True)
+        return response.content, response.status_code, response.headers
+
+    def request(self, method, url, headers, post_data=None):
+        raise RuntimeError("Stripe calls must go through the async client")
+
+    async def sleep_async(self, secs: float):
+        await asyncio.sleep(secs)
+
+    async def close_async(self):
+        await self.client.aclose()
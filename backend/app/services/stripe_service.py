@@ -0,0 +1,109 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from ..core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+TOP_UP_CENTS = 2500  # $25.00
+TOP_UP_LOOKUP_KEY = "soulseer_balance_top_up_2500"
+
+class CheckoutError(Exception):
+    """Stripe refused or could not create a checkout session"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+class StripeService:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        self.api_key = api_key if api_key is not None else settings.STRIPE_SECRET_KEY
+        self.transport = transport
+        self._client = None
+        self._http = None
+        self._prices: Dict[str, str] = {}
+        self._price_lock = asyncio.Lock()
+
+    @property
+    def client(self):
+        """One pooled keep-alive connection set shared by every call. The
+        Stripe SDK is imported here, on first use, to keep it out of startup."""
+        if self._client is None:
+            import httpx
+            import stripe
+            from .stripe_http import PooledHTTPClient
+            self._http = PooledHTTPClient(httpx.AsyncClient(
+                transport=self.transport,
+                timeout=httpx.Timeout(settings.STRIPE_TIMEOUT_SECONDS, connect=settings.STRIPE_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.STRIPE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.STRIPE_MAX_CONNECTIONS,
+                    keepalive_expiry=30.0,
+                ),
+            ))
+            self._client = stripe.StripeClient(
+                self.api_key,
+                http_client=self._http,
+                max_network_retries=settings.STRIPE_MAX_RETRIES,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.close_async()
+            self._http = None
+            self._client = None
+
+    async def top_up_price(self) -> str:
+        """Id of the reusable top-up Price: looked up by its lookup key (or
+        created once) and then cached for the life of the process"""
+        price_id = self._prices.get(TOP_UP_LOOKUP_KEY)
+        if price_id is not None:
+            return price_id
+        async with self._price_lock:
+            if TOP_UP_LOOKUP_KEY not in self._prices:
+                prices = await self.client.v1.prices.list_async(
+                    {"lookup_keys": [TOP_UP_LOOKUP_KEY], "active": True, "limit": 1}
+                )
+                if prices.data:
+                    price = prices.data[0]
+                else:
+                    price = await self.client.v1.prices.create_async(
+                        {
+                            "currency": "usd",
+                            "unit_amount": TOP_UP_CENTS,
+                            "lookup_key": TOP_UP_LOOKUP_KEY,
+                            "product_data": {"name": "Account Balance Top-up"},
+                        },
+                        {"idempotency_key": f"price:{TOP_UP_LOOKUP_KEY}"},
+                    )
+                self._prices[TOP_UP_LOOKUP_KEY] = price.id
+        return self._prices[TOP_UP_LOOKUP_KEY]
+
+    async def create_top_up_checkout(self, user_id: int, email: str, idempotency_key: str) -> Any:
+        """Checkout session for a balance top-up. Retrying with the same
+        idempotency key returns the original session instead of a new one.
+        Raises CheckoutError if Stripe declines or cannot be reached."""
+        import stripe
+        try:
+            return await self.client.v1.checkout.sessions.create_async(
+                {
+                    "payment_method_types": ["card"],
+                    "line_items": [{"price": await self.top_up_price(), "quantity": 1}],
+                    "mode": "payment",
+                    "success_url": "http://localhost:5173/dashboard?payment=success",
+                    "cancel_url": "http://localhost:5173/dashboard?payment=cancelled",
+                    "customer_email": email,
+                    "metadata": {"user_id": str(user_id), "type": "add_funds"},
+                },
+                {"idempotency_key": idempotency_key},
+            )
+        except stripe.StripeError as e:
+            raise CheckoutError(e.user_message or str(e)) from e
+
+# Create a global instance
+stripe_service = StripeService()
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import math
+from typing import Dict, Optional, Set
+from sqlalchemy import bindparam, case, func, select, update
+from ..core import database
+from ..core.config import settings
+from ..models.stream import LiveStream
+
+STREAM_ROOM_PREFIX = "stream:"
+
+class HyperLogLog:
+    """Fixed-size cardinality sketch: 2**precision one-byte registers
+    (4 KiB at the default precision, ~1.6% standard error) no matter how many
+    distinct items are added. Sketches merge by taking register maxima."""
+
+    def __init__(self, precision: int = 12, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError("Register count does not match precision")
+
+    def add(self, item) -> bool:
+        """Returns True when the sketch changed"""
+        value = int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), "big")
+        index = value >> (64 - self.precision)
+        remainder = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+class ViewerCounter:
+    """Live and unique viewer counts for streams.
+
+    Joins and leaves of ``stream:<id>`` websocket rooms adjust in-memory
+    deltas that are added to ``LiveStream.viewer_count`` in one executemany
+    every ``flush_interval`` seconds, so a popular stream is not a hot row.
+    Unique viewers go into a per-stream HyperLogLog; on flush it is merged
+    with the stored sketch, which keeps workers' counts combined. Once this
+    worker has no viewers left in a room and its sketch has been written,
+    the sketch is dropped; the stored copy carries the count from there.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, precision: int = 12):
+        self.flush_interval = flush_interval
+        self.precision = precision
+        self.session_factory = database.AsyncSessionLocal
+        self._deltas: Dict[int, int] = {}
+        self._sketches: Dict[int, HyperLogLog] = {}
+        self._dirty_sketches: Set[int] = set()
+        self._viewers: Dict[int, int] = {}
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, manager=None):
+        if manager is not None:
+            manager.on_room_change = self.on_room_change
+        self._running = True
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while self._running:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing viewer counts: {e}")
+
+    def on_room_change(self, user_id: str, room: str, joined: bool):
+        if not room.startswith(STREAM_ROOM_PREFIX):
+            return
+        try:
+            stream_id = int(room[len(STREAM_ROOM_PREFIX):])
+        except ValueError:
+            return
+        if joined:
+            self.join(stream_id, user_id)
+        else:
+            self.leave(stream_id)
+
+    def join(self, stream_id: int, viewer_id):
+        self._deltas[stream_id] = self._deltas.get(stream_id, 0) + 1
+        self._viewers[stream_id] = self._viewers.get(stream_id, 0) + 1
+        sketch = self._sketches.get(stream_id)
+        if sketch is None:
+            sketch = self._sketches[stream_id] = HyperLogLog(self.precision)
+        if sketch.add(viewer_id):
+            self._dirty_sketches.add(stream_id)
+
+    def leave(self, stream_id: int):
+        self._deltas[stream_id] = self._deltas.get(stream_id, 0) - 1
+        self._viewers[stream_id] = self._viewers.get(stream_id, 0) - 1
+
+    def pending_delta(self, stream_id: int) -> int:
+        return self._deltas.get(stream_id, 0)
+
+    def unique_viewers(self, stream_id: int, stored: Optional[int] = None) -> int:
+        sketch = self._sketches.get(stream_id)
+        local = sketch.count() if sketch is not None else 0
+        return max(local, stored or 0)
+
+    def forget(self, stream_id: int):
+        """Drop the local state of a stream nobody here is watching"""
+        self._sketches.pop(stream_id, None)
+        self._viewers.pop(stream_id, None)
+
+    def _forget_empty_rooms(self):
+        """Called after a successful flush: every sketch not marked dirty
+        since has been written, so empty rooms can be let go"""
+        for stream_id in [sid for sid, n in self._viewers.items() if n <= 0]:
+            if stream_id not in self._dirty_sketches:
+                self.forget(stream_id)
+
+    async def flush(self):
+        deltas = {sid: d for sid, d in self._deltas.items() if d}
+        dirty = self._dirty_sketches
+        if not (deltas or dirty):
+            self._forget_empty_rooms()
+            return
+        self._deltas, self._dirty_sketches = {}, set()
+
+        streams = LiveStream.__table__
+        try:
+            async with self.session_factory() as db:
+                if deltas:
+                    count = func.coalesce(streams.c.viewer_count, 0) + bindparam("b_delta")
+                    await db.execute(
+                        update(streams)
+                        .where(streams.c.id == bindparam("b_id"))
+                        .values(viewer_count=case((count < 0, 0), else_=count)),
+                        [{"b_id": sid, "b_delta": delta} for sid, delta in deltas.items()]
+                    )
+                if dirty:
+                    # Read-merge-write under the row lock so two workers
+                    # cannot both merge into the same stored sketch and have
+                    # one overwrite the other. SQLite ignores FOR UPDATE, but
+                    # its write connection begins with BEGIN IMMEDIATE.
+                    result = await db.execute(
+                        select(streams.c.id, streams.c.viewer_sketch)
+                        .where(streams.c.id.in_(dirty))
+                        .with_for_update()
+                    )
+                    params = []
+                    for stream_id, stored in result.all():
+                        sketch = self._sketches.get(stream_id)
+                        if sketch is None:
+                            continue
+                        if stored:
+                            sketch.merge(HyperLogLog(self.precision, stored))
+                        params.append({"b_id": stream_id, "b_sketch": sketch.to_bytes(), "b_unique": sketch.count()})
+                    if params:
+                        await db.execute(
+                            update(streams)
+                            .where(streams.c.id == bindparam("b_id"))
+                            .values(viewer_sketch=bindparam("b_sketch"), unique_viewers=bindparam("b_unique")),
+                            params
+                        )
+                await db.commit()
+        except BaseException:
+            # Merge back so the next flush retries (also when cancelled on shutdown)
+            for stream_id, delta in deltas.items():
+                self._deltas[stream_id] = self._deltas.get(stream_id, 0) + delta
+            self._dirty_sketches |= dirty
+            raise
+        self._forget_empty_rooms()
+
+# Create a global instance
+viewer_counter = ViewerCounter(flush_interval=settings.VIEWER_FLUSH_SECONDS)
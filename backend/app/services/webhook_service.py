@@ -0,0 +1,243 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from ..core import database
+from ..core.config import settings
+from ..models.user import User
+from ..models.payment import StripeEvent, StripeEventStatus, TransactionType
+from .billing_service import billing_service
+from .ledger_service import post_batch
+
+events = StripeEvent.__table__
+
+DEPOSIT_EVENTS = ("checkout.session.completed", "checkout.session.async_payment_succeeded")
+
+def _deposit(event_type: str, event: dict) -> Optional[Tuple[int, int, Optional[str]]]:
+    """(user_id, cents, payment intent) for a paid balance top-up, None for
+    any other event. Raises KeyError/ValueError on a malformed top-up."""
+    if event_type not in DEPOSIT_EVENTS:
+        return None
+    checkout = event["data"]["object"]
+    metadata = checkout.get("metadata") or {}
+    if metadata.get("type") != "add_funds" or checkout.get("payment_status") != "paid":
+        return None
+    return int(metadata["user_id"]), int(checkout["amount_total"]), checkout.get("payment_intent")
+
+class WebhookService:
+    """Stripe webhook ingestion.
+
+    The endpoint only verifies the signature and queues the event; a single
+    writer stores queued events into ``stripe_events`` in group commits
+    (skipping event ids already stored; the unique index backs this up across
+    workers), and Stripe is acknowledged once its event is durable. A second
+    loop claims pending events in batches and applies their balance credits
+    and ledger entries in the same transaction that marks them processed.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, batch_size: int = 500, tolerance: int = 300):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.tolerance = tolerance
+        self.session_factory = database.AsyncSessionLocal
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup = asyncio.Event()
+        self._running = False
+        self._writer: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._running = True
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+        self._task = asyncio.create_task(self._process_loop())
+
+    async def stop(self):
+        if self._writer:
+            # Store everything acknowledged so far; it is applied on next start
+            self._queue.put_nowait(None)
+            await self._writer
+            self._writer = None
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def verify(self, payload: bytes, signature: Optional[str]) -> dict:
+        """Check the Stripe-Signature header and parse the event. Raises
+        ValueError for a bad signature or payload."""
+        if not settings.STRIPE_WEBHOOK_SECRET:
+            raise ValueError("Stripe webhook secret is not configured")
+        import stripe  # deferred: the SDK is slow to import and only needed here
+        try:
+            stripe.WebhookSignature.verify_header(payload.decode("utf-8"), signature,
+                                                  settings.STRIPE_WEBHOOK_SECRET, self.tolerance)
+        except stripe.SignatureVerificationError as e:
+            raise ValueError(str(e)) from e
+        event = json.loads(payload)
+        if not isinstance(event, dict) or not event.get("id"):
+            raise ValueError("Event has no id")
+        return event
+
+    async def enqueue(self, event: dict) -> bool:
+        """Wait until a verified event is stored; False if it was already
+        received"""
+        if self._queue is None:
+            raise RuntimeError("Webhook service is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((event, future))
+        return await future
+
+    async def _write_loop(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self._queue.get()
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+            if batch:
+                await self._store(batch)
+
+    async def _store(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """Insert a batch of events in one transaction, skipping ids already
+        stored or repeated within the batch"""
+        try:
+            for attempt in range(3):
+                try:
+                    stored = await self.store_events([event for event, _ in batch])
+                    break
+                except IntegrityError:
+                    # Another worker stored one of these ids meanwhile; the
+                    # retry's lookup sees it
+                    if attempt == 2:
+                        raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (event, future), is_new in zip(batch, stored):
+            if not future.done():
+                future.set_result(is_new)
+        if any(stored):
+            self._wakeup.set()
+
+    async def store_events(self, batch: List[dict]) -> List[bool]:
+        """Persist verified events with one lookup and one executemany;
+        returns which were new"""
+        async with self.session_factory() as db:
+            ids = {event["id"] for event in batch}
+            seen = set((await db.execute(
+                select(events.c.event_id).where(events.c.event_id.in_(ids))
+            )).scalars())
+            rows, stored = [], []
+            now = datetime.utcnow()
+            for event in batch:
+                is_new = event["id"] not in seen
+                stored.append(is_new)
+                if is_new:
+                    seen.add(event["id"])
+                    rows.append({
+                        "event_id": event["id"],
+                        "type": event.get("type"),
+                        "payload": json.dumps(event),
+                        "status": StripeEventStatus.PENDING,
+                        "received_at": now,
+                    })
+            if rows:
+                await db.execute(insert(events), rows)
+                await db.commit()
+        return stored
+
+    async def _process_loop(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while await self.process_pending() >= self.batch_size:
+                    pass
+            except Exception as e:
+                print(f"Error applying Stripe events: {e}")
+
+    async def process_pending(self) -> int:
+        """Apply one batch of pending events; returns how many were taken"""
+        credits: Dict[int, int] = {}
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(events.c.id, events.c.type, events.c.payload)
+                .where(events.c.status == StripeEventStatus.PENDING)
+                .order_by(events.c.id)
+                .limit(self.batch_size)
+            )).all()
+            if not rows:
+                return 0
+            # Claim first: a concurrent worker's conditional update finds
+            # nothing left to claim, so no event is applied twice
+            now = datetime.utcnow()
+            claimed = set((await db.execute(
+                update(events)
+                .where(events.c.id.in_([row.id for row in rows]), events.c.status == StripeEventStatus.PENDING)
+                .values(status=StripeEventStatus.PROCESSED, processed_at=now)
+                .returning(events.c.id)
+            )).scalars())
+
+            deposits: List[Tuple[int, int, int, Optional[str]]] = []
+            outcome: Dict[int, StripeEventStatus] = {}
+            for row in rows:
+                if row.id not in claimed:
+                    continue
+                try:
+                    deposit = _deposit(row.type, json.loads(row.payload))
+                except (KeyError, TypeError, ValueError):
+                    outcome[row.id] = StripeEventStatus.FAILED
+                    continue
+                if deposit is None:
+                    outcome[row.id] = StripeEventStatus.IGNORED
+                else:
+                    deposits.append((row.id, *deposit))
+
+            known = set((await db.execute(
+                select(User.id).where(User.id.in_({user_id for _, user_id, _, _ in deposits}))
+            )).scalars()) if deposits else set()
+            entries = []
+            for event_id, user_id, cents, payment_intent in deposits:
+                if user_id not in known:
+                    outcome[event_id] = StripeEventStatus.FAILED
+                    continue
+                entries.append((user_id, cents, TransactionType.DEPOSIT, "Account balance top-up",
+                                {"stripe_payment_intent_id": payment_intent}))
+                credits[user_id] = credits.get(user_id, 0) + cents
+            await post_batch(db, entries)
+
+            for status in (StripeEventStatus.IGNORED, StripeEventStatus.FAILED):
+                ids = [event_id for event_id, result in outcome.items() if result == status]
+                if ids:
+                    await db.execute(update(events).where(events.c.id.in_(ids)).values(status=status))
+            await db.commit()
+
+        # Clients mid-reading are billed against an in-memory balance
+        for user_id, cents in credits.items():
+            billing_service.credit(user_id, cents)
+        return len(rows)
+
+# Create a global instance
+webhook_service = WebhookService(
+    poll_interval=settings.STRIPE_WEBHOOK_POLL_SECONDS,
+    batch_size=settings.STRIPE_WEBHOOK_BATCH_SIZE,
+)
@@ -1,24 +1,213 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Union
 from fastapi import WebSocket
 import json
 import asyncio
+from ..core.config import settings
+from .presence_service import presence_registry
+from .message_bus import MessageBus, create_message_bus
+
+DROP = "drop"
+DISCONNECT = "disconnect"
+PRESENCE_ROOM = "presence"
+
+Message = Union[str, dict, list]
+
+def encode(message: Message) -> str:
+    """Serialize a message once so it can be fanned out as-is"""
+    return message if isinstance(message, str) else json.dumps(message)
+
+class Connection:
+    """A websocket with its own bounded send queue drained by a writer task,
+    so a slow client only ever delays itself"""
+
+    def __init__(self, websocket: WebSocket, user_id: str, max_queue: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.rooms: Set[str] = set()
+        self.dropped = 0
+        self.writer: Optional[asyncio.Task] = None
+
+    def start(self, on_error):
+        self.writer = asyncio.create_task(self._write_loop(on_error))
+
+    async def _write_loop(self, on_error):
+        try:
+            while True:
+                payload = await self.queue.get()
+                await self.websocket.send_text(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            on_error(self)
+
+    def offer(self, payload: str, policy: str) -> bool:
+        """Queue a payload without waiting; False means the client is too slow
+        and should be disconnected"""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            if policy == DISCONNECT:
+                return False
+            # Drop the oldest pending message to make room for the newest
+            self.queue.get_nowait()
+            self.queue.put_nowait(payload)
+            self.dropped += 1
+            return True
+
+    def stop(self):
+        if self.writer and not self.writer.done():
+            self.writer.cancel()
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        
+    def __init__(self, presence=presence_registry, max_queue: int = 256, slow_consumer_policy: str = DROP,
+                 bus: Optional[MessageBus] = None):
+        self.active_connections: Dict[str, Connection] = {}
+        self.rooms: Dict[str, Set[str]] = {}
+        self.presence = presence
+        self.max_queue = max_queue
+        self.slow_consumer_policy = slow_consumer_policy
+        self.bus = bus
+        self.presence.on_change = self._publish_presence
+        self.on_room_change = None
+
+    async def start(self):
+        """Join the cross-worker bus so messages reach users connected elsewhere"""
+        if self.bus is not None:
+            await self.bus.start(self._on_bus_message)
+
+    async def stop(self):
+        if self.bus is not None:
+            await self.bus.stop()
+
+    async def _on_bus_message(self, envelope: dict):
+        kind, payload = envelope.get("kind"), envelope.get("payload")
+        if kind == "user":
+            self._deliver_user(envelope["target"], payload)
+        elif kind == "room":
+            self._deliver_room(envelope["target"], payload)
+        elif kind == "broadcast":
+            self._deliver_all(payload)
+
+    def _relay(self, kind: str, target: Optional[str], payload: str):
+        if self.bus is not None:
+            self.bus.publish({"kind": kind, "target": target, "payload": payload})
+
     async def connect(self, websocket: WebSocket, user_id: str):
+        await self.presence.connect(int(user_id))
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-        
-    def disconnect(self, user_id: str):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-            
-    async def send_personal_message(self, message: str, user_id: str):
-        if user_id in self.active_connections:
-            await self.active_connections[user_id].send_text(message)
-            
-    async def broadcast(self, message: str):
-        for connection in self.active_connections.values():
-            await connection.send_text(message)
+        previous = self.active_connections.get(user_id)
+        if previous is not None:
+            self._drop_connection(previous)
+            asyncio.create_task(self._close(previous.websocket))
+        connection = Connection(websocket, user_id, self.max_queue)
+        connection.start(self._on_writer_error)
+        self.active_connections[user_id] = connection
+
+    def disconnect(self, user_id: str, websocket: Optional[WebSocket] = None):
+        connection = self.active_connections.get(user_id)
+        if connection is None or (websocket is not None and connection.websocket is not websocket):
+            return
+        self._drop_connection(connection)
+        self.presence.disconnect(int(user_id))
+
+    def heartbeat(self, user_id: str):
+        self.presence.heartbeat(int(user_id))
+
+    def subscribe(self, user_id: str, room: str):
+        connection = self.active_connections.get(user_id)
+        if connection is None or room in connection.rooms:
+            return
+        connection.rooms.add(room)
+        self.rooms.setdefault(room, set()).add(user_id)
+        if self.on_room_change is not None:
+            self.on_room_change(user_id, room, True)
+
+    def unsubscribe(self, user_id: str, room: str):
+        connection = self.active_connections.get(user_id)
+        if connection is not None:
+            connection.rooms.discard(room)
+        members = self.rooms.get(room)
+        if members is not None and user_id in members:
+            members.discard(user_id)
+            if not members:
+                del self.rooms[room]
+            if self.on_room_change is not None:
+                self.on_room_change(user_id, room, False)
+
+    def room_size(self, room: str) -> int:
+        return len(self.rooms.get(room, ()))
+
+    async def send_personal_message(self, message: Message, user_id: str):
+        payload = encode(message)
+        self._deliver_user(user_id, payload)
+        # The user may also be connected to another worker
+        self._relay("user", user_id, payload)
+
+    async def publish(self, room: str, message: Message):
+        self.publish_nowait(room, message)
+
+    def publish_nowait(self, room: str, message: Message):
+        payload = encode(message)
+        self._deliver_room(room, payload)
+        self._relay("room", room, payload)
+
+    async def broadcast(self, message: Message):
+        payload = encode(message)
+        self._deliver_all(payload)
+        self._relay("broadcast", None, payload)
+
+    def _deliver_user(self, user_id: str, payload: str):
+        connection = self.active_connections.get(user_id)
+        if connection is not None:
+            self._offer(connection, payload)
+
+    def _deliver_room(self, room: str, payload: str):
+        members = self.rooms.get(room)
+        if not members:
+            return
+        for user_id in list(members):
+            connection = self.active_connections.get(user_id)
+            if connection is not None:
+                self._offer(connection, payload)
+
+    def _deliver_all(self, payload: str):
+        for connection in list(self.active_connections.values()):
+            self._offer(connection, payload)
+
+    def _offer(self, connection: Connection, payload: str):
+        if not connection.offer(payload, self.slow_consumer_policy):
+            self._evict(connection, code=1013)
+
+    def _on_writer_error(self, connection: Connection):
+        self._evict(connection, code=1011)
+
+    def _evict(self, connection: Connection, code: int):
+        if self.active_connections.get(connection.user_id) is connection:
+            self._drop_connection(connection)
+            self.presence.disconnect(int(connection.user_id))
+        asyncio.create_task(self._close(connection.websocket, code))
+
+    def _drop_connection(self, connection: Connection):
+        connection.stop()
+        for room in list(connection.rooms):
+            self.unsubscribe(connection.user_id, room)
+        if self.active_connections.get(connection.user_id) is connection:
+            del self.active_connections[connection.user_id]
+
+    async def _close(self, websocket: WebSocket, code: int = 1000):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    def _publish_presence(self, user_id: int, status: str):
+        self.publish_nowait(PRESENCE_ROOM, {"type": "presence", "user_id": user_id, "status": status})
+
+# Create a global instance
+manager = ConnectionManager(
+    max_queue=settings.WS_SEND_QUEUE_SIZE,
+    slow_consumer_policy=settings.WS_SLOW_CONSUMER_POLICY,
+    bus=create_message_bus(),
+)
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+API load benchmark for SoulSeer
+Seeds a SQLite database at a configurable scale, drives the HTTP endpoints of
+every router in app/main.py through an in-process ASGI client under
+concurrent load, and reports p50/p95/p99 latency, throughput and SQL queries
+per request for each endpoint. Results are compared with a committed baseline
+and the run exits non-zero on failed requests or when an endpoint issues more
+SQL per request than the baseline. Latency beyond the baseline only warns,
+since it swings with the machine, unless --fail-on-latency is given.
+
+    python benchmarks/api_benchmark.py --scale 1 --requests 200 --concurrency 20
+    python benchmarks/api_benchmark.py --update-baseline   # after an intended change
+
+Stripe is served by a local fake; the /ws websocket is not covered because the
+ASGI client speaks HTTP only.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep bcrypt from dominating the auth endpoints; set before settings load
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import httpx
+import stripe
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.replicas import get_replica_db
+from app.models.user import Base, User, Reader, UserRole
+from app.models.reading import ReadingSession, ChatMessage, SessionStatus, SessionType
+from app.models.product import Product, ProductType
+from app.models.stream import LiveStream
+from app.models import user, reading, payment, product, stream  # noqa: F401
+from app.services.password_service import password_hasher
+from app.services.presence_service import presence_registry
+from app.services.billing_service import billing_service
+from app.services.chat_service import chat_service
+from app.services.reader_stats_service import reader_stats
+from app.services.viewer_service import viewer_counter
+from app.services.gift_service import gift_service
+from app.services.ledger_service import ledger_service
+from app.services.webhook_service import webhook_service
+from app.services.stripe_service import stripe_service
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_baseline.json")
+SERVICES = (presence_registry, billing_service, chat_service, reader_stats, viewer_counter,
+            gift_service, ledger_service, webhook_service)
+PASSWORD = "bench-password"
+WEBHOOK_SECRET = "whsec_benchmark"
+
+# (task, counter) of the request being served. Only statements issued from
+# that task are counted: background flushes run in their own tasks, and tasks
+# spawned while serving a request inherit the variable but are not the request
+_queries: contextvars.ContextVar[Optional[Tuple[asyncio.Task, List[int]]]] = contextvars.ContextVar(
+    "queries", default=None)
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    owner = _queries.get()
+    if owner is not None and owner[0] is asyncio.current_task():
+        owner[1][0] += 1
+
+@dataclass
+class Fixture:
+    readers: int
+    clients: int
+    completed_per_client: int
+    chat_sessions: int
+    messages_per_session: int
+    products: int
+    streams: int
+    pending: int
+
+    def reader_id(self, i: int) -> int:
+        return i % self.readers + 1
+
+    def client_id(self, i: int) -> int:
+        return self.readers + i % self.clients + 1
+
+    def completed_session(self, i: int) -> Tuple[int, int]:
+        """(session id, client id) of a completed session"""
+        index = i % (self.clients * self.completed_per_client)
+        return index + 1, self.client_id(index // self.completed_per_client)
+
+    def pending_session(self, i: int) -> Tuple[int, int]:
+        index = i % self.pending
+        return self.clients * self.completed_per_client + index + 1, self.client_id(index)
+
+def build_fixture(scale: float, requests: int) -> Fixture:
+    return Fixture(
+        readers=max(1, int(20 * scale)),
+        clients=max(1, int(500 * scale)),
+        completed_per_client=10,
+        chat_sessions=max(1, int(100 * scale)),
+        messages_per_session=200,
+        products=max(1, int(500 * scale)),
+        streams=max(2, int(100 * scale)),
+        pending=requests,
+    )
+
+def seed(db_url: str, fx: Fixture):
+    engine = create_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    password_hash = password_hasher.context.hash(PASSWORD)
+    epoch = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": fx.reader_id(i), "email": f"reader{i}@bench", "first_name": "Reader", "last_name": str(i),
+             "role": UserRole.READER, "balance_cents": 0, "password_hash": password_hash}
+            for i in range(fx.readers)
+        ])
+        conn.execute(insert(Reader), [
+            {"user_id": fx.reader_id(i), "display_name": f"Reader {i}", "specialties": '["tarot"]',
+             "chat_rate": 3.99, "phone_rate": 4.99, "video_rate": 5.99,
+             "rating": 3.0 + (i % 20) / 10, "total_reviews": i % 50, "total_sessions": i % 80}
+            for i in range(fx.readers)
+        ])
+        conn.execute(insert(User), [
+            {"id": fx.client_id(i), "email": f"client{i}@bench", "first_name": "Client", "last_name": str(i),
+             "role": UserRole.CLIENT, "balance_cents": 1_000_000, "password_hash": password_hash}
+            for i in range(fx.clients)
+        ])
+        completed = fx.clients * fx.completed_per_client
+        conn.execute(insert(ReadingSession), [
+            {"id": i + 1, "client_id": fx.client_id(i // fx.completed_per_client), "reader_id": fx.reader_id(i),
+             "type": SessionType.CHAT, "status": SessionStatus.COMPLETED, "rate_per_minute": 3.99,
+             "start_time": epoch + timedelta(minutes=30 * i), "end_time": epoch + timedelta(minutes=30 * i + 20),
+             "duration_minutes": 20, "total_cost": 79.8}
+            for i in range(completed)
+        ])
+        conn.execute(insert(ReadingSession), [
+            {"id": completed + i + 1, "client_id": fx.client_id(i), "reader_id": fx.reader_id(i),
+             "type": SessionType.CHAT, "status": SessionStatus.PENDING, "rate_per_minute": 3.99}
+            for i in range(fx.pending)
+        ])
+        for s in range(fx.chat_sessions):
+            session_id, client_id = fx.completed_session(s)
+            conn.execute(insert(ChatMessage), [
+                {"session_id": session_id, "sender_id": client_id, "content": f"Message {m}",
+                 "timestamp": epoch + timedelta(seconds=m)}
+                for m in range(fx.messages_per_session)
+            ])
+        conn.execute(insert(Product), [
+            {"seller_id": fx.reader_id(i), "name": f"Product {i}", "description": "Bench product",
+             "price": 9.99 + i % 40, "type": list(ProductType)[i % 3], "category": "crystals",
+             "is_active": True, "inventory_count": 100}
+            for i in range(fx.products)
+        ])
+        conn.execute(insert(LiveStream), [
+            {"id": i + 1, "reader_id": fx.reader_id(i), "title": f"Stream {i}", "is_live": i % 2 == 0,
+             "viewer_count": i % 30, "total_gifts": 0.0,
+             "scheduled_start": datetime.utcnow() + timedelta(hours=i + 1)}
+            for i in range(fx.streams)
+        ])
+    engine.dispose()
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: Callable[[int], str]
+    user: Optional[Callable[[int], int]] = None
+    body: Optional[Callable[[int], dict]] = None
+    signed: bool = False
+
+def endpoints(fx: Fixture) -> List[Endpoint]:
+    """Every HTTP endpoint, ordered so the reading lifecycle runs start -> billing -> end"""
+    completed = lambda i: fx.completed_session(i)[0]
+    completed_client = lambda i: fx.completed_session(i)[1]
+    pending = lambda i: fx.pending_session(i)[0]
+    pending_client = lambda i: fx.pending_session(i)[1]
+    chat = lambda i: fx.completed_session(i % fx.chat_sessions)
+    return [
+        Endpoint("GET /", "GET", lambda i: "/"),
+        Endpoint("GET /health", "GET", lambda i: "/health"),
+        Endpoint("POST /api/auth/register", "POST", lambda i: "/api/auth/register",
+                 body=lambda i: {"email": f"new{i}@bench", "password": PASSWORD, "firstName": "New", "lastName": str(i)}),
+        Endpoint("POST /api/auth/login", "POST", lambda i: "/api/auth/login",
+                 body=lambda i: {"email": f"client{i % fx.clients}@bench", "password": PASSWORD}),
+        Endpoint("GET /api/auth/verify", "GET", lambda i: "/api/auth/verify", user=fx.client_id),
+        Endpoint("POST /api/auth/logout", "POST", lambda i: "/api/auth/logout"),
+        Endpoint("GET /api/users/balance", "GET", lambda i: "/api/users/balance", user=fx.client_id),
+        Endpoint("GET /api/users/sessions", "GET", lambda i: "/api/users/sessions", user=fx.client_id),
+        Endpoint("GET /api/users/favorites", "GET", lambda i: "/api/users/favorites", user=fx.client_id),
+        Endpoint("GET /api/users/upcoming", "GET", lambda i: "/api/users/upcoming", user=fx.client_id),
+        Endpoint("GET /api/readings/", "GET", lambda i: "/api/readings/?limit=20"),
+        Endpoint("GET /api/readings/top", "GET", lambda i: "/api/readings/top"),
+        Endpoint("GET /api/readings/online", "GET", lambda i: "/api/readings/online"),
+        Endpoint("POST /api/readings/request", "POST", lambda i: "/api/readings/request", user=fx.client_id,
+                 body=lambda i: {"reader_id": fx.reader_id(i), "session_type": SessionType.CHAT.value}),
+        Endpoint("POST /api/readings/{id}/start", "POST", lambda i: f"/api/readings/{pending(i)}/start",
+                 user=pending_client),
+        Endpoint("GET /api/readings/{id}/billing", "GET", lambda i: f"/api/readings/{pending(i)}/billing",
+                 user=pending_client),
+        Endpoint("POST /api/readings/{id}/end", "POST", lambda i: f"/api/readings/{pending(i)}/end",
+                 user=pending_client),
+        Endpoint("POST /api/readings/{id}/rate", "POST", lambda i: f"/api/readings/{completed(i)}/rate",
+                 user=completed_client, body=lambda i: {"rating": i % 5 + 1}),
+        Endpoint("GET /api/readings/{id}/messages", "GET", lambda i: f"/api/readings/{chat(i)[0]}/messages",
+                 user=lambda i: chat(i)[1]),
+        Endpoint("GET /api/streams/live", "GET", lambda i: "/api/streams/live"),
+        Endpoint("GET /api/streams/scheduled", "GET", lambda i: "/api/streams/scheduled"),
+        Endpoint("POST /api/streams/{id}/gifts", "POST", lambda i: "/api/streams/1/gifts", user=fx.client_id,
+                 body=lambda i: {"gift_type": "rose", "amount": 1.0}),
+        Endpoint("GET /api/products/", "GET", lambda i: "/api/products/"),
+        Endpoint("POST /api/payments/create-checkout-session", "POST",
+                 lambda i: "/api/payments/create-checkout-session", user=fx.client_id,
+                 body=lambda i: {"type": "add_funds"}),
+        Endpoint("POST /api/payments/webhook", "POST", lambda i: "/api/payments/webhook", signed=True,
+                 body=lambda i: {"id": f"evt_bench_{i}", "type": "checkout.session.completed", "data": {"object": {
+                     "amount_total": 2500, "payment_status": "paid", "payment_intent": f"pi_bench_{i}",
+                     "metadata": {"user_id": str(fx.client_id(i)), "type": "add_funds"}}}}),
+    ]
+
+async def fake_stripe(request: httpx.Request) -> httpx.Response:
+    """Local stand-in for the Stripe API"""
+    if request.url.path == "/v1/prices" and request.method == "GET":
+        return httpx.Response(200, json={"object": "list", "data": [], "has_more": False, "url": "/v1/prices"})
+    if request.url.path == "/v1/prices":
+        return httpx.Response(200, json={"id": "price_bench", "object": "price"})
+    key = request.headers.get("Idempotency-Key", "")
+    return httpx.Response(200, json={"id": f"cs_{key}", "object": "checkout.session",
+                                     "url": f"https://checkout.stripe.test/{key}"})
+
+def percentile(values: List[float], p: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+async def drive(http: httpx.AsyncClient, endpoint: Endpoint, requests: int, concurrency: int) -> dict:
+    latencies, queries, failures = [], [], []
+    tokens: Dict[int, str] = {}
+    next_index = iter(range(requests))
+
+    def headers_for(i: int) -> dict:
+        headers = {}
+        if endpoint.user is not None:
+            user_id = endpoint.user(i)
+            if user_id not in tokens:
+                tokens[user_id] = create_access_token({"sub": str(user_id)}, expires_delta=timedelta(hours=1))
+            headers["Authorization"] = f"Bearer {tokens[user_id]}"
+        return headers
+
+    async def worker():
+        for i in next_index:
+            headers = headers_for(i)
+            content = None
+            if endpoint.body is not None:
+                content = json.dumps(endpoint.body(i))
+                headers["Content-Type"] = "application/json"
+                if endpoint.signed:
+                    headers["Stripe-Signature"] = stripe.WebhookSignature.generate_signature_header(
+                        content, WEBHOOK_SECRET)
+            counter = [0]
+            token = _queries.set((asyncio.current_task(), counter))
+            started = time.perf_counter()
+            try:
+                response = await http.request(endpoint.method, endpoint.path(i), content=content, headers=headers)
+            finally:
+                _queries.reset(token)
+            latencies.append(time.perf_counter() - started)
+            queries.append(counter[0])
+            if response.status_code >= 400:
+                failures.append(f"{response.status_code} {response.text[:120]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "rps": round(requests / elapsed, 1),
+        "queries": round(sum(queries) / len(queries), 2),
+        "errors": len(failures),
+        "first_error": failures[0] if failures else None,
+    }
+
+async def run(db_url: str, fx: Fixture, requests: int, concurrency: int) -> Dict[str, dict]:
+    async_engine = create_async_engine(db_url.replace("sqlite://", "sqlite+aiosqlite://"))
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count_query)
+    session_factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_replica_db] = override_get_db
+    for service in SERVICES:
+        service.session_factory = session_factory
+    settings.STRIPE_WEBHOOK_SECRET = WEBHOOK_SECRET
+    stripe_service.api_key = "sk_bench"
+    stripe_service.transport = httpx.MockTransport(fake_stripe)
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        # Unhandled exceptions come back as 500s and are reported as errors
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for endpoint in endpoints(fx):
+                results[endpoint.name] = await drive(http, endpoint, requests, concurrency)
+    app.dependency_overrides.clear()
+    await async_engine.dispose()
+    return results
+
+def compare(results: Dict[str, dict], baseline: dict, tolerance: float,
+            same_shape: bool, fail_on_latency: bool = False) -> Tuple[List[str], List[str]]:
+    """(regressions, warnings) against the baseline. SQL per request is
+    compared on every run and counts only the request's own statements, so it
+    is stable. Latency only when the run used the baseline's scale and load:
+    p50 beyond ``tolerance`` warns (or fails with ``fail_on_latency``), and
+    p95, which swings whenever a background flush holds the SQLite write
+    lock, always only warns."""
+    regressions, warnings = [], []
+    for name, current in results.items():
+        reference = baseline["endpoints"].get(name)
+        if reference is None:
+            continue
+        # Cache refills land on whichever request misses, so averages wobble
+        # a little; an extra query on every request does not fit
+        if current["queries"] > reference["queries"] * 1.1 + 0.25:
+            regressions.append(f"{name}: {current['queries']} queries/request (baseline {reference['queries']})")
+        if not same_shape:
+            continue
+        for key, found in (("p50_ms", regressions if fail_on_latency else warnings), ("p95_ms", warnings)):
+            # Ignore sub-millisecond jitter on endpoints that are already fast
+            limit = max(reference[key] * (1 + tolerance), reference[key] + 2.0)
+            if current[key] > limit:
+                found.append(f"{name}: {key[:3]} {current[key]} ms (baseline {reference[key]} ms)")
+    return regressions, warnings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every API endpoint under concurrent load")
+    parser.add_argument("--scale", type=float, default=1.0, help="seed size multiplier (1 = 500 clients)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed latency slowdown, 0.5 = +50%%")
+    parser.add_argument("--fail-on-latency", action="store_true",
+                        help="treat a p50 slowdown as a regression (for a quiet, dedicated machine)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    fx = build_fixture(args.scale, args.requests)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{os.path.join(tmp, 'api.db')}"
+        print(f"🔮 Seeding scale {args.scale}: {fx.clients} clients, {fx.readers} readers, "
+              f"{fx.clients * fx.completed_per_client} sessions...")
+        seed(db_url, fx)
+        results = asyncio.run(run(db_url, fx, args.requests, args.concurrency))
+
+    print(f"\n{'endpoint':<46}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:<46}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['rps']:>9.1f}{r['queries']:>9.2f}{r['errors']:>8}")
+
+    shape = {"scale": args.scale, "requests": args.requests, "concurrency": args.concurrency}
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({**shape, "endpoints": {
+                name: {k: r[k] for k in ("p50_ms", "p95_ms", "p99_ms", "rps", "queries")}
+                for name, r in results.items()
+            }}, f, indent=2)
+            f.write("\n")
+        print(f"\n✅ Baseline written to {args.baseline}")
+
+    failed = False
+    for name, r in results.items():
+        if r["errors"]:
+            failed = True
+            print(f"❌ {name}: {r['errors']} failed requests, e.g. {r['first_error']}")
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        same_shape = all(baseline.get(k) == v for k, v in shape.items())
+        if not same_shape:
+            print("\nℹ️  Scale or load differs from the baseline; comparing query counts only")
+        regressions, warnings = compare(results, baseline, args.tolerance, same_shape, args.fail_on_latency)
+        for warning in warnings:
+            print(f"⚠️  Slower: {warning}")
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        failed = failed or bool(regressions)
+        if not regressions:
+            print("\n✅ No regressions against the baseline")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+SQLite concurrency benchmark for SoulSeer
+Seeds a database with seed_data.py, then runs listing-style reads while
+writers commit ledger and chat batches as fast as they can, in several worker
+processes sharing one database file, first with the
+previous setup (one default engine, rollback journal) and then with the
+production SQLite mode from app.core.database (WAL, tuned pragmas, a single
+serialized writer and a read-only pool). Reports read and write throughput,
+read latency and lock errors for both.
+
+    python benchmarks/sqlite_benchmark.py
+    python benchmarks/sqlite_benchmark.py --workers 4 --readers 8 --writers 2 --rounds 5
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from init_db import create_tables
+from seed_data import seed
+from app.core.database import sqlite_pragmas, to_async_url
+from app.models.user import User, Reader, UserRole
+from app.models.reading import ReadingSession, ChatMessage, SessionStatus
+from app.models.payment import Transaction, TransactionStatus, TransactionType
+
+MESSAGES_PER_WRITE = 50
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def engines(url: str, tuned: bool, readers: int):
+    """(writer, reader) engines for one mode"""
+    if not tuned:
+        # What app.core.database used to build: one default engine for everything
+        engine = create_async_engine(to_async_url(url))
+        return engine, engine
+    writer = create_async_engine(to_async_url(url), pool_size=1, max_overflow=0)
+    sqlite_pragmas(writer, immediate=True)
+    reader = create_async_engine(to_async_url(url), pool_size=readers, max_overflow=0)
+    sqlite_pragmas(reader, read_only=True)
+    return writer, reader
+
+async def run_worker(path: str, tuned: bool, seconds: float, readers: int, writers: int,
+                     client_ids: List[int], session_ids: List[int], seed_value: int) -> dict:
+    """One API worker process: ``readers`` read loops and ``writers`` write
+    loops sharing that worker's engines"""
+    writer_engine, reader_engine = engines(f"sqlite:///{path}", tuned, readers)
+    deadline = time.perf_counter() + seconds
+    result = {"read": [], "write": [], "read errors": 0, "write errors": 0}
+    sessions, users = ReadingSession.__table__, User.__table__
+
+    async def reader_task(rng: random.Random):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with reader_engine.connect() as conn:
+                    # A client's session history and the reader directory
+                    await conn.execute(
+                        select(sessions)
+                        .where(sessions.c.client_id == rng.choice(client_ids),
+                               sessions.c.status == SessionStatus.COMPLETED.name)
+                        .order_by(sessions.c.end_time.desc()).limit(20)
+                    )
+                    await conn.execute(
+                        select(Reader.__table__, users.c.email).join(users, Reader.user_id == users.c.id)
+                        .order_by(Reader.rating.desc()).limit(50)
+                    )
+            except OperationalError:
+                result["read errors"] += 1
+                continue
+            result["read"].append(time.perf_counter() - started)
+
+    async def writer_task(rng: random.Random):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            client_id, session_id = rng.choice(client_ids), rng.choice(session_ids)
+            now = datetime.utcnow()
+            try:
+                async with writer_engine.begin() as conn:
+                    # Roughly one chat flush plus one ledger posting
+                    await conn.execute(insert(ChatMessage), [
+                        {"session_id": session_id, "sender_id": client_id, "content": "benchmark", "timestamp": now}
+                        for _ in range(MESSAGES_PER_WRITE)
+                    ])
+                    await conn.execute(update(User).where(User.id == client_id)
+                                       .values(balance_cents=User.balance_cents + 100))
+                    await conn.execute(insert(Transaction).values(
+                        user_id=client_id, type=TransactionType.DEPOSIT, status=TransactionStatus.COMPLETED,
+                        amount_cents=100, description="benchmark", created_at=now, updated_at=now))
+            except OperationalError:
+                result["write errors"] += 1
+                continue
+            result["write"].append(time.perf_counter() - started)
+
+    await asyncio.gather(*(reader_task(random.Random(seed_value + i)) for i in range(readers)),
+                         *(writer_task(random.Random(seed_value + 1000 + i)) for i in range(writers)))
+    await writer_engine.dispose()
+    if reader_engine is not writer_engine:
+        await reader_engine.dispose()
+    return result
+
+def worker_process(job) -> dict:
+    return asyncio.run(run_worker(*job))
+
+def run_mode(path: str, tuned: bool, workers: int, seconds: float, readers: int, writers: int,
+             client_ids: List[int], session_ids: List[int]) -> Dict[str, float]:
+    jobs = [(path, tuned, seconds, readers, writers, client_ids, session_ids, n * 10_000) for n in range(workers)]
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        results = pool.map(worker_process, jobs)
+    reads = [latency for r in results for latency in r["read"]]
+    writes = [latency for r in results for latency in r["write"]]
+    return {
+        "reads/s": len(reads) / seconds,
+        "read p50 ms": percentile(reads, 0.50) * 1000,
+        "read p99 ms": percentile(reads, 0.99) * 1000,
+        "writes/s": len(writes) / seconds,
+        "write p99 ms": percentile(writes, 0.99) * 1000,
+        "read errors": sum(r["read errors"] for r in results),
+        "write errors": sum(r["write errors"] for r in results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Read throughput under concurrent writes, before and after WAL mode")
+    parser.add_argument("--scale", type=float, default=0.05, help="seed_data scale (1 = ~1M rows)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each run")
+    parser.add_argument("--rounds", type=int, default=3, help="runs per mode, alternating; medians are reported")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="API worker processes sharing the database (default: CPUs, at most 4)")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent reads per worker")
+    parser.add_argument("--writers", type=int, default=1, help="concurrent writes per worker")
+    args = parser.parse_args()
+
+    modes = {"rollback journal": False, "WAL + read pool": True}
+    runs: Dict[str, List[Dict[str, float]]] = {name: [] for name in modes}
+    with tempfile.TemporaryDirectory() as workdir:
+        seeded = os.path.join(workdir, "seeded.db")
+        engine = create_engine(f"sqlite:///{seeded}")
+        create_tables(engine)
+        seed(engine, args.scale, 42, datetime(2026, 1, 1), 50_000)
+        with engine.connect() as conn:
+            client_ids = list(conn.scalars(select(User.id).where(User.role == UserRole.CLIENT)))
+            session_ids = list(conn.scalars(select(ReadingSession.id)))
+            rows = conn.scalar(select(func.count()).select_from(ChatMessage))
+        engine.dispose()
+        print(f"\n🔮 {len(client_ids):,} clients, {len(session_ids):,} sessions, {rows:,} messages; "
+              f"{args.workers} workers x ({args.readers} readers + {args.writers} writers), "
+              f"{args.rounds} x {args.seconds:.0f} s per mode")
+
+        for round_number in range(args.rounds):
+            # Alternate the order so neither mode always runs on a warmer machine
+            order = list(modes) if round_number % 2 == 0 else list(reversed(modes))
+            for name in order:
+                path = os.path.join(workdir, "run.db")
+                shutil.copy(seeded, path)
+                if not modes[name]:
+                    sqlite3.connect(path).execute("PRAGMA journal_mode=DELETE").fetchone()
+                runs[name].append(run_mode(path, modes[name], args.workers, args.seconds, args.readers,
+                                           args.writers, client_ids, session_ids))
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+
+    results = {name: {metric: statistics.median(run[metric] for run in mode_runs) for metric in mode_runs[0]}
+               for name, mode_runs in runs.items()}
+    metrics = list(next(iter(results.values())))
+    print(f"\n{'':<18}" + "".join(f"{metric:>14}" for metric in metrics))
+    for name, result in results.items():
+        print(f"{name:<18}" + "".join(f"{result[metric]:>14,.1f}" for metric in metrics))
+    before, after = results["rollback journal"], results["WAL + read pool"]
+    print(f"\n✅ Read throughput x{after['reads/s'] / max(before['reads/s'], 1e-9):.2f}, "
+          f"read p99 x{after['read p99 ms'] / max(before['read p99 ms'], 1e-9):.2f}, "
+          f"write throughput x{after['writes/s'] / max(before['writes/s'], 1e-9):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Worker cold start benchmark for SoulSeer
+Starts fresh interpreters that import app.main and run the application
+lifespan, the way a new uvicorn worker does, and reports median import,
+lifespan and total time to ready. The run fails if a module that is meant to
+load on first use (Stripe, JOSE, passlib, httpx) is imported during startup,
+or if time to ready regresses against the committed baseline.
+
+    python benchmarks/startup_benchmark.py --runs 15
+    python benchmarks/startup_benchmark.py --update-baseline   # after an intended change
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND)
+
+from sqlalchemy import create_engine
+
+from init_db import create_tables
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+# Heavy dependencies only needed by some requests; none may load at startup
+DEFERRED = ("stripe", "jose", "passlib", "cryptography", "httpx", "requests")
+
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app.main import app
+from app.core.metrics import metrics
+
+async def start():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter() - started
+        loaded = sorted(name for name in %r if name in sys.modules)
+    return ready, loaded
+
+ready, loaded = asyncio.run(start())
+print(json.dumps({"ready": ready, "import": metrics.startup["import"],
+                  "lifespan": metrics.startup["lifespan"], "loaded": loaded}))
+""" % (DEFERRED,)
+
+def run_once(workdir: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=BACKEND, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=workdir, env=env,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - started
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure worker cold start")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, 0.5 = +50%%")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # The app opens ./soulseer.db relative to its working directory
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'soulseer.db')}")
+        create_tables(engine)
+        engine.dispose()
+        run_once(workdir)  # warm the OS page cache and bytecode
+        runs = [run_once(workdir) for _ in range(args.runs)]
+
+    results = {phase: round(statistics.median(r[phase] for r in runs) * 1000, 1)
+               for phase in ("import", "lifespan", "ready", "process")}
+    loaded = sorted({name for r in runs for name in r["loaded"]})
+
+    print(f"\n🔮 Cold start over {args.runs} fresh workers (median ms)")
+    for phase, ms in results.items():
+        print(f"   {phase:<10} {ms:>8.1f}")
+
+    failures = []
+    if loaded:
+        failures.append(f"imported during startup: {', '.join(loaded)}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if results["ready"] > baseline["ready"] * (1 + args.tolerance):
+            failures.append(f"ready in {results['ready']} ms (baseline {baseline['ready']} ms)")
+
+    if failures:
+        print("\n❌ Startup regressions:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("\n✅ Startup within budget")
+
+if __name__ == "__main__":
+    main()
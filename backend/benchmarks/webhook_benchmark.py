@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Stripe webhook benchmark for SoulSeer
+A local fake Stripe signs top-up events and replays them, with redeliveries,
+at the webhook endpoint. Reports acknowledgement latency and throughput while
+the webhook service stores and applies the events in batches.
+
+    python benchmarks/webhook_benchmark.py --events 5000 --users 500 --redeliver 0.2 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import stripe
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.main import app
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.user import Base, User, UserRole
+from app.models.payment import StripeEvent
+from app.models import user, reading, payment, product, stream  # noqa: F401
+from app.services.webhook_service import webhook_service
+
+SECRET = "whsec_benchmark"
+TOP_UP_CENTS = 2500
+
+def seed(db_url: str, users: int):
+    engine = create_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i + 1, "email": f"payer{i}@bench", "first_name": "Payer", "last_name": str(i),
+             "role": UserRole.CLIENT, "balance_cents": 0}
+            for i in range(users)
+        ])
+    engine.dispose()
+
+def fake_stripe_deliveries(events: int, users: int, redeliver: float):
+    """Signed checkout.session.completed deliveries; a share are sent twice,
+    as Stripe does when an acknowledgement is slow"""
+    deliveries = []
+    for i in range(events):
+        event = {
+            "id": f"evt_bench_{i}",
+            "type": "checkout.session.completed",
+            "data": {"object": {
+                "amount_total": TOP_UP_CENTS,
+                "payment_status": "paid",
+                "payment_intent": f"pi_bench_{i}",
+                "metadata": {"user_id": str(i % users + 1), "type": "add_funds"},
+            }},
+        }
+        payload = json.dumps(event)
+        deliveries.append((payload, stripe.WebhookSignature.generate_signature_header(payload, SECRET)))
+    deliveries += random.Random(0).sample(deliveries, int(events * redeliver))
+    return deliveries
+
+async def run(db_url: str, deliveries, concurrency: int):
+    async_engine = create_async_engine(db_url.replace("sqlite://", "sqlite+aiosqlite://"))
+    session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    settings.STRIPE_WEBHOOK_SECRET = SECRET
+    webhook_service.session_factory = session_factory
+
+    latencies, failures = [], 0
+    queue = asyncio.Queue()
+    for delivery in deliveries:
+        queue.put_nowait(delivery)
+
+    async def worker(http):
+        nonlocal failures
+        while not queue.empty():
+            payload, signature = queue.get_nowait()
+            started = time.perf_counter()
+            response = await http.post("/api/payments/webhook", content=payload,
+                                       headers={"Stripe-Signature": signature})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failures += 1
+
+    await webhook_service.start()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        ingest = time.perf_counter() - started
+
+    # Events are applied in the background while deliveries arrive; time the tail
+    started = time.perf_counter()
+    await webhook_service.stop()
+    while await webhook_service.process_pending():
+        pass
+    drain = time.perf_counter() - started
+
+    async with session_factory() as db:
+        queued = await db.scalar(select(func.count(StripeEvent.id)))
+        credited = await db.scalar(select(func.sum(User.balance_cents)))
+    await async_engine.dispose()
+    app.dependency_overrides.clear()
+    return ingest, drain, latencies, failures, queued, credited
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Stripe webhook ingestion")
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--redeliver", type=float, default=0.2, help="share of events delivered twice")
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    deliveries = fake_stripe_deliveries(args.events, args.users, args.redeliver)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{os.path.join(tmp, 'webhooks.db')}"
+        print(f"🔮 Seeding {args.users} users; replaying {len(deliveries)} signed deliveries...")
+        seed(db_url, args.users)
+        ingest, drain, latencies, failures, queued, credited = asyncio.run(
+            run(db_url, deliveries, args.concurrency)
+        )
+
+    latencies.sort()
+    print(f"Acknowledged: {len(deliveries)} deliveries in {ingest:.2f} s ({len(deliveries) / ingest:.0f}/s), "
+          f"{failures} rejected")
+    print(f"Ack latency: p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, "
+          f"mean {statistics.mean(latencies) * 1000:.2f} ms")
+    print(f"Stored {queued} unique events; applying the rest after the last ack took {drain * 1000:.0f} ms")
+    expected = args.events * TOP_UP_CENTS
+    print(f"Credited ${credited / 100:,.2f} (expected ${expected / 100:,.2f})")
+    if credited == expected and queued == args.events:
+        print("✅ Every event credited exactly once despite redeliveries")
+    else:
+        print("❌ Credits do not match the unique events")
+
+if __name__ == "__main__":
+    main()
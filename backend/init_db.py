@@ -11,26 +11,19 @@ import os
 # Add the app directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.core.database import engine
-from app.models.user import Base
-from app.models.reading import Base as ReadingBase
-from app.models.payment import Base as PaymentBase
-from app.models.product import Base as ProductBase
-from app.models.stream import Base as StreamBase
+from app.core.database import Base, engine
+from app.core.migrations import run_migrations
+from app.models import user, reading, payment, product, stream  # noqa: F401  register tables
 
-def create_tables():
+def create_tables(bind=engine):
     """Create all database tables"""
     print("🔮 Creating SoulSeer database tables...")
     
-    # Import all models to ensure they're registered
-    from app.models import user, reading, payment, product, stream
+    # Every model shares one metadata, so this is a single pass
+    Base.metadata.create_all(bind=bind)
     
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
-    ReadingBase.metadata.create_all(bind=engine)
-    PaymentBase.metadata.create_all(bind=engine)
-    ProductBase.metadata.create_all(bind=engine)
-    StreamBase.metadata.create_all(bind=engine)
+    # Record/apply versioned migrations so later ones start from here
+    run_migrations(bind)
     
     print("✅ Database tables created successfully!")
     print("🌙 You can now start the SoulSeer application!")
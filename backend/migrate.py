@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Schema migration script for SoulSeer
+Applies any pending scripts from backend/migrations to the configured database
+"""
+
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine
+from app.core.migrations import run_migrations, applied_versions
+
+def migrate():
+    """Apply pending migrations"""
+    print("🔮 Applying SoulSeer schema migrations...")
+    applied = run_migrations(engine)
+    if applied:
+        print(f"✅ Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print("✅ Schema already up to date")
+    print(f"🌙 Current schema version: {max(applied_versions(engine), default=0)}")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,18 @@
+"""Composite indexes for the hot listing queries"""
+
+from sqlalchemy import text
+
+INDEXES = [
+    # /api/users/sessions: client_id = ? AND status = ? ORDER BY end_time DESC, id DESC
+    ("ix_reading_sessions_client_status_end", "reading_sessions", "client_id, status, end_time"),
+    # /api/products: is_active = ? [AND type = ?] ORDER BY id
+    ("ix_products_active_type", "products", "is_active, type"),
+    # /api/streams/live and /scheduled: is_live = ? ORDER BY scheduled_start, id
+    ("ix_live_streams_live_scheduled", "live_streams", "is_live, scheduled_start"),
+    # /api/readings: role = 'reader' ORDER BY id
+    ("ix_users_role", "users", "role"),
+]
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
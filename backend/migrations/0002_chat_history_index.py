@@ -0,0 +1,7 @@
+"""Index for paging through a session's chat history"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    # /api/readings/{id}/messages: session_id = ? ORDER BY id DESC
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chat_messages_session_id_id ON chat_messages (session_id, id)"))
@@ -0,0 +1,11 @@
+"""Unique-viewer estimate and its HyperLogLog sketch on live_streams"""
+
+from sqlalchemy import inspect, text
+
+def upgrade(conn):
+    existing = {column["name"] for column in inspect(conn).get_columns("live_streams")}
+    blob = "BYTEA" if conn.dialect.name == "postgresql" else "BLOB"
+    if "unique_viewers" not in existing:
+        conn.execute(text("ALTER TABLE live_streams ADD COLUMN unique_viewers INTEGER DEFAULT 0"))
+    if "viewer_sketch" not in existing:
+        conn.execute(text(f"ALTER TABLE live_streams ADD COLUMN viewer_sketch {blob}"))
@@ -0,0 +1,39 @@
+"""Integer-cent balances backed by the transactions ledger, plus balance snapshots"""
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, MetaData, Table, func, inspect, text
+
+def _columns(conn, table):
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+def upgrade(conn):
+    users = _columns(conn, "users")
+    if "balance_cents" not in users:
+        conn.execute(text("ALTER TABLE users ADD COLUMN balance_cents BIGINT NOT NULL DEFAULT 0"))
+        if "balance" in users:
+            conn.execute(text("UPDATE users SET balance_cents = CAST(ROUND(COALESCE(balance, 0) * 100) AS BIGINT)"))
+
+    transactions = _columns(conn, "transactions")
+    if "amount_cents" not in transactions:
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN amount_cents BIGINT NOT NULL DEFAULT 0"))
+        if "amount" in transactions:
+            conn.execute(text("UPDATE transactions SET amount_cents = CAST(ROUND(COALESCE(amount, 0) * 100) AS BIGINT)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_user_id_id ON transactions (user_id, id)"))
+
+    snapshots = Table(
+        "balance_snapshots", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, nullable=False),
+        Column("balance_cents", BigInteger, nullable=False),
+        Column("last_transaction_id", Integer, nullable=False),
+        Column("created_at", DateTime, server_default=func.now()),
+        Index("ix_balance_snapshots_user_id_id", "user_id", "id"),
+    )
+    snapshots.create(conn, checkfirst=True)
+
+    # Opening snapshot: existing balances predate the ledger, so they become
+    # the base that later ledger entries are added to
+    if not conn.execute(text("SELECT 1 FROM balance_snapshots LIMIT 1")).first():
+        conn.execute(text(
+            "INSERT INTO balance_snapshots (user_id, balance_cents, last_transaction_id) "
+            "SELECT id, balance_cents, (SELECT COALESCE(MAX(id), 0) FROM transactions) FROM users"
+        ))
@@ -0,0 +1,17 @@
+"""Durable queue for Stripe webhook events, deduplicated by event id"""
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, func
+
+def upgrade(conn):
+    events = Table(
+        "stripe_events", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("event_id", String, unique=True, nullable=False),
+        Column("type", String),
+        Column("payload", Text),
+        Column("status", String(9), nullable=False),
+        Column("received_at", DateTime, server_default=func.now()),
+        Column("processed_at", DateTime),
+        Index("ix_stripe_events_status_id", "status", "id"),
+    )
+    events.create(conn, checkfirst=True)
@@ -0,0 +1,12 @@
+"""Heartbeat row written on the primary; replicas report how far behind they are by how old their copy is"""
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table
+
+def upgrade(conn):
+    heartbeat = Table(
+        "replica_heartbeat", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("beat", Float, nullable=False),
+    )
+    heartbeat.create(conn, checkfirst=True)
+    conn.execute(heartbeat.insert().values(id=1, beat=0.0))
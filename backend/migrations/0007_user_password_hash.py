@@ -0,0 +1,7 @@
+"""Password hashes for email/password accounts on users"""
+
+from sqlalchemy import inspect, text
+
+def upgrade(conn):
+    if "password_hash" not in {column["name"] for column in inspect(conn).get_columns("users")}:
+        conn.execute(text("ALTER TABLE users ADD COLUMN password_hash VARCHAR"))
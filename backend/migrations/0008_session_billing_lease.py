@@ -0,0 +1,14 @@
+"""Billing owner and lease on reading_sessions, so one worker bills each active session"""
+
+from sqlalchemy import inspect, text
+
+def upgrade(conn):
+    existing = {column["name"] for column in inspect(conn).get_columns("reading_sessions")}
+    if "billing_owner" not in existing:
+        conn.execute(text("ALTER TABLE reading_sessions ADD COLUMN billing_owner VARCHAR"))
+    if "billing_lease_until" not in existing:
+        conn.execute(text("ALTER TABLE reading_sessions ADD COLUMN billing_lease_until TIMESTAMP"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_reading_sessions_status_lease "
+        "ON reading_sessions (status, billing_lease_until)"
+    ))
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Reader aggregate repair script for SoulSeer
+Recomputes every reader's rating, review count and session count from
+reading_sessions; the API keeps them current incrementally, this fixes drift
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.reader_stats_service import reader_stats
+
+def repair():
+    """Recompute reader aggregates in bulk"""
+    print("🔮 Recomputing reader ratings and session counts...")
+    repaired = asyncio.run(reader_stats.recompute())
+    print(f"✅ Repaired aggregates for {repaired} readers")
+
+if __name__ == "__main__":
+    repair()
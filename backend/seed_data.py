@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for SoulSeer
+Fills the configured database with realistic users, readers, reading sessions,
+chat messages, ledger transactions, products and live streams for scale
+testing. Rows are generated from a seeded RNG and written with chunked bulk
+inserts, so the same --seed and --anchor always produce the same data.
+
+    python seed_data.py --scale 1              # ~1M rows
+    python seed_data.py --scale 10 --seed 7    # ~10M rows
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event, func, insert, select, text
+
+from init_db import create_tables
+from app.core.database import engine as default_engine
+from app.models.user import User, Reader, UserRole, UserStatus
+from app.models.reading import ReadingSession, ChatMessage, SessionStatus, SessionType
+from app.models.payment import Transaction, TransactionStatus, TransactionType
+from app.models.product import Product, ProductType
+from app.models.stream import LiveStream
+
+# Rows per unit of --scale; roughly a million rows in total
+PER_SCALE = {
+    "clients": 20_000,
+    "readers": 1_000,
+    "sessions": 150_000,
+    "products": 5_000,
+    "streams": 2_000,
+}
+CHAT_MESSAGES_PER_SESSION = 8  # mean, exponentially distributed
+HISTORY_DAYS = 730
+# History ends here unless --anchor says otherwise, so default runs match
+DEFAULT_ANCHOR = datetime(2026, 1, 1)
+
+SPECIALTIES = ["tarot", "astrology", "mediumship", "love", "career", "dreams", "numerology", "crystals"]
+FIRST_NAMES = ["Luna", "Sage", "Aurora", "Orion", "Willow", "Phoenix", "Indigo", "Raven", "Celeste", "Rowan",
+               "Ember", "Jasper", "Iris", "Atlas", "Skye", "Nova", "River", "Ash", "Juniper", "Soren"]
+LAST_NAMES = ["Moon", "Star", "Vale", "Frost", "Hart", "Wilde", "Stone", "Rivers", "Grey", "Ashby",
+              "Blackwood", "Lark", "Fairweather", "Sol", "Thorne", "Winter", "Ravenscroft", "Bloom"]
+PHRASES = ["I see a new path opening for you", "The cards suggest patience", "Can you tell me more?",
+           "What about my career?", "There is strong energy around you", "Thank you so much",
+           "The Tower appears reversed", "Your guides are close", "Will things work out?", "Trust the timing"]
+PRODUCTS = ["Amethyst Cluster", "Rose Quartz Heart", "Rider-Waite Deck", "Sage Bundle", "Moon Journal",
+            "Birth Chart Reading", "Chakra Candle Set", "Obsidian Mirror", "Selenite Wand", "Oracle Deck"]
+
+class BulkWriter:
+    """Buffers rows per table and writes each chunk with one executemany in
+    its own transaction"""
+
+    def __init__(self, engine, chunk_size: int):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.buffers: Dict[str, List[dict]] = {}
+        self.tables = {}
+        self.written: Dict[str, int] = {}
+
+    def add(self, model, row: dict):
+        name = model.__tablename__
+        buffer = self.buffers.setdefault(name, [])
+        self.tables[name] = model.__table__
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush(name)
+
+    def flush(self, name: str = None):
+        for table in ([name] if name else list(self.buffers)):
+            rows = self.buffers.get(table)
+            if not rows:
+                continue
+            with self.engine.begin() as conn:
+                conn.execute(insert(self.tables[table]), rows)
+            self.written[table] = self.written.get(table, 0) + len(rows)
+            self.buffers[table] = []
+
+def next_ids(engine) -> Dict[str, int]:
+    """First free id per table, so seeding an existing database appends"""
+    ids = {}
+    with engine.connect() as conn:
+        for model in (User, Reader, ReadingSession, ChatMessage, Transaction, Product, LiveStream):
+            ids[model.__tablename__] = (conn.scalar(select(func.max(model.id))) or 0) + 1
+    return ids
+
+def seed(engine, scale: float, seed_value: int, anchor: datetime = DEFAULT_ANCHOR,
+         chunk_size: int = 50_000) -> Dict[str, int]:
+    rng = random.Random(seed_value)
+    counts = {name: max(1, int(per * scale)) for name, per in PER_SCALE.items()}
+    ids = next_ids(engine)
+    writer = BulkWriter(engine, chunk_size)
+    history = timedelta(days=HISTORY_DAYS)
+
+    def past(within: timedelta = history) -> datetime:
+        return anchor - timedelta(seconds=rng.randrange(int(within.total_seconds())))
+
+    # Users: readers first, then clients; all flushed before anything references them
+    first_user = ids["users"]
+    reader_ids = list(range(first_user, first_user + counts["readers"]))
+    client_ids = list(range(reader_ids[-1] + 1, reader_ids[-1] + 1 + counts["clients"]))
+    for user_id in reader_ids + client_ids:
+        is_reader = user_id <= reader_ids[-1]
+        created = past()
+        writer.add(User, {
+            "id": user_id,
+            "email": f"{'reader' if is_reader else 'client'}{user_id}@seed.soulseer.test",
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "role": UserRole.READER if is_reader else UserRole.CLIENT,
+            "status": UserStatus.ACTIVE,
+            "balance_cents": 0,
+            "created_at": created,
+            "updated_at": created,
+        })
+    writer.flush()
+
+    rates = {reader_id: round(rng.uniform(1.99, 9.99), 2) for reader_id in reader_ids}
+    reviews = {reader_id: [0, 0, 0] for reader_id in reader_ids}  # rating sum, reviews, completed sessions
+    spend = {client_id: 0 for client_id in client_ids}
+    types = [SessionType.CHAT, SessionType.PHONE, SessionType.VIDEO]
+
+    session_id, message_id, transaction_id = ids["reading_sessions"], ids["chat_messages"], ids["transactions"]
+    for _ in range(counts["sessions"]):
+        client_id = rng.choice(client_ids)
+        # A few popular readers take most sessions
+        reader_id = reader_ids[int(len(reader_ids) * rng.random() ** 2)]
+        session_type = rng.choices(types, weights=(6, 3, 1))[0]
+        roll = rng.random()
+        status = (SessionStatus.COMPLETED if roll < 0.88 else
+                  SessionStatus.CANCELLED if roll < 0.94 else SessionStatus.PENDING)
+        row = {
+            "id": session_id, "client_id": client_id, "reader_id": reader_id, "type": session_type,
+            "status": status, "rate_per_minute": rates[reader_id], "duration_minutes": 0, "total_cost": 0.0,
+            "start_time": None, "end_time": None, "client_rating": None,
+        }
+        if status == SessionStatus.PENDING:
+            row["start_time"] = anchor + timedelta(minutes=rng.randrange(1, 14 * 24 * 60))
+        elif status == SessionStatus.COMPLETED:
+            start = past()
+            minutes = max(1, min(120, int(rng.expovariate(1 / 18))))
+            cost_cents = round(rates[reader_id] * minutes * 100)
+            end = start + timedelta(minutes=minutes)
+            row.update(start_time=start, end_time=end, duration_minutes=minutes, total_cost=cost_cents / 100)
+            stats = reviews[reader_id]
+            stats[2] += 1
+            if rng.random() < 0.6:
+                rating = rng.choices((1, 2, 3, 4, 5), weights=(1, 1, 3, 8, 15))[0]
+                row["client_rating"] = rating
+                stats[0] += rating
+                stats[1] += 1
+            spend[client_id] += cost_cents
+            writer.add(Transaction, {
+                "id": transaction_id, "user_id": client_id, "type": TransactionType.READING_PAYMENT,
+                "status": TransactionStatus.COMPLETED, "amount_cents": -cost_cents,
+                "description": f"Reading session {session_id}", "stripe_payment_intent_id": None,
+                "created_at": end, "updated_at": end,
+            })
+            transaction_id += 1
+            if session_type == SessionType.CHAT:
+                messages = min(2000, int(rng.expovariate(1 / CHAT_MESSAGES_PER_SESSION)))
+                step = minutes * 60 / max(1, messages)
+                for m in range(messages):
+                    writer.add(ChatMessage, {
+                        "id": message_id, "session_id": session_id,
+                        "sender_id": client_id if m % 2 == 0 else reader_id,
+                        "content": rng.choice(PHRASES), "timestamp": start + timedelta(seconds=m * step),
+                    })
+                    message_id += 1
+        else:
+            row["start_time"] = past()
+        # Set every timestamp here; server defaults would stamp the wall clock
+        row["created_at"] = row["updated_at"] = min(row["start_time"], anchor)
+        writer.add(ReadingSession, row)
+        session_id += 1
+
+    # Deposits cover each client's spending plus a little left over
+    for client_id in client_ids:
+        target = spend[client_id] + rng.choice((0, 500, 1000, 2500, 5000))
+        deposited = 0
+        while deposited < target:
+            cents = rng.choice((2500, 2500, 5000, 10000))
+            created = past()
+            writer.add(Transaction, {
+                "id": transaction_id, "user_id": client_id, "type": TransactionType.DEPOSIT,
+                "status": TransactionStatus.COMPLETED, "amount_cents": cents,
+                "description": "Account balance top-up", "stripe_payment_intent_id": f"pi_seed_{transaction_id}",
+                "created_at": created, "updated_at": created,
+            })
+            transaction_id += 1
+            deposited += cents
+
+    for offset, reader_id in enumerate(reader_ids):
+        rating_sum, review_count, sessions = reviews[reader_id]
+        writer.add(Reader, {
+            "id": ids["readers"] + offset, "user_id": reader_id,
+            "display_name": f"{rng.choice(FIRST_NAMES)} the {rng.choice(['Seer', 'Mystic', 'Oracle', 'Sage'])}",
+            "bio": "Intuitive reader with years of experience.",
+            "specialties": json.dumps(rng.sample(SPECIALTIES, 3)),
+            "chat_rate": rates[reader_id], "phone_rate": round(rates[reader_id] + 1, 2),
+            "video_rate": round(rates[reader_id] + 2, 2),
+            "rating": rating_sum / review_count if review_count else 0.0,
+            "total_reviews": review_count, "total_sessions": sessions, "status": "offline",
+            "created_at": anchor - history, "updated_at": anchor,
+        })
+
+    for offset in range(counts["products"]):
+        writer.add(Product, {
+            "id": ids["products"] + offset, "seller_id": rng.choice(reader_ids),
+            "name": f"{rng.choice(PRODUCTS)} #{offset}", "description": "Hand-picked for your practice.",
+            "price": round(rng.uniform(4.99, 149.99), 2), "type": rng.choice(list(ProductType)),
+            "category": rng.choice(SPECIALTIES), "is_active": rng.random() < 0.9,
+            "inventory_count": rng.randrange(0, 500), "created_at": past(), "updated_at": anchor,
+        })
+
+    for offset in range(counts["streams"]):
+        roll = rng.random()
+        row = {
+            "id": ids["live_streams"] + offset, "reader_id": rng.choice(reader_ids),
+            "title": f"{rng.choice(SPECIALTIES).title()} live with {rng.choice(FIRST_NAMES)}",
+            "description": "Join for live readings.", "is_live": roll < 0.05,
+            "viewer_count": 0, "unique_viewers": 0, "total_gifts": 0.0,
+            "scheduled_start": None, "started_at": None, "ended_at": None,
+        }
+        if roll < 0.05:
+            row.update(started_at=anchor - timedelta(minutes=rng.randrange(1, 180)),
+                       viewer_count=rng.randrange(0, 400))
+        elif roll < 0.35:
+            row["scheduled_start"] = anchor + timedelta(minutes=rng.randrange(30, 30 * 24 * 60))
+        else:
+            started = past()
+            row.update(scheduled_start=started, started_at=started,
+                       ended_at=started + timedelta(minutes=rng.randrange(15, 240)),
+                       total_gifts=round(rng.uniform(0, 500), 2))
+        row["created_at"] = min(row["scheduled_start"] or row["started_at"], anchor)
+        writer.add(LiveStream, row)
+    writer.flush()
+
+    # Balances are what the ledger says, so ledger_balance() agrees from the start
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE users SET balance_cents = COALESCE((SELECT SUM(amount_cents) FROM transactions "
+            "WHERE transactions.user_id = users.id), 0) WHERE id >= :first"
+        ), {"first": client_ids[0]})
+        if engine.dialect.name == "postgresql":
+            # Explicit ids leave the serial sequences behind
+            for table in writer.written:
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                ))
+    return writer.written
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic SoulSeer data for scale testing")
+    parser.add_argument("--scale", type=float, default=1.0, help="1 = roughly a million rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor", type=date.fromisoformat, default=DEFAULT_ANCHOR.date(),
+                        help=f"date the history ends at (YYYY-MM-DD, default {DEFAULT_ANCHOR.date()})")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--database-url", help="defaults to the application's database")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url) if args.database_url else default_engine
+    if engine.dialect.name == "sqlite":
+        # Bulk load: skip the fsync per chunk; a crash mid-seed just means reseeding
+        @event.listens_for(engine, "connect")
+        def _fast_writes(dbapi_connection, _):
+            dbapi_connection.execute("PRAGMA synchronous=OFF")
+
+    create_tables(engine)
+    print(f"🔮 Seeding scale {args.scale} with seed {args.seed} (history up to {args.anchor})...")
+    started = time.perf_counter()
+    written = seed(engine, args.scale, args.seed, datetime.combine(args.anchor, datetime.min.time()),
+                   args.chunk_size)
+    elapsed = time.perf_counter() - started
+
+    total = sum(written.values())
+    for table, rows in sorted(written.items()):
+        print(f"   {table:<16} {rows:>12,}")
+    print(f"✅ Wrote {total:,} rows in {elapsed:.1f} s ({total / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
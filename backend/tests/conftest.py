@@ -0,0 +1,161 @@
+import itertools
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.cache import response_cache
+from app.core.database import get_db, get_read_db
+from app.core.replicas import get_replica_db
+from app.services.principal_cache import principal_cache
+from app.services.presence_service import presence_registry
+from app.services.billing_service import billing_service
+from app.services.chat_service import chat_service
+from app.services.reader_stats_service import reader_stats
+from app.services.viewer_service import viewer_counter
+from app.services.gift_service import gift_service
+from app.services.ledger_service import ledger_service
+from app.services.webhook_service import webhook_service
+from app.models.user import Base, Reader, User, UserRole
+from app.models.reading import ReadingSession, SessionType
+from app.models import user, reading, payment, product, stream  # noqa: F401  register tables
+
+
+class QueryCounter:
+    """Counts SQL statements issued against an engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    @contextmanager
+    def measure(self):
+        self.count = 0
+        yield self
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    principal_cache.clear()
+    response_cache.clear()
+    yield
+    principal_cache.clear()
+    for user_id in [p.user_id for p in presence_registry.online_readers()]:
+        presence_registry.disconnect(user_id)
+    presence_registry._dirty.clear()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def engine(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_engine(engine, db_path):
+    # NullPool: connections must not outlive the event loop that opened them
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    yield async_engine
+
+
+@pytest.fixture
+def db_session(engine):
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def async_session_factory(async_engine):
+    return async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def client(async_session_factory):
+    async def override_get_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_replica_db] = override_get_db
+    services = (presence_registry, billing_service, chat_service, reader_stats, viewer_counter, gift_service,
+                ledger_service, webhook_service)
+    original_factories = [service.session_factory for service in services]
+    for service in services:
+        service.session_factory = async_session_factory
+    with TestClient(app) as test_client:
+        yield test_client
+    for service, factory in zip(services, original_factories):
+        service.session_factory = factory
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def query_counter(async_engine):
+    return QueryCounter(async_engine.sync_engine)
+
+
+def auth_headers(user_id: int) -> dict:
+    token = create_access_token({"sub": str(user_id)}, expires_delta=timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+_ids = itertools.count(1)
+
+
+def make_user(db, email: str = None, role: UserRole = UserRole.CLIENT, balance: float = 0.0, **fields) -> User:
+    """Committed user with a unique email unless one is given"""
+    fields.setdefault("first_name", "Test")
+    fields.setdefault("last_name", "User")
+    user = User(email=email or f"user{next(_ids)}@example.com", role=role, balance=balance, **fields)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def make_reader(db, name: str, specialties=None, **profile) -> User:
+    """Committed reader user with a Reader profile displayed as ``name``"""
+    user = make_user(db, email=f"{name}@example.com", role=UserRole.READER, first_name=name, last_name="Reader")
+    if specialties is not None:
+        profile["specialties"] = json.dumps(specialties)
+    db.add(Reader(user_id=user.id, display_name=name, **profile))
+    db.commit()
+    return user
+
+
+def make_session(db, client: User = None, reader: User = None, **fields) -> ReadingSession:
+    """Committed chat session, creating the client and reader if not given"""
+    client = client or make_user(db)
+    reader = reader or make_user(db, role=UserRole.READER)
+    fields.setdefault("type", SessionType.CHAT)
+    session = ReadingSession(client_id=client.id, reader_id=reader.id, **fields)
+    db.add(session)
+    db.commit()
+    return session
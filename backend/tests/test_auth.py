@@ -0,0 +1,49 @@
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.models.user import User
+
+
+def test_register_then_login(client):
+    payload = {"email": "new@example.com", "password": "s3cret", "firstName": "New", "lastName": "User"}
+    assert client.post("/api/auth/register", json=payload).status_code == 200
+
+    response = client.post("/api/auth/login", json={"email": "new@example.com", "password": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    response = client.post("/api/auth/login", json={"email": "new@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_login_rehashes_outdated_cost(client, db_session):
+    weak = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    user = User(email="old@example.com", first_name="Old", last_name="Hash", password_hash=weak.hash("pw"))
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/api/auth/login", json={"email": "old@example.com", "password": "pw"})
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert user.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+
+
+def test_principal_is_cached_until_role_changes(client, db_session, query_counter):
+    from app.models.user import UserRole
+    from .conftest import auth_headers
+
+    user = User(email="cached@example.com", first_name="Ca", last_name="Ched")
+    db_session.add(user)
+    db_session.commit()
+    headers = auth_headers(user.id)
+
+    assert client.get("/api/auth/verify", headers=headers).json()["user"]["role"] == "client"
+    with query_counter.measure() as counter:
+        response = client.get("/api/auth/verify", headers=headers)
+    assert response.status_code == 200
+    assert counter.count == 0
+
+    user.role = UserRole.READER
+    db_session.commit()
+    assert client.get("/api/auth/verify", headers=headers).json()["user"]["role"] == "reader"
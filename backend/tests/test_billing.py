@@ -0,0 +1,236 @@
+import asyncio
+from datetime import datetime
+
+from app.models.user import User, UserRole
+from app.models.reading import ReadingSession, SessionStatus, SessionType
+from app.services.billing_service import BillingService
+from .conftest import make_user
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_session(db, balance: float, rate: float) -> ReadingSession:
+    """An ACTIVE session started at t=1,000,000 for a client with ``balance``"""
+    client, reader = make_user(db, balance=balance), make_user(db, role=UserRole.READER)
+    session = ReadingSession(
+        client_id=client.id,
+        reader_id=reader.id,
+        type=SessionType.CHAT,
+        status=SessionStatus.ACTIVE,
+        rate_per_minute=rate,
+        start_time=datetime.utcfromtimestamp(1_000_000),
+    )
+    db.add(session)
+    db.commit()
+    return session
+
+
+def test_session_stops_when_balance_runs_out(async_session_factory, db_session):
+    session = make_session(db_session, balance=1.0, rate=6.0)  # $0.10 per second
+    clock = FakeClock(1_000_000.0)
+    billing = BillingService(clock=clock)
+    billing.session_factory = async_session_factory
+
+    asyncio.run(billing.resume_active_sessions())
+    assert billing.tick(1_000_005.0) == []
+    assert billing.active_sessions[session.id].billed_seconds == 5
+
+    stopped = billing.tick(1_000_012.0)
+    assert [s.session_id for s in stopped] == [session.id]
+    assert stopped[0].billed_seconds == 10
+    assert session.id not in billing.active_sessions
+
+    asyncio.run(billing.flush())
+    db_session.expire_all()
+    row = db_session.get(ReadingSession, session.id)
+    assert row.status == SessionStatus.COMPLETED
+    assert row.total_cost == 1.0
+    assert row.duration_minutes == 1
+    assert abs(db_session.get(User, session.client_id).balance) < 1e-9
+
+
+def test_flush_statement_count_is_independent_of_session_count(async_session_factory, db_session, query_counter):
+    sessions = [make_session(db_session, balance=100.0, rate=3.0 + i) for i in range(20)]
+    billing = BillingService(clock=FakeClock(1_000_000.0))
+    billing.session_factory = async_session_factory
+    asyncio.run(billing.resume_active_sessions())
+    billing.tick(1_000_030.0)
+
+    with query_counter.measure() as counter:
+        asyncio.run(billing.flush())
+    # lease renewal, the debit and ledger executemanys, and one for session totals
+    assert counter.count <= 4
+
+    db_session.expire_all()
+    assert db_session.get(ReadingSession, sessions[0].id).total_cost == 1.5
+    assert db_session.get(User, sessions[0].client_id).balance == 98.5
+
+
+def test_odd_rates_bill_whole_cents_without_overdraw(async_session_factory, db_session):
+    session = make_session(db_session, balance=1.0, rate=4.99)  # 499 cents over 60 seconds
+    billing = BillingService(clock=FakeClock(1_000_000.0))
+    billing.session_factory = async_session_factory
+    asyncio.run(billing.resume_active_sessions())
+
+    stopped = billing.tick(1_000_030.0)
+    assert [s.billed_seconds for s in stopped] == [12]  # 12 * 4.99 / 60 = $0.998
+    assert stopped[0].total_cents == 100
+
+    asyncio.run(billing.flush())
+    db_session.expire_all()
+    assert db_session.get(User, session.client_id).balance_cents == 0
+    assert db_session.get(ReadingSession, session.id).total_cost == 1.0
+
+
+def billing_worker(async_session_factory, clock, name):
+    billing = BillingService(clock=clock, lease_seconds=30.0, worker_id=name)
+    billing.session_factory = async_session_factory
+    return billing
+
+
+def test_two_workers_bill_an_active_session_once(async_session_factory, db_session):
+    session = make_session(db_session, balance=10.0, rate=6.0)  # $0.10 per second
+    clock = FakeClock(1_000_000.0)
+    first, second = (billing_worker(async_session_factory, clock, name) for name in ("a", "b"))
+
+    async def scenario():
+        await first.resume_active_sessions()
+        await second.resume_active_sessions()
+        clock.now += 30
+        for billing in (first, second):
+            billing.tick(clock.now)
+            await billing.flush()
+
+    asyncio.run(scenario())
+    assert list(first.active_sessions) == [session.id]
+    assert second.active_sessions == {}
+    db_session.expire_all()
+    assert db_session.get(User, session.client_id).balance_cents == 700
+
+
+def test_session_ended_through_another_worker_is_charged_to_its_end(async_session_factory, db_session):
+    session = make_session(db_session, balance=10.0, rate=6.0)
+    clock = FakeClock(1_000_000.0)
+    owner = billing_worker(async_session_factory, clock, "owner")
+
+    async def scenario():
+        await owner.resume_active_sessions()
+        # /end handled by a worker that is not billing the session
+        with db_session.begin():
+            row = db_session.get(ReadingSession, session.id)
+            row.status = SessionStatus.COMPLETED
+            row.end_time = datetime.utcfromtimestamp(1_000_020)
+        clock.now += 30
+        owner.tick(clock.now)
+        await owner.flush()
+
+    asyncio.run(scenario())
+    assert owner.active_sessions == {}
+    db_session.expire_all()
+    row = db_session.get(ReadingSession, session.id)
+    assert (row.status, row.total_cost) == (SessionStatus.COMPLETED, 2.0)
+    assert db_session.get(User, session.client_id).balance_cents == 800
+
+
+def test_lapsed_lease_moves_the_session_without_double_charging(async_session_factory, db_session):
+    session = make_session(db_session, balance=10.0, rate=6.0)
+    clock = FakeClock(1_000_000.0)
+    stalled, standby = (billing_worker(async_session_factory, clock, name) for name in ("stalled", "standby"))
+
+    async def scenario():
+        await stalled.resume_active_sessions()
+        clock.now += 10
+        stalled.tick(clock.now)
+        await stalled.flush()  # $1 charged, lease renewed to +40 s
+        clock.now += 45
+        stalled.tick(clock.now)  # billed in memory, but the lease has lapsed
+        await standby.resume_active_sessions()
+        await stalled.flush()
+        clock.now += 1
+        standby.tick(clock.now)
+        await standby.flush()
+
+    asyncio.run(scenario())
+    assert stalled.active_sessions == {}
+    assert list(standby.active_sessions) == [session.id]
+    db_session.expire_all()
+    assert db_session.get(User, session.client_id).balance_cents == 1000 - 560  # 56 seconds at 10 cents
+
+
+
+def test_ending_a_session_persists_only_that_session(async_session_factory, db_session):
+    ending, other = (make_session(db_session, balance=10.0, rate=6.0) for _ in range(2))
+    clock = FakeClock(1_000_000.0)
+    billing = BillingService(clock=clock)
+    billing.session_factory = async_session_factory
+
+    async def scenario():
+        await billing.resume_active_sessions()
+        clock.now += 10
+        billing.tick(clock.now)
+        await billing.end_session(ending.id)
+
+    asyncio.run(scenario())
+    db_session.expire_all()
+    assert db_session.get(ReadingSession, ending.id).status == SessionStatus.COMPLETED
+    assert db_session.get(User, ending.client_id).balance_cents == 900
+    # the other session's seconds wait for the periodic flush
+    assert db_session.get(ReadingSession, other.id).total_cost == 0
+    assert db_session.get(User, other.client_id).balance_cents == 1000
+
+
+def test_overlapping_flushes_charge_each_second_once(async_session_factory, db_session):
+    session = make_session(db_session, balance=10.0, rate=6.0)
+    clock = FakeClock(1_000_000.0)
+    billing = BillingService(clock=clock)
+    billing.session_factory = async_session_factory
+
+    async def scenario():
+        await billing.resume_active_sessions()
+        clock.now += 10
+        billing.tick(clock.now)
+        # the loop's flush, an /end and shutdown can all flush at once
+        await asyncio.gather(billing.flush(), billing.end_session(session.id), billing.flush())
+
+    asyncio.run(scenario())
+    db_session.expire_all()
+    assert db_session.get(ReadingSession, session.id).total_cost == 1.0
+    assert db_session.get(User, session.client_id).balance_cents == 900
+
+
+def test_slow_flush_does_not_hold_up_the_ticks():
+    class SteppingClock:
+        now = 1_000_000.0
+
+        def __call__(self) -> float:
+            self.now += 1
+            return self.now
+
+    billing = BillingService(flush_interval=1.0, clock=SteppingClock())
+    ticks, release = [], asyncio.Event()
+
+    async def blocked_flush(session_ids=None):
+        await release.wait()
+
+    async def claim_nothing():
+        pass
+
+    billing.flush, billing.resume_active_sessions = blocked_flush, claim_nothing
+    billing.tick = lambda now: ticks.append(now) or []
+
+    async def scenario():
+        billing._running = True
+        billing._task = asyncio.create_task(billing._billing_loop())
+        while len(ticks) < 5:
+            await asyncio.sleep(0)
+        assert not billing._flush_task.done()
+        release.set()
+        await billing.stop()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
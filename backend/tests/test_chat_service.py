@@ -0,0 +1,55 @@
+import asyncio
+
+from app.models.reading import ChatMessage
+from app.services.chat_service import ChatService
+from .conftest import auth_headers, make_session, make_user
+from .test_pagination import walk
+
+
+def test_buffered_messages_are_written_in_one_statement(async_session_factory, db_session, query_counter):
+    session = make_session(db_session)
+    chat = ChatService(batch_size=100)
+    chat.session_factory = async_session_factory
+    for i in range(40):
+        chat.append(session.id, session.client_id, f"m{i}")
+    assert db_session.query(ChatMessage).count() == 0
+
+    with query_counter.measure() as counter:
+        asyncio.run(chat.flush())
+    assert counter.count <= 3  # BEGIN, the executemany INSERT, COMMIT
+    assert chat.pending == 0
+    assert db_session.query(ChatMessage).count() == 40
+
+
+def test_stop_drains_everything_pending(async_session_factory, db_session):
+    session = make_session(db_session)
+    chat = ChatService(batch_size=10, flush_interval=3600)
+    chat.session_factory = async_session_factory
+
+    async def run():
+        await chat.start()
+        for i in range(25):
+            chat.append(session.id, session.reader_id, f"m{i}")
+        await chat.stop()
+
+    asyncio.run(run())
+    contents = [m.content for m in db_session.query(ChatMessage).order_by(ChatMessage.id)]
+    assert contents == [f"m{i}" for i in range(25)]
+
+
+def test_history_pages_newest_first_for_participants_only(client, db_session):
+    session = make_session(db_session)
+    db_session.add_all([
+        ChatMessage(session_id=session.id, sender_id=session.client_id, content=f"m{i}")
+        for i in range(12)
+    ])
+    db_session.add(ChatMessage(session_id=session.id + 1, sender_id=session.client_id, content="other"))
+    db_session.commit()
+
+    path = f"/api/readings/{session.id}/messages"
+    items, pages = walk(client, path, headers=auth_headers(session.reader_id), limit=5)
+    assert pages == 3
+    assert [m["content"] for m in items] == [f"m{i}" for i in reversed(range(12))]
+
+    outsider = make_user(db_session)
+    assert client.get(path, headers=auth_headers(outsider.id)).status_code == 404
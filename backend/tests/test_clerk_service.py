@@ -0,0 +1,80 @@
+import asyncio
+
+import httpx
+
+from app.services.clerk_service import ClerkService
+
+
+class MockClerk:
+    """Local stand-in for the Clerk API"""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.calls = 0
+        self.failures = failures
+        self.delay = delay
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            return httpx.Response(503)
+        user_id = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"id": user_id})
+
+
+def make_service(mock: MockClerk) -> ClerkService:
+    return ClerkService(
+        secret_key="sk_test",
+        base_url="http://clerk.local/v1",
+        transport=httpx.MockTransport(mock),
+        backoff_base=0.001,
+    )
+
+
+def test_concurrent_get_user_is_coalesced_and_cached():
+    mock = MockClerk(delay=0.02)
+    service = make_service(mock)
+
+    async def scenario():
+        users = await asyncio.gather(*(service.get_user("user_1") for _ in range(50)))
+        assert all(user == {"id": "user_1"} for user in users)
+        assert await service.get_user("user_1") == {"id": "user_1"}
+        client = service.client
+        await service.get_user("user_2")
+        assert service.client is client  # one pooled client reused across calls
+        await service.aclose()
+
+    asyncio.run(scenario())
+    assert mock.calls == 2
+
+
+def test_cancelled_caller_does_not_fail_coalesced_lookups():
+    mock = MockClerk(delay=0.05)
+    service = make_service(mock)
+
+    async def scenario():
+        first = asyncio.create_task(service.get_user("user_3"))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(service.get_user("user_3")) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+        users = await asyncio.gather(*followers)
+        await service.aclose()
+        return users
+
+    assert asyncio.run(scenario()) == [{"id": "user_3"}] * 5
+    assert mock.calls == 1
+
+
+def test_transient_errors_are_retried():
+    mock = MockClerk(failures=2)
+    service = make_service(mock)
+
+    async def scenario():
+        user = await service.get_user("user_9")
+        await service.aclose()
+        return user
+
+    assert asyncio.run(scenario()) == {"id": "user_9"}
+    assert mock.calls == 3
@@ -0,0 +1,63 @@
+import asyncio
+
+from app.models.stream import LiveStream, StreamGift
+from app.models.user import User
+from app.services.gift_service import GiftService
+from app.services.ledger_service import InsufficientFunds
+from .conftest import auth_headers, make_user
+
+
+def make_stream(db, balance: float, is_live: bool = True):
+    sender = make_user(db, balance=balance)
+    stream = LiveStream(title="Live tarot", is_live=is_live, total_gifts=0.0)
+    db.add(stream)
+    db.commit()
+    return sender, stream
+
+
+def test_concurrent_gifts_never_overdraw_and_totals_flush_in_one_statement(
+        async_session_factory, db_session, query_counter):
+    sender, stream = make_stream(db_session, balance=10.0)
+    gifts = GiftService(flush_interval=3600)
+    gifts.session_factory = async_session_factory
+
+    async def send_one():
+        try:
+            await gifts.send_gift(stream.id, sender.id, "rose", 1.0)
+            return True
+        except InsufficientFunds:
+            return False
+
+    async def burst():
+        await gifts.start()
+        return await asyncio.gather(*(send_one() for _ in range(25)))
+
+    results = asyncio.run(burst())
+    assert results.count(True) == 10
+    assert gifts.pending_total(stream.id) == 10.0
+
+    with query_counter.measure() as counter:
+        asyncio.run(gifts.flush())
+    assert counter.count <= 3  # BEGIN, the executemany UPDATE, COMMIT
+
+    db_session.expire_all()
+    assert db_session.get(User, sender.id).balance == 0.0
+    assert db_session.get(LiveStream, stream.id).total_gifts == 10.0
+    assert db_session.query(StreamGift).filter_by(stream_id=stream.id).count() == 10
+
+
+def test_gift_endpoint_rejects_offline_streams_and_empty_wallets(client, db_session):
+    sender, offline = make_stream(db_session, balance=5.0, is_live=False)
+    _, live = make_stream(db_session, balance=0.0)
+    headers = auth_headers(sender.id)
+
+    assert client.post(f"/api/streams/{offline.id}/gifts", json={"gift_type": "rose", "amount": 1},
+                       headers=headers).status_code == 404
+    assert client.post(f"/api/streams/{live.id}/gifts", json={"gift_type": "rose", "amount": 50},
+                       headers=headers).status_code == 400
+    response = client.post(f"/api/streams/{live.id}/gifts", json={"gift_type": "rose", "amount": 2.5},
+                           headers=headers)
+    assert response.status_code == 200
+    assert response.json()["amount"] == 2.5
+    db_session.expire_all()
+    assert db_session.get(User, sender.id).balance == 2.5
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.user import User, UserRole
+from app.models.reading import ReadingSession, SessionType
+from app.models.payment import Transaction, TransactionType
+from app.services.ledger_service import InsufficientFunds, LedgerService, credit, debit, ledger_balance
+from .conftest import auth_headers, make_user
+
+
+def test_concurrent_debits_never_overdraw(async_session_factory, db_session):
+    user = make_user(db_session, balance=10.0)
+
+    async def debit_one():
+        async with async_session_factory() as db:
+            try:
+                await debit(db, user.id, 300, TransactionType.GIFT)
+            except InsufficientFunds:
+                return False
+            await db.commit()
+            return True
+
+    async def burst():
+        return await asyncio.gather(*(debit_one() for _ in range(10)))
+
+    assert asyncio.run(burst()).count(True) == 3
+    db_session.expire_all()
+    assert db_session.get(User, user.id).balance_cents == 100
+    amounts = [t.amount_cents for t in db_session.query(Transaction).filter_by(user_id=user.id)]
+    assert amounts == [-300, -300, -300]
+
+
+def test_reading_request_requires_minimum_balance(client, db_session):
+    poor = make_user(db_session, balance=4.99, email="poor@example.com")
+    funded = make_user(db_session, balance=5.0, email="funded@example.com")
+    reader = User(email="reader@example.com", first_name="R", last_name="D", role=UserRole.READER)
+    db_session.add(reader)
+    db_session.commit()
+    payload = {"reader_id": reader.id, "session_type": SessionType.CHAT.value}
+
+    assert client.post("/api/readings/request", json=payload, headers=auth_headers(poor.id)).status_code == 400
+    response = client.post("/api/readings/request", json=payload, headers=auth_headers(funded.id))
+    assert response.status_code == 200
+    session = db_session.get(ReadingSession, response.json()["session_id"])
+    assert (session.client_id, session.type) == (funded.id, SessionType.CHAT)
+
+    # A requested session has no start time until the reader starts it
+    upcoming = client.get("/api/users/upcoming", headers=auth_headers(funded.id)).json()
+    assert [(item["id"], item["scheduledTime"]) for item in upcoming] == [(session.id, None)]
+
+
+def test_snapshots_bound_the_ledger_replay(async_session_factory, db_session):
+    user = make_user(db_session, balance=0.0)
+    ledger = LedgerService(settle_seconds=0)
+    ledger.session_factory = async_session_factory
+
+    async def scenario():
+        async with async_session_factory() as db:
+            await credit(db, user.id, 2000, TransactionType.DEPOSIT)
+            await debit(db, user.id, 150, TransactionType.GIFT)
+            await db.commit()
+        snapshotted = await ledger.take_snapshots(datetime.utcnow() + timedelta(seconds=1))
+        async with async_session_factory() as db:
+            await debit(db, user.id, 350, TransactionType.READING_PAYMENT)
+            await db.commit()
+            return snapshotted, await ledger_balance(db, user.id)
+
+    snapshotted, balance = asyncio.run(scenario())
+    assert snapshotted == 1
+    assert balance == 1500
+    db_session.expire_all()
+    assert db_session.get(User, user.id).balance_cents == 1500
+
+
+def test_dollar_balances_round_half_up_like_the_ledger():
+    assert User(balance=0.125).balance_cents == 13
+    assert User(balance=2.675).balance_cents == 268
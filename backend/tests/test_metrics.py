@@ -0,0 +1,59 @@
+from app.core.metrics import Histogram, metrics
+from app.models.user import User
+from .conftest import auth_headers
+
+
+def sample(text: str, prefix: str) -> float:
+    return sum(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(prefix))
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert list(histogram.cumulative()) == [("0.1", 2), ("1", 3), ("+Inf", 4)]
+    assert histogram.sum == 3.65
+
+
+def test_metrics_endpoint_reports_route_templates_and_sql_per_request(client, db_session, async_engine):
+    metrics.reset()
+    metrics.instrument_engine(async_engine)
+    user = User(email="metrics@example.com", first_name="M", last_name="T")
+    db_session.add(user)
+    db_session.commit()
+
+    for _ in range(3):
+        assert client.get("/api/users/balance", headers=auth_headers(user.id)).status_code == 200
+    assert client.post("/api/readings/999/end", headers=auth_headers(user.id)).status_code == 404
+    assert client.get("/no/such/path").status_code == 404
+
+    text = client.get("/metrics").text
+    balance = 'method="GET",route="/api/users/balance"'
+    assert f'soulseer_http_requests_total{{{balance},status="200"}} 3' in text
+    assert f'soulseer_http_request_duration_seconds_bucket{{{balance},le="+Inf"}} 3' in text
+    # The first request also loads the principal; later ones hit the principal cache
+    assert sample(text, f"soulseer_db_queries_per_request_sum{{{balance}}}") == 4
+    assert 'route="/api/readings/{session_id}/end",status="404"' in text
+    assert 'route="unmatched",status="404"' in text
+    assert "soulseer_http_requests_in_flight 1" in text  # the /metrics request itself
+    assert sample(text, 'soulseer_db_statements_total{origin="request"}') >= 4
+    assert sample(text, 'soulseer_startup_seconds{phase="lifespan"}') > 0
+
+
+def test_failed_statements_leave_no_timing_state_on_the_connection():
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+    from app.core.metrics import Metrics
+
+    engine = create_engine("sqlite://")
+    recorder = Metrics()
+    recorder.instrument_engine(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            try:
+                conn.execute(text("SELECT * FROM missing_table"))
+            except OperationalError:
+                pass
+        conn.execute(text("SELECT 1"))
+        assert not conn.info
+    assert recorder.sql_statements["background"] == 1
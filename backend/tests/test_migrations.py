@@ -0,0 +1,84 @@
+"""
+Schema migration tests: the runner applies versioned scripts once, and each
+hot listing query is served from an index rather than a full table scan.
+"""
+
+import pytest
+from sqlalchemy import inspect, select, text
+
+from app.api.products import PRODUCT_ORDER
+from app.api.readings import READER_ORDER, MESSAGE_ORDER
+from app.api.streams import LIVE_ORDER, SCHEDULED_ORDER
+from app.api.users import HISTORY_ORDER
+from app.core.migrations import run_migrations, applied_versions
+from app.core.pagination import keyset
+from app.models.product import Product, ProductType
+from app.models.reading import ChatMessage, ReadingSession, SessionStatus
+from app.models.stream import LiveStream
+from app.models.user import User, UserRole
+
+COMPOSITE_INDEXES = {
+    "reading_sessions": "ix_reading_sessions_client_status_end",
+    "products": "ix_products_active_type",
+    "live_streams": "ix_live_streams_live_scheduled",
+    "users": "ix_users_role",
+    "chat_messages": "ix_chat_messages_session_id_id",
+}
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_runner_adds_indexes_to_existing_database_once(engine):
+    # simulate a database created before the composite indexes existed
+    with engine.begin() as conn:
+        for index in COMPOSITE_INDEXES.values():
+            conn.execute(text(f"DROP INDEX {index}"))
+
+    assert run_migrations(engine) == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert run_migrations(engine) == []
+    assert applied_versions(engine) == [1, 2, 3, 4, 5, 6, 7, 8]
+    for table, index in COMPOSITE_INDEXES.items():
+        assert index in index_names(engine, table)
+
+
+def test_runner_adds_password_hash_to_existing_users_table(engine, db_session):
+    # simulate a database created before password login existed
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE users DROP COLUMN password_hash"))
+
+    run_migrations(engine)
+    db_session.add(User(email="old@example.com", password_hash="hash"))
+    db_session.commit()
+    assert db_session.scalar(select(User.password_hash).where(User.email == "old@example.com")) == "hash"
+
+
+HOT_QUERIES = {
+    "session history": keyset(
+        select(ReadingSession).where(
+            ReadingSession.client_id == 1,
+            ReadingSession.status == SessionStatus.COMPLETED,
+            ReadingSession.end_time.isnot(None),
+        ), HISTORY_ORDER, None, 20),
+    "products by category": keyset(
+        select(Product).where(Product.is_active == True, Product.type == ProductType.DIGITAL),
+        PRODUCT_ORDER, None, 50),
+    "live streams": keyset(select(LiveStream).where(LiveStream.is_live == True), LIVE_ORDER, None, 50),
+    "scheduled streams": keyset(
+        select(LiveStream).where(LiveStream.is_live == False, LiveStream.scheduled_start.isnot(None)),
+        SCHEDULED_ORDER, None, 50),
+    "readers": keyset(select(User).where(User.role == UserRole.READER), READER_ORDER, None, 50),
+    "chat history": keyset(select(ChatMessage).where(ChatMessage.session_id == 1), MESSAGE_ORDER, "WzEwMF0", 50),
+}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_an_index(engine, name):
+    run_migrations(engine)
+    statement = HOT_QUERIES[name].compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        plan = " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+
+    assert "USING INDEX" in plan or "USING COVERING INDEX" in plan, plan
+    assert not any(step.startswith("SCAN") and "INDEX" not in step for step in plan.split(" | ")), plan
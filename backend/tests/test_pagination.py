@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from app.models.product import Product, ProductType
+from app.models.reading import ReadingSession, SessionStatus, SessionType
+from app.models.user import User, UserRole
+from app.services.presence_service import BUSY, ReaderPresence, presence_registry
+from .conftest import auth_headers, make_reader
+
+
+def walk(client, path, headers=None, **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get(path, params=query, headers=headers or {})
+        assert response.status_code == 200
+        items.extend(response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items, pages
+
+
+def test_products_keyset_walk_is_complete_and_stable(client, db_session):
+    seller = User(email="seller@example.com", first_name="S", last_name="L", role=UserRole.READER)
+    db_session.add(seller)
+    db_session.flush()
+    db_session.add_all([
+        Product(seller_id=seller.id, name=f"P{i}", price=1.0, type=ProductType.DIGITAL, is_active=True)
+        for i in range(23)
+    ])
+    db_session.commit()
+
+    items, pages = walk(client, "/api/products/", limit=5)
+    assert pages == 5
+    assert [p["name"] for p in items] == [f"P{i}" for i in range(23)]
+
+
+def test_session_history_pages_by_end_time_then_id(client, db_session):
+    user = User(email="hist@example.com", first_name="H", last_name="I")
+    reader = User(email="hr@example.com", first_name="R", last_name="D", role=UserRole.READER)
+    db_session.add_all([user, reader])
+    db_session.flush()
+    end = datetime(2026, 1, 1)
+    # pairs of sessions share an end_time so the id tie-breaker matters
+    db_session.add_all([
+        ReadingSession(client_id=user.id, reader_id=reader.id, type=SessionType.CHAT,
+                       status=SessionStatus.COMPLETED, end_time=end + timedelta(hours=i // 2))
+        for i in range(11)
+    ])
+    db_session.commit()
+
+    items, pages = walk(client, "/api/users/sessions", headers=auth_headers(user.id), limit=3)
+    assert pages == 4
+    keys = [(s["endTime"], s["id"]) for s in items]
+    assert keys == sorted(keys, reverse=True)
+    assert len({s["id"] for s in items}) == 11
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/api/streams/live", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_online_readers_page_by_id_like_the_directory(client):
+    for user_id in (9, 3, 7, 1, 5, 11, 2):
+        presence_registry.set_online(ReaderPresence(user_id, f"R{user_id}", ("Tarot",), 0.0, 2.0))
+    presence_registry.set_status(2, BUSY)
+
+    items, pages = walk(client, "/api/readings/", status="online", limit=3)
+    assert pages == 2
+    assert [r["id"] for r in items] == [1, 3, 5, 7, 9, 11]
+    assert client.get("/api/readings/", params={"status": "busy"}).json()[0]["id"] == 2
+
+
+def test_filtered_directory_pages_are_full(client, db_session):
+    readers = [make_reader(db_session, f"d{i}", ["Tarot" if i % 2 else "Astrology", "Love"]) for i in range(12)]
+    make_reader(db_session, "partial", ["Tarotology"])  # substring, not a match
+    for reader in readers[1:6]:
+        presence_registry.set_online(ReaderPresence(reader.id, reader.first_name, ("Tarot",), 0.0, 2.0))
+
+    pages = []
+    cursor = None
+    while True:
+        response = client.get("/api/readings/", params=dict(specialty="tarot", status="offline", limit=2,
+                                                            **({"cursor": cursor} if cursor else {})))
+        pages.append([r["id"] for r in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    offline_tarot = [r.id for i, r in enumerate(readers) if i % 2 and i >= 6]
+    assert [i for page in pages for i in page] == offline_tarot
+    assert all(len(page) == 2 for page in pages[:-1])
+
+    assert client.get("/api/readings/online", params={"limit": 1000}).status_code == 422
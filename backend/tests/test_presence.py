@@ -0,0 +1,47 @@
+import json
+
+from app.models.user import Reader
+from app.services.presence_service import presence_registry, BUSY
+from .conftest import auth_headers, make_reader
+
+
+def test_websocket_presence_feeds_online_list(client, db_session, query_counter):
+    tarot = make_reader(db_session, "tarot", ["Tarot", "Love"], chat_rate=3.99)
+    astro = make_reader(db_session, "astro", ["Astrology"], chat_rate=3.99)
+
+    with client.websocket_connect(f"/ws?token={auth_headers(tarot.id)['Authorization'][7:]}"), \
+            client.websocket_connect(f"/ws?token={auth_headers(astro.id)['Authorization'][7:]}") as ws:
+        ws.send_text(json.dumps({"type": "heartbeat"}))
+
+        with query_counter.measure() as counter:
+            online = client.get("/api/readings/online").json()
+            tarot_online = client.get("/api/readings/", params={"status": "online", "specialty": "tarot"}).json()
+        assert counter.count == 0
+        assert {r["id"] for r in online} == {tarot.id, astro.id}
+        assert [r["id"] for r in tarot_online] == [tarot.id]
+
+    assert client.get("/api/readings/online").json() == []
+
+
+def test_status_changes_are_flushed_in_batches(async_session_factory, db_session, query_counter, monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(presence_registry, "session_factory", async_session_factory)
+    readers = [make_reader(db_session, f"r{i}", ["Tarot"], chat_rate=3.99) for i in range(5)]
+
+    async def churn():
+        for reader in readers:
+            await presence_registry.connect(reader.id)
+        presence_registry.set_status(readers[0].id, BUSY)
+        presence_registry.disconnect(readers[1].id)
+        with query_counter.measure() as counter:
+            await presence_registry.flush()
+        return counter.count
+
+    # one UPDATE per distinct status plus the commit
+    assert asyncio.run(churn()) <= 4
+
+    statuses = dict(db_session.query(Reader.user_id, Reader.status).all())
+    assert statuses[readers[0].id] == "busy"
+    assert statuses[readers[1].id] == "offline"
+    assert statuses[readers[2].id] == "online"
@@ -0,0 +1,89 @@
+"""
+Query-count regression tests: listing endpoints must issue a constant number
+of SQL statements no matter how many rows they return.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.user import User, UserRole
+from app.models.reading import ReadingSession, SessionStatus, SessionType
+from app.models.product import Product, ProductType
+from app.models.stream import LiveStream
+from .conftest import auth_headers
+
+MAX_QUERIES = 3
+
+
+def seed(db, rows: int) -> int:
+    client = User(email="client@example.com", first_name="Cli", last_name="Ent", role=UserRole.CLIENT)
+    db.add(client)
+    db.flush()
+
+    now = datetime.utcnow()
+    for i in range(rows):
+        reader = User(
+            email=f"reader{i}@example.com",
+            first_name="Reader",
+            last_name=str(i),
+            role=UserRole.READER,
+        )
+        db.add(reader)
+        db.flush()
+        db.add_all([
+            LiveStream(reader_id=reader.id, title=f"Live {i}", is_live=True),
+            LiveStream(
+                reader_id=reader.id,
+                title=f"Scheduled {i}",
+                is_live=False,
+                scheduled_start=now + timedelta(days=1),
+            ),
+            Product(
+                seller_id=reader.id,
+                name=f"Product {i}",
+                price=9.99,
+                type=ProductType.DIGITAL,
+                is_active=True,
+            ),
+            ReadingSession(
+                client_id=client.id,
+                reader_id=reader.id,
+                type=SessionType.CHAT,
+                status=SessionStatus.COMPLETED,
+                start_time=now - timedelta(hours=1),
+                end_time=now - timedelta(minutes=i),
+            ),
+            ReadingSession(
+                client_id=client.id,
+                reader_id=reader.id,
+                type=SessionType.VIDEO,
+                status=SessionStatus.PENDING,
+                start_time=now + timedelta(hours=i),
+            ),
+        ])
+    db.commit()
+    return client.id
+
+
+ENDPOINTS = [
+    ("/api/streams/live", False),
+    ("/api/streams/scheduled", False),
+    ("/api/products/", False),
+    ("/api/users/sessions", True),
+    ("/api/users/upcoming", True),
+]
+
+
+@pytest.mark.parametrize("path,authenticated", ENDPOINTS)
+def test_listing_query_count_is_constant(client, db_session, query_counter, path, authenticated):
+    client_id = seed(db_session, rows=25)
+    headers = auth_headers(client_id) if authenticated else {}
+
+    with query_counter.measure() as counter:
+        response = client.get(path, headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) >= 20
+    assert all(item.get("reader") or item.get("readerName") or item.get("seller") for item in response.json())
+    assert counter.count <= MAX_QUERIES, f"{path} issued {counter.count} queries"
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime
+
+from app.models.reading import ReadingSession, SessionStatus, SessionType
+from app.models.user import Reader
+from app.services.reader_stats_service import ReaderStats, reader_stats
+from .conftest import auth_headers, make_reader, make_session, make_user
+
+
+def test_ratings_update_aggregates_and_leaderboard_incrementally(client, db_session, query_counter):
+    alice, bob = make_reader(db_session, "alice"), make_reader(db_session, "bob")
+    customer = make_user(db_session)
+    sessions = [make_session(db_session, customer, alice, status=SessionStatus.COMPLETED, end_time=datetime.utcnow()) for _ in range(2)]
+    sessions.append(make_session(db_session, customer, bob, status=SessionStatus.COMPLETED, end_time=datetime.utcnow()))
+    asyncio.run(reader_stats.reload())
+
+    headers = auth_headers(customer.id)
+    for session, rating in zip(sessions, (5, 4, 3)):
+        assert client.post(f"/api/readings/{session.id}/rate", json={"rating": rating}, headers=headers).status_code == 200
+    # re-rating replaces the old score instead of adding a review
+    with query_counter.measure() as counter:
+        client.post(f"/api/readings/{sessions[2].id}/rate", json={"rating": 5}, headers=headers)
+    assert counter.count <= 6
+
+    db_session.expire_all()
+    profile = db_session.query(Reader).filter_by(user_id=alice.id).one()
+    assert (profile.rating, profile.total_reviews) == (4.5, 2)
+    profile = db_session.query(Reader).filter_by(user_id=bob.id).one()
+    assert (profile.rating, profile.total_reviews) == (5.0, 1)
+
+    top = client.get("/api/readings/top").json()
+    assert [(r["name"], r["rating"]) for r in top] == [("bob", 5.0), ("alice", 4.5)]
+
+
+def test_only_the_client_can_rate_a_completed_session(client, db_session):
+    reader = make_reader(db_session, "carol")
+    customer = make_user(db_session)
+    session = make_session(db_session, customer, reader, status=SessionStatus.COMPLETED, end_time=datetime.utcnow())
+
+    response = client.post(f"/api/readings/{session.id}/rate", json={"rating": 5}, headers=auth_headers(reader.id))
+    assert response.status_code == 403
+    response = client.post(f"/api/readings/{session.id}/rate", json={"rating": 9}, headers=auth_headers(customer.id))
+    assert response.status_code == 422
+
+
+def test_repair_job_recomputes_from_sessions(async_session_factory, db_session):
+    reader = make_reader(db_session, "dora")
+    customer = make_user(db_session)
+    for rating in (2, 4, None):
+        session = make_session(db_session, customer, reader, status=SessionStatus.COMPLETED, end_time=datetime.utcnow())
+        session.client_rating = rating
+    db_session.add(ReadingSession(client_id=customer.id, reader_id=reader.id, type=SessionType.CHAT,
+                                  status=SessionStatus.CANCELLED))
+    profile = db_session.query(Reader).filter_by(user_id=reader.id).one()
+    profile.rating, profile.total_reviews, profile.total_sessions = 1.0, 99, 99
+    db_session.commit()
+
+    stats = ReaderStats()
+    stats.session_factory = async_session_factory
+    assert asyncio.run(stats.recompute()) == 1
+
+    db_session.expire_all()
+    profile = db_session.query(Reader).filter_by(user_id=reader.id).one()
+    assert (profile.rating, profile.total_reviews, profile.total_sessions) == (3.0, 2, 3)
+    assert stats.top(1)[0].rating == 3.0
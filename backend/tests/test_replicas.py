@@ -0,0 +1,95 @@
+"""
+Read replica routing: listing reads go to replicas that are caught up with the
+primary's heartbeat, and fall back to the primary when a replica lags or is
+unreachable. Replicas here are copies of the primary's SQLite file.
+"""
+
+import asyncio
+import shutil
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core import replicas
+from app.core.migrations import run_migrations
+from app.core.replicas import ReplicaRouter, get_replica_db
+from app.main import app
+from app.models.product import Product, ProductType
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def primary(engine, db_path):
+    run_migrations(engine)
+    return db_path
+
+
+def router_for(async_session_factory, *paths, max_lag=5.0):
+    router = ReplicaRouter([], max_lag=max_lag)
+    router.session_factory = router.primary_factory = async_session_factory
+    for path in paths:
+        router.add_replica(f"sqlite:///{path}", create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool))
+    return router
+
+
+def replicate(primary, replica):
+    """Catch ``replica`` up with the primary, like a restore from a WAL shipper"""
+    shutil.copy(primary, replica)
+
+
+def test_lagging_and_unreachable_replicas_fall_back_to_primary(primary, tmp_path, async_session_factory):
+    fresh, stale, empty = tmp_path / "fresh.db", tmp_path / "stale.db", tmp_path / "empty.db"
+    sqlite3.connect(empty).close()  # reachable, but the heartbeat query fails
+    router = router_for(async_session_factory, fresh, stale, empty, max_lag=5.0)
+
+    async def scenario():
+        replicate(primary, stale)  # copied before the first heartbeat
+        await router.check()
+        assert router.pick() is None
+
+        replicate(primary, fresh)
+        await router.check()
+        lags = [replica.lag for replica in router.replicas]
+        assert lags[0] < 1.0
+        assert lags[1] > 5.0
+        assert lags[2] is None
+        assert {router.pick().url for _ in range(4)} == {f"sqlite:///{fresh}"}
+
+        # The fresh copy stops receiving changes and falls behind
+        with sqlite3.connect(fresh) as conn:
+            conn.execute("UPDATE replica_heartbeat SET beat = ?", (time.time() - 60,))
+        await router.check()
+        assert router.pick() is None
+
+    asyncio.run(scenario())
+    health = router.stats()["replicas"]
+    assert [r["healthy"] for r in health] == [False, False, False]
+
+
+def test_listing_reads_are_served_by_a_caught_up_replica(client, primary, tmp_path, db_session,
+                                                         async_session_factory, monkeypatch):
+    seller = User(email="seller@example.com", first_name="S", last_name="L", role=UserRole.READER)
+    db_session.add(seller)
+    db_session.flush()
+    db_session.add(Product(seller_id=seller.id, name="Primary", price=1.0, type=ProductType.DIGITAL, is_active=True))
+    db_session.commit()
+
+    replica = tmp_path / "replica.db"
+    router = router_for(async_session_factory, replica)
+    monkeypatch.setattr(replicas, "replica_router", router)
+    app.dependency_overrides.pop(get_replica_db)
+
+    replicate(primary, replica)  # a copy from before the first heartbeat
+    asyncio.run(router.check())
+    assert [p["name"] for p in client.get("/api/products/").json()] == ["Primary"]
+    assert router.primary_routed == 1
+
+    replicate(primary, replica)
+    with sqlite3.connect(replica) as conn:
+        conn.execute("UPDATE products SET name = 'Replica'")
+    asyncio.run(router.check())
+    assert [p["name"] for p in client.get("/api/products/", params={"limit": 10}).json()] == ["Replica"]
+    assert router.replicas[0].routed == 1
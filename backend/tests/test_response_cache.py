@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+from app.core.cache import response_cache
+from app.models.product import Product, ProductType
+from app.models.stream import LiveStream
+from app.models.user import Reader, User, UserRole
+from app.services.presence_service import ReaderPresence, presence_registry
+from .conftest import make_user
+
+
+def make_seller(db) -> User:
+    return make_user(db, role=UserRole.READER, first_name="Sam", last_name="Seller")
+
+
+def test_repeat_hits_skip_sql_and_revalidate_with_304(client, db_session, query_counter):
+    seller = make_seller(db_session)
+    db_session.add(Product(seller_id=seller.id, name="Deck", price=10.0, type=ProductType.DIGITAL, is_active=True))
+    db_session.commit()
+
+    first = client.get("/api/products/")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    with query_counter.measure() as counter:
+        second = client.get("/api/products/")
+        not_modified = client.get("/api/products/", headers={"If-None-Match": etag})
+    assert counter.count == 0
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == etag
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+def test_writes_invalidate_the_affected_listing(client, db_session):
+    seller = make_seller(db_session)
+    db_session.add(LiveStream(reader_id=seller.id, title="Tarot night", is_live=False,
+                              scheduled_start=datetime.utcnow() + timedelta(days=1)))
+    db_session.commit()
+    products_etag = client.get("/api/products/").headers["ETag"]
+    assert [s["title"] for s in client.get("/api/streams/scheduled").json()] == ["Tarot night"]
+
+    stream = db_session.query(LiveStream).one()
+    stream.title = "Tarot morning"
+    db_session.commit()
+    assert [s["title"] for s in client.get("/api/streams/scheduled").json()] == ["Tarot morning"]
+    assert response_cache.hits == 0
+
+    # unrelated listing is still served from cache
+    assert client.get("/api/products/").headers["ETag"] == products_etag
+    assert response_cache.hits == 1
+
+    seller.first_name = "Samantha"
+    db_session.commit()
+    assert client.get("/api/streams/scheduled").json()[0]["reader"] == "Samantha Seller"
+
+
+def test_reader_status_is_live_even_when_profiles_are_cached(client, db_session):
+    reader = make_seller(db_session)
+    db_session.add(Reader(user_id=reader.id, display_name="Sam", specialties='["Tarot"]', chat_rate=2.0))
+    db_session.commit()
+
+    assert client.get("/api/readings/").json()[0]["status"] == "offline"
+    presence_registry.set_online(ReaderPresence(reader.id, "Sam", ("Tarot",), 0.0, 2.0))
+    readers = client.get("/api/readings/").json()
+    assert readers[0]["status"] == "online"
+    assert response_cache.hits == 1
+
+
+class FakeRedis:
+    def __init__(self):
+        self.counters = {}
+
+    def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+
+class FakeAsyncRedis(FakeRedis):
+    async def incr(self, key):
+        FakeRedis.incr(self, key)
+
+
+def test_redis_invalidation_bumps_the_generation_with_or_without_a_loop():
+    import asyncio
+    from app.core.cache import RedisBackend
+
+    backend = RedisBackend("redis://unused", prefix="t")
+    backend._sync_redis, backend._redis = FakeRedis(), FakeAsyncRedis()
+
+    # seed and repair scripts commit outside any event loop
+    backend.invalidate("readers")
+    assert backend._sync_redis.counters == {"t:gen:readers": 1}
+
+    async def scenario():
+        backend.invalidate("readers")
+        assert len(backend._pending) == 1
+        await asyncio.sleep(0.01)
+        assert not backend._pending
+
+    asyncio.run(scenario())
+    assert backend._redis.counters == {"t:gen:readers": 1}
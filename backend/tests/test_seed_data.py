@@ -0,0 +1,58 @@
+"""
+Synthetic data generator: the same seed reproduces the same rows, and seeded
+balances agree with the ledger.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+
+from init_db import create_tables
+from seed_data import DEFAULT_ANCHOR, seed
+
+TABLES = ("users", "readers", "reading_sessions", "chat_messages", "transactions", "products", "live_streams")
+
+
+def seeded(path, seed_value):
+    engine = create_engine(f"sqlite:///{path}")
+    create_tables(engine)
+    written = seed(engine, scale=0.01, seed_value=seed_value, chunk_size=500)
+    return engine, written
+
+
+def dump(engine):
+    with engine.connect() as conn:
+        return {table: conn.execute(text(f"SELECT * FROM {table} ORDER BY id")).all() for table in TABLES}
+
+
+def test_same_seed_reproduces_the_same_rows(tmp_path):
+    first, written = seeded(tmp_path / "a.db", 7)
+    second, _ = seeded(tmp_path / "b.db", 7)
+    other, _ = seeded(tmp_path / "c.db", 8)
+
+    assert set(written) == set(TABLES)
+    assert dump(first) == dump(second)
+    assert dump(first)["reading_sessions"] != dump(other)["reading_sessions"]
+    # Without an explicit anchor the history ends on a fixed date, not today
+    with first.connect() as conn:
+        latest = conn.scalar(text("SELECT MAX(created_at) FROM users"))
+    assert datetime.fromisoformat(str(latest)) <= DEFAULT_ANCHOR
+
+
+def test_seeded_balances_match_the_ledger(tmp_path):
+    engine, written = seeded(tmp_path / "seed.db", 1)
+    with engine.connect() as conn:
+        mismatched = conn.scalar(text(
+            "SELECT COUNT(*) FROM users WHERE balance_cents < 0 OR balance_cents != "
+            "(SELECT COALESCE(SUM(amount_cents), 0) FROM transactions WHERE user_id = users.id)"
+        ))
+        reviews = conn.scalar(text("SELECT SUM(total_reviews) FROM readers"))
+        ratings = conn.scalar(text("SELECT COUNT(client_rating) FROM reading_sessions"))
+    assert mismatched == 0
+    assert reviews == ratings
+    assert written["users"] == 210
+
+    # Seeding again appends after the existing ids
+    more = seed(engine, scale=0.01, seed_value=2, chunk_size=500)
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT COUNT(*) FROM users")) == written["users"] + more["users"]
@@ -0,0 +1,41 @@
+"""
+Production SQLite mode: WAL on the writer, query-only read connections and
+BEGIN IMMEDIATE for write transactions.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import sqlite_pragmas
+
+
+def test_writer_uses_wal_and_begins_immediate(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    sqlite_pragmas(engine, immediate=True)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    with engine.begin() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    assert statements[0] == "BEGIN IMMEDIATE"
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM t")).scalar() == 1
+
+
+def test_read_pool_refuses_writes(tmp_path):
+    path = tmp_path / "ro.db"
+    writer = create_engine(f"sqlite:///{path}")
+    sqlite_pragmas(writer)
+    with writer.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+
+    reader = create_engine(f"sqlite:///{path}")
+    sqlite_pragmas(reader, read_only=True)
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM t")).scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (1)"))
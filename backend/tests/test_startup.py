@@ -0,0 +1,40 @@
+"""
+Worker startup: heavy SDKs stay out of the import of app.main, and every
+model is registered on the one shared metadata.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from app.core.database import Base
+from app.models.user import User
+from app.models.reading import ReadingSession
+from app.models.payment import Transaction, StripeEvent
+from app.models.product import Product
+from app.models.stream import LiveStream
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("stripe", "jose", "passlib", "httpx")
+
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    script = (
+        "import json, sys\n"
+        "import app.main\n"
+        "from app.core.metrics import metrics\n"
+        f"print(json.dumps({{'loaded': [m for m in {DEFERRED!r} if m in sys.modules],"
+        " 'import': metrics.startup['import']}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=BACKEND, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result["loaded"] == []
+    assert result["import"] > 0
+
+
+def test_models_share_one_metadata():
+    for model in (User, ReadingSession, Transaction, StripeEvent, Product, LiveStream):
+        assert model.__table__.metadata is Base.metadata
+    assert {"users", "readers", "reading_sessions", "chat_messages", "transactions", "stripe_events",
+            "products", "live_streams", "stream_gifts"} <= set(Base.metadata.tables)
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from app.services.stripe_service import CheckoutError, StripeService, TOP_UP_CENTS
+
+
+class MockStripe:
+    """Local stand-in for the Stripe API"""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0, decline: bool = False):
+        self.requests = []
+        self.failures = failures
+        self.decline = decline
+        self.delay = delay
+        self.sessions = {}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        path = request.url.path
+        if path == "/v1/prices" and request.method == "GET":
+            return httpx.Response(200, json={"object": "list", "data": [], "has_more": False, "url": path})
+        if path == "/v1/prices":
+            return httpx.Response(200, json={"id": "price_top_up", "object": "price"})
+        if path == "/v1/checkout/sessions":
+            if self.decline:
+                return httpx.Response(400, json={"error": {"type": "invalid_request_error",
+                                                           "message": "Invalid email address"}})
+            if self.failures:
+                self.failures -= 1
+                return httpx.Response(503, json={"error": {"message": "unavailable"}},
+                                      headers={"Stripe-Should-Retry": "true"})
+            key = request.headers["Idempotency-Key"]
+            form = parse_qs(request.content.decode())
+            session = self.sessions.setdefault(key, {
+                "id": f"cs_{len(self.sessions)}", "object": "checkout.session",
+                "url": f"https://checkout.stripe.test/{len(self.sessions)}",
+                "price": form["line_items[0][price]"][0],
+            })
+            return httpx.Response(200, content=json.dumps(session))
+        return httpx.Response(404, json={"error": {"message": "not found"}})
+
+    def calls(self, method: str, path: str) -> int:
+        return sum(1 for r in self.requests if r.method == method and r.url.path == path)
+
+
+def make_service(mock: MockStripe) -> StripeService:
+    return StripeService(api_key="sk_test", transport=httpx.MockTransport(mock))
+
+
+def test_checkouts_run_concurrently_and_share_one_cached_price():
+    mock = MockStripe(delay=0.05)
+    service = make_service(mock)
+
+    async def scenario():
+        started = time.perf_counter()
+        sessions = await asyncio.gather(*(
+            service.create_top_up_checkout(i, f"user{i}@example.com", f"checkout:{i}:a") for i in range(20)
+        ))
+        elapsed = time.perf_counter() - started
+        await service.aclose()
+        return sessions, elapsed
+
+    sessions, elapsed = asyncio.run(scenario())
+    assert elapsed < 20 * 0.05  # requests overlapped instead of queueing on the loop
+    assert mock.calls("GET", "/v1/prices") == 1
+    assert mock.calls("POST", "/v1/prices") == 1
+    assert {session["price"] for session in sessions} == {"price_top_up"}
+    assert len({session.url for session in sessions}) == 20
+    price = next(r for r in mock.requests if r.method == "POST" and r.url.path == "/v1/prices")
+    assert parse_qs(price.content.decode())["unit_amount"] == [str(TOP_UP_CENTS)]
+
+
+def test_retries_reuse_the_idempotency_key():
+    mock = MockStripe(failures=1)
+    service = make_service(mock)
+
+    async def scenario():
+        first = await service.create_top_up_checkout(1, "user@example.com", "checkout:1:retry")
+        again = await service.create_top_up_checkout(1, "user@example.com", "checkout:1:retry")
+        await service.aclose()
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    attempts = [r for r in mock.requests if r.url.path == "/v1/checkout/sessions"]
+    assert len(attempts) == 3
+    assert {r.headers["Idempotency-Key"] for r in attempts} == {"checkout:1:retry"}
+    assert first.id == again.id
+
+
+def test_stripe_errors_surface_as_checkout_errors():
+    service = make_service(MockStripe(decline=True))
+
+    async def scenario():
+        try:
+            await service.create_top_up_checkout(1, "not-an-email", "checkout:1:bad")
+        finally:
+            await service.aclose()
+
+    with pytest.raises(CheckoutError, match="Invalid email address"):
+        asyncio.run(scenario())
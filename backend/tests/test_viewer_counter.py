@@ -0,0 +1,83 @@
+import asyncio
+
+from app.models.stream import LiveStream
+from app.services.viewer_service import HyperLogLog, ViewerCounter
+from app.services.websocket_manager import ConnectionManager
+from .test_websocket_manager import FakePresence, FakeWebSocket
+
+
+def test_sketch_estimates_within_a_few_percent_at_constant_size():
+    sketch = HyperLogLog()
+    for viewer in range(100_000):
+        sketch.add(viewer)
+        sketch.add(viewer)  # repeat visits do not count twice
+    assert len(sketch.to_bytes()) == 4096
+    assert abs(sketch.count() - 100_000) / 100_000 < 0.05
+
+    left, right = HyperLogLog(), HyperLogLog()
+    for viewer in range(20_000):
+        (left if viewer % 2 else right).add(viewer)
+    left.merge(right)
+    assert abs(left.count() - 20_000) / 20_000 < 0.05
+
+
+def test_room_joins_are_counted_and_flushed_in_bulk(async_session_factory, db_session, query_counter):
+    streams = [LiveStream(title=f"S{i}", is_live=True) for i in range(10)]
+    db_session.add_all(streams)
+    db_session.commit()
+    viewers = ViewerCounter()
+    viewers.session_factory = async_session_factory
+
+    async def scenario():
+        manager = ConnectionManager(presence=FakePresence())
+        manager.on_room_change = viewers.on_room_change
+        for user_id in ("1", "2", "3"):
+            await manager.connect(FakeWebSocket(), user_id)
+            for stream in streams:
+                manager.subscribe(user_id, f"stream:{stream.id}")
+        manager.subscribe("1", f"stream:{streams[0].id}")  # already watching
+        manager.disconnect("3")
+        for connection in manager.active_connections.values():
+            connection.stop()
+
+    asyncio.run(scenario())
+    assert viewers.pending_delta(streams[0].id) == 2
+
+    with query_counter.measure() as counter:
+        asyncio.run(viewers.flush())
+    assert counter.count <= 5  # BEGIN, counts, sketch read, sketch write, COMMIT
+
+    db_session.expire_all()
+    for stream in db_session.query(LiveStream):
+        assert (stream.viewer_count, stream.unique_viewers) == (2, 3)
+
+    # another worker's sketch merges with the stored one
+    other = ViewerCounter()
+    other.session_factory = async_session_factory
+    other.join(streams[0].id, "4")
+    other.leave(streams[0].id)
+    asyncio.run(other.flush())
+    db_session.expire_all()
+    stream = db_session.get(LiveStream, streams[0].id)
+    assert (stream.viewer_count, stream.unique_viewers) == (2, 4)
+
+
+def test_empty_rooms_drop_their_sketch_once_it_is_stored(async_session_factory, db_session):
+    stream = LiveStream(title="S", is_live=True)
+    db_session.add(stream)
+    db_session.commit()
+    viewers = ViewerCounter()
+    viewers.session_factory = async_session_factory
+
+    for viewer_id in ("1", "2"):
+        viewers.join(stream.id, viewer_id)
+    viewers.leave(stream.id)
+    asyncio.run(viewers.flush())
+    assert stream.id in viewers._sketches  # one viewer is still watching
+
+    viewers.leave(stream.id)
+    asyncio.run(viewers.flush())
+    assert stream.id not in viewers._sketches
+    db_session.expire_all()
+    stored = db_session.get(LiveStream, stream.id)
+    assert viewers.unique_viewers(stream.id, stored.unique_viewers) == 2
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+import stripe
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.payment import StripeEvent, StripeEventStatus, Transaction, TransactionType
+from app.services.webhook_service import WebhookService
+
+SECRET = "whsec_test"
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_SECRET", SECRET)
+
+
+def top_up_event(event_id: str, user_id: int, cents: int, paid: bool = True) -> dict:
+    return {
+        "id": event_id,
+        "type": "checkout.session.completed",
+        "data": {"object": {
+            "amount_total": cents,
+            "payment_status": "paid" if paid else "unpaid",
+            "payment_intent": f"pi_{event_id}",
+            "metadata": {"user_id": str(user_id), "type": "add_funds"},
+        }},
+    }
+
+
+def signed(event: dict, secret: str = SECRET):
+    payload = json.dumps(event)
+    return payload, {"Stripe-Signature": stripe.WebhookSignature.generate_signature_header(payload, secret),
+                     "Content-Type": "application/json"}
+
+
+def test_webhook_verifies_signature_and_deduplicates_event_ids(client, db_session):
+    event = top_up_event("evt_1", user_id=1, cents=2500)
+    payload, headers = signed(event, secret="whsec_wrong")
+    assert client.post("/api/payments/webhook", content=payload, headers=headers).status_code == 400
+
+    payload, headers = signed(event)
+    first = client.post("/api/payments/webhook", content=payload, headers=headers)
+    again = client.post("/api/payments/webhook", content=payload, headers=headers)
+    assert first.json() == {"received": True, "duplicate": False}
+    assert again.json() == {"received": True, "duplicate": True}
+    assert db_session.query(StripeEvent).filter_by(event_id="evt_1").count() == 1
+
+
+def test_replayed_events_credit_once_in_one_batch(async_session_factory, db_session, query_counter):
+    users = [User(email=f"payer{i}@example.com", first_name="P", last_name=str(i)) for i in range(3)]
+    db_session.add_all(users)
+    db_session.commit()
+    webhooks = WebhookService(batch_size=100)
+    webhooks.session_factory = async_session_factory
+
+    received = [top_up_event(f"evt_{i}", users[i % 3].id, 1000) for i in range(30)]
+    received += [top_up_event("evt_unpaid", users[0].id, 1000, paid=False),
+                 top_up_event("evt_ghost", 999, 1000),
+                 {"id": "evt_other", "type": "customer.created", "data": {"object": {}}}]
+
+    async def ingest():
+        for event in received + received[:10]:  # Stripe redelivers
+            await webhooks.store_events([event])
+        return await webhooks.store_events(received[:3] + received[:3])
+
+    assert asyncio.run(ingest()) == [False] * 6
+    with query_counter.measure() as counter:
+        assert asyncio.run(webhooks.process_pending()) == 33
+    assert counter.count <= 10  # independent of how many events were in the batch
+    assert asyncio.run(webhooks.process_pending()) == 0
+
+    db_session.expire_all()
+    assert [db_session.get(User, user.id).balance for user in users] == [100.0, 100.0, 100.0]
+    deposits = db_session.query(Transaction).filter_by(type=TransactionType.DEPOSIT).all()
+    assert sorted(t.stripe_payment_intent_id for t in deposits) == sorted(f"pi_evt_{i}" for i in range(30))
+    status = {e.event_id: e.status for e in db_session.query(StripeEvent)}
+    assert status["evt_unpaid"] == StripeEventStatus.IGNORED
+    assert status["evt_other"] == StripeEventStatus.IGNORED
+    assert status["evt_ghost"] == StripeEventStatus.FAILED
+    assert status["evt_0"] == StripeEventStatus.PROCESSED
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from app.services.websocket_manager import ConnectionManager, DISCONNECT
+
+
+class FakePresence:
+    on_change = None
+
+    async def connect(self, user_id):
+        pass
+
+    def disconnect(self, user_id):
+        pass
+
+    def heartbeat(self, user_id):
+        pass
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(payload)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_slow_client_does_not_stall_room_fanout():
+    async def scenario():
+        manager = ConnectionManager(presence=FakePresence(), max_queue=4)
+        slow, fast = FakeWebSocket(delay=10), FakeWebSocket()
+        await manager.connect(slow, "1")
+        await manager.connect(fast, "2")
+        manager.subscribe("1", "stream:7")
+        manager.subscribe("2", "stream:7")
+
+        for i in range(20):
+            await manager.publish("stream:7", {"type": "chat", "n": i})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        assert len(fast.sent) == 20
+        # the slow client's queue stays bounded, keeping only the newest messages
+        assert manager.active_connections["1"].queue.qsize() <= 4
+        assert manager.active_connections["1"].dropped > 0
+        for connection in manager.active_connections.values():
+            connection.stop()
+
+    asyncio.run(scenario())
+
+
+def test_broadcast_serializes_once():
+    async def scenario():
+        manager = ConnectionManager(presence=FakePresence())
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for i, ws in enumerate(sockets):
+            await manager.connect(ws, str(i))
+        await manager.broadcast({"type": "announcement"})
+        await asyncio.sleep(0)
+        payloads = [ws.sent[0] for ws in sockets]
+        assert all(p is payloads[0] for p in payloads)
+        for connection in manager.active_connections.values():
+            connection.stop()
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_policy_evicts_slow_consumer():
+    async def scenario():
+        manager = ConnectionManager(presence=FakePresence(), max_queue=2, slow_consumer_policy=DISCONNECT)
+        slow = FakeWebSocket(delay=10)
+        await manager.connect(slow, "1")
+        manager.subscribe("1", "session:3")
+        for i in range(5):
+            await manager.publish("session:3", "x")
+        await asyncio.sleep(0)
+        assert "1" not in manager.active_connections
+        assert manager.room_size("session:3") == 0
+        assert slow.closed_with == 1013
+
+    asyncio.run(scenario())
+
+
+def test_messages_cross_workers_over_the_bus():
+    from app.services.message_bus import InMemoryBus
+
+    async def scenario():
+        worker_a = ConnectionManager(presence=FakePresence(), bus=InMemoryBus(hub="workers"))
+        worker_b = ConnectionManager(presence=FakePresence(), bus=InMemoryBus(hub="workers"))
+        await worker_a.start()
+        await worker_b.start()
+
+        ws = FakeWebSocket()
+        await worker_a.connect(ws, "42")
+        worker_a.subscribe("42", "stream:1")
+
+        await worker_b.send_personal_message({"type": "dm"}, "42")
+        await worker_b.publish("stream:1", {"type": "chat"})
+        await worker_b.broadcast("hello")
+        await asyncio.sleep(0.05)
+
+        assert ws.sent == ['{"type": "dm"}', '{"type": "chat"}', "hello"]
+        for worker in (worker_a, worker_b):
+            for connection in worker.active_connections.values():
+                connection.stop()
+            await worker.stop()
+
+    asyncio.run(scenario())
+
+
+def test_bus_backend_missing_a_transport_method_fails_on_creation():
+    from app.services.message_bus import MessageBus
+
+    class NoSend(MessageBus):
+        async def _subscribe(self):
+            pass
+
+        async def _unsubscribe(self):
+            pass
+
+    with pytest.raises(TypeError):
+        NoSend()